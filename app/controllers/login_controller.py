@@ -1,12 +1,12 @@
 # app/controllers/login_controller.py
-from PyQt6 import uic
 from PyQt6.QtWidgets import QMainWindow, QMessageBox, QLineEdit, QPushButton, QLabel
 from PyQt6.QtCore import QThread, pyqtSignal, QObject
-from app.models.usuario import UsuarioModel
-from app.controllers.register_controller import RegisterController
-from app.controllers.main_controller import MainController
-from app.utils.auth_service import verify_password
 import logging
+from app.gui.ui_loader import load_ui
+
+# The DB model (PyMySQL), the password hashers and the other windows are
+# imported where they are first used so the login window shows as soon as
+# possible; app.utils.warmup preloads them in the background after it does.
 
 logger = logging.getLogger(__name__)
 
@@ -17,11 +17,12 @@ class LoginWorker(QObject):
         super().__init__()
         self.user = user
         self.pwd = pwd
-        self.usuario_model = UsuarioModel()
 
     def run(self):
         try:
-            user_row = self.usuario_model.obtener_usuario(self.user)
+            from app.models.usuario import UsuarioModel
+            from app.utils.auth_service import verify_password
+            user_row = UsuarioModel().obtener_usuario(self.user)
             if user_row is None:
                 self.finished.emit(False, "Usuario no encontrado o error de BD")
                 return
@@ -38,7 +39,7 @@ class LoginWorker(QObject):
 class LoginController(QMainWindow):
     def __init__(self):
         super().__init__()
-        uic.loadUi("app/gui/login.ui", self)
+        load_ui("login.ui", self)
 
         # Widgets
         self.inputUser: QLineEdit = self.findChild(QLineEdit, "inputUser")
@@ -100,6 +101,7 @@ class LoginController(QMainWindow):
                     logger.warning("No se pudo crear MainWindow directamente: %s", e)
 
                 
+                from app.controllers.main_controller import MainController
                 self.main_window = MainController(username=self.inputUser.text().strip())
                 
             except Exception as e:
@@ -125,6 +127,7 @@ class LoginController(QMainWindow):
             QMessageBox.critical(self, "Error", msg)
 
     def go_to_register(self, event):
+        from app.controllers.register_controller import RegisterController
         self.register_window = RegisterController()
         self.register_window.show()
         self.hide()
@@ -1,7 +1,7 @@
 # app/controllers/main_controller.py
 import logging
-from PyQt6 import uic
 from PyQt6.QtWidgets import QMainWindow
+from app.gui.ui_loader import load_ui
 
 logger = logging.getLogger(__name__)
 
@@ -33,7 +33,7 @@ class MainController(QMainWindow):
 
         # Fallback: si no se pudo importar la MainWindow compleja, cargar UI simple
         try:
-            uic.loadUi("app/gui/main_window.ui", self)
+            load_ui("main_window.ui", self)
         except Exception:
             # si tampoco existe el ui, simplemente no hacemos nada visible
             return
@@ -1,13 +1,13 @@
 # app/controllers/register_controller.py
-from PyQt6 import uic
 from PyQt6.QtWidgets import QMainWindow, QMessageBox, QLineEdit, QPushButton, QLabel
 from PyQt6.QtCore import QThread
 from app.workers.db_worker import DBWorker
+from app.gui.ui_loader import load_ui
 
 class RegisterController(QMainWindow):
     def __init__(self):
         super().__init__()
-        uic.loadUi("app/gui/register.ui", self)
+        load_ui("register.ui", self)
 
         # Widgets (aseguramos tipo correcto)
         self.inputUser: QLineEdit = self.findChild(QLineEdit, "inputUser")
@@ -12,22 +12,31 @@ from io import BytesIO, StringIO
 import re
 import csv
 import base64
+import time
+import math
 
 from app.utils.shared import (
-    MAX_WIDTH, load_settings, save_settings, EXPORTS_SESSION, EXPORTS_BD,
-    REPORTLAB_AVAILABLE, db_save_event, get_or_create_user_id, db_save_export_file,
-    db_list_exported, db_fetch_export_file, pdfcanvas
+    MAX_WIDTH, load_settings, EXPORTS_SESSION, EXPORTS_BD,
+    db_save_event, get_or_create_user_id, db_save_export_file,
+    db_list_exported, db_export_to_tempfile
 )
 
 import logging
-from app.workers.serial_thread import SerialThread
 from app.logic import line_processing
+from app.logic.debounce import SignalConditioner
+from app.serial.command_link import CommandLink
+from app.serial.led_scheduler import LedScheduler
+from app.gui.telemetry_panel import TelemetryPanel
+from app.gui.theme import ThemeManager, set_state
+from app.utils.telemetry import telemetry
 
 logger = logging.getLogger(__name__)
 
 
 class MainWindow(QWidget):
-    def __init__(self, username):
+    def __init__(self, username, use_db=True, scan_ports=True):
+        # use_db=False: no user lookup, nothing saved; scan_ports=False: never lists or
+        # auto-connects serial ports (replay and benchmarks feed on_line themselves)
         super().__init__()
         self.username = username
         self.setWindowTitle(f"Protoboard - Usuario: {username}")
@@ -40,17 +49,21 @@ class MainWindow(QWidget):
         self.sensor_last_state = False
 
         self.serial_thread = None
-        # reset ACK handling
-        self._waiting_reset_ack = False
-        self._reset_ack_timer = QTimer(self)
-        self._reset_ack_timer.setSingleShot(True)
-        self._reset_ack_timer.timeout.connect(self._on_reset_ack_timeout)
+        # LED/RESET commands: ACK tracking, retries and hardware reset fallback
+        self._link_timer = QTimer(self)
+        self._link_timer.setSingleShot(True)
+        self._link_timer.timeout.connect(lambda: self.command_link.poll())
+        self.command_link = CommandLink(self._serial_write, schedule=self._schedule_link, flush_delay=0.02)
+        self.led_scheduler = LedScheduler(self.command_link,
+                                          on_sent=partial(line_processing.on_led_sent, self),
+                                          on_settled=partial(line_processing.on_led_settled, self))
 
     # Port scan timer for auto-detection
         self._port_scan_timer = QTimer(self)
         self._port_scan_timer.setInterval(1500)
         self._port_scan_timer.timeout.connect(self._scan_ports)
-        self._port_scan_timer.start()
+        if scan_ports:
+            self._port_scan_timer.start()
 
         # small debounce to avoid rapid reconnect attempts
         self._last_autoconnect_port = None
@@ -58,11 +71,22 @@ class MainWindow(QWidget):
 
         settings = load_settings()
         self.current_theme = settings.get("theme", "light")
+        self.theme_manager = ThemeManager(self, saved_theme=self.current_theme)
+
+        # sensor debounce/hysteresis before anything is counted or saved
+        try:
+            self.sensor_conditioner = SignalConditioner.from_settings(settings.get("sensor_conditioning"))
+        except (TypeError, ValueError):
+            logger.exception("sensor_conditioning inválido en settings.json; usando valores por defecto")
+            self.sensor_conditioner = SignalConditioner.from_settings(None)
+        self._sensor_timer = QTimer(self)
+        self._sensor_timer.setSingleShot(True)
+        self._sensor_timer.timeout.connect(lambda: line_processing.poll_sensor(self))
 
         self.db_user_id = None
         self.db_available = False
         try:
-            if get_or_create_user_id is not None:
+            if use_db and get_or_create_user_id is not None:
                 self.db_user_id = get_or_create_user_id(self.username)
                 if self.db_user_id:
                     self.db_available = True
@@ -77,7 +101,7 @@ class MainWindow(QWidget):
 
         try:
             from app import serial as _serial_pkg
-            if getattr(_serial_pkg, 'serial_ui', None) is not None:
+            if scan_ports and getattr(_serial_pkg, 'serial_ui', None) is not None:
                 try:
                     _serial_pkg.serial_ui._scan_ports(self)
                 except Exception:
@@ -85,42 +109,9 @@ class MainWindow(QWidget):
         except Exception:
             logger.exception("Error initializing serial ports list")
 
-    def qss_light(self):
-        return """
-        QWidget { background: #f3f6fb; color: #222; font-family: "Segoe UI", Roboto, Arial, sans-serif; }
-        QLabel#title { font-size:20px; font-weight:700; color:#23395d; }
-        QLabel#counter { background: qlineargradient(x1:0,y1:0,x2:1,y2:0, stop:0 #6a89ff, stop:1 #5ecbe6); color:white; padding:10px 16px; border-radius:10px; font-weight:700; }
-        QPushButton { background: white; border:1px solid #d7e0ef; padding:8px 10px; border-radius:8px; font-weight:600; }
-        QPushButton:hover { background:#f0f6ff; }
-        QPushButton#connectBtn { background:#23395d; color:white; border:none; min-width:130px; }
-        QPushButton#resetBtn { background:#ff6b6b; color:white; border:none; }
-        QWidget.card { background:white; border-radius:10px; padding:10px; border:1px solid rgba(0,0,0,0.04); }
-        QLabel.smallNote { color:#6c7a89; font-size:12px; }
-        """
-
-    def qss_dark(self):
-        return """
-        QWidget { background:#0f1724; color:#e6eef8; font-family: "Segoe UI", Roboto, Arial, sans-serif; }
-        QLabel#title { font-size:20px; font-weight:700; color:#9bd1ff; }
-        QLabel#counter { background: qlineargradient(x1:0,y1:0,x2:1,y2:0, stop:0 #2b6bff, stop:1 #00c1d4); color:#021029; padding:10px 16px; border-radius:10px; font-weight:700; }
-        QPushButton { background:#101826; border:1px solid #243444; padding:8px 10px; border-radius:8px; color:#e6eef8; font-weight:600; }
-        QPushButton:hover { background:#162134; }
-        QPushButton#connectBtn { background:#0b2946; color:#bfe7ff; border:1px solid #24455f; }
-        QPushButton#resetBtn { background:#b94a4a; color:white; border:none; }
-        QWidget.card { background:#0b1520; border-radius:10px; padding:10px; border:1px solid #112233; }
-        QLabel.smallNote { color:#9fb0c8; font-size:12px; }
-        """
-
     def apply_theme(self, theme: str):
-        if theme == "dark":
-            self.setStyleSheet(self.qss_dark())
-            self.theme_btn.setText("☀️  Claro")
-        else:
-            self.setStyleSheet(self.qss_light())
-            self.theme_btn.setText("🌙  Oscuro")
-        self.current_theme = theme
-        save_settings({"theme": self.current_theme})
-        self.update_ui()
+        self.current_theme = self.theme_manager.apply(theme)
+        self.theme_btn.setText("☀️  Claro" if self.current_theme == "dark" else "🌙  Oscuro")
 
     def build_ui_centered(self):
         outer = QVBoxLayout(self)
@@ -310,6 +301,10 @@ class MainWindow(QWidget):
         self.events_view.setMaximumHeight(200)
         content_layout.addWidget(self.events_view)
 
+        # diagnostics: serial rate, DB latency, UI frame time (collapsed by default)
+        self.telemetry_panel = TelemetryPanel()
+        content_layout.addWidget(self.telemetry_panel)
+
         center_h.addWidget(content)
         center_h.addStretch()
         outer.addLayout(center_h)
@@ -361,8 +356,16 @@ class MainWindow(QWidget):
     def reset_total(self):
         return line_processing.reset_total(self)
 
-    def _on_reset_ack_timeout(self):
-        return line_processing.on_reset_ack_timeout(self)
+    def _serial_write(self, text: str):
+        if not (self.serial_thread and self.serial_thread.isRunning()):
+            raise IOError("puerto serie no conectado")
+        self.serial_thread.write(text)
+
+    def _schedule_link(self, delay):
+        if delay is None:
+            self._link_timer.stop()
+        else:
+            self._link_timer.start(max(0, math.ceil(delay * 1000)))
 
     # ---------------- export logic ----------------
     def export_dialog(self):
@@ -408,18 +411,9 @@ class MainWindow(QWidget):
 
     # ---------------- UI update ----------------
     def update_ui(self):
-        if self.sensor_last_state:
-            self.sensor_status_label.setText("🔴 Sensor: Bloqueado")
-            if self.current_theme == "dark":
-                self.sensor_status_label.setStyleSheet("padding:6px; border-radius:6px; background:#4a1620; color:#ffdcdc; font-weight:700;")
-            else:
-                self.sensor_status_label.setStyleSheet("padding:6px; border-radius:6px; background:#ffdede; color:#8b1a1a; font-weight:700;")
-        else:
-            self.sensor_status_label.setText("🟢 Sensor: Libre")
-            if self.current_theme == "dark":
-                self.sensor_status_label.setStyleSheet("padding:6px; border-radius:6px; background:#163b20; color:#dfffe6; font-weight:700;")
-            else:
-                self.sensor_status_label.setStyleSheet("padding:6px; border-radius:6px; background:#dff5e0; color:#1a8f2a; font-weight:700;")
+        t0 = time.perf_counter()
+        self.sensor_status_label.setText("🔴 Sensor: Bloqueado" if self.sensor_last_state else "🟢 Sensor: Libre")
+        set_state(self.sensor_status_label, "blocked" if self.sensor_last_state else "free")
 
         self.counter_label.setText(f"📡  Contador (sensor): {self.total_counter}")
 
@@ -427,35 +421,17 @@ class MainWindow(QWidget):
             state = self.led_states[i]
             lbl = self.led_state_labels[i]
             btn = self.led_buttons_toggle[i]
-            if state:
-                lbl.setText("🟢  ON")
-                btn.setText("⚪  Apagar")
-                if self.current_theme == "dark":
-                    lbl.setStyleSheet("padding:6px; border-radius:6px; background:#1a6b2a; color:#e6fff0; font-weight:700;")
-                else:
-                    lbl.setStyleSheet("padding:6px; border-radius:6px; background:#dff5e0; color:#1a8f2a; font-weight:700;")
-            else:
-                lbl.setText("⚪  OFF")
-                btn.setText("🟢  Encender")
-                if self.current_theme == "dark":
-                    lbl.setStyleSheet("padding:6px; border-radius:6px; background:#131a22; color:#9fb0c8; font-weight:700;")
-                else:
-                    lbl.setStyleSheet("padding:6px; border-radius:6px; background:#f2f5f9; color:#6c7a89; font-weight:700;")
+            # ⏳ until the ESP32 acknowledges the requested state
+            pending = self.led_scheduler.pending(i + 1)
+            lbl.setToolTip("Esperando confirmación del ESP32" if pending else "")
+            text = "🟢  ON" if state else "⚪  OFF"
+            lbl.setText(f"{text}  ⏳" if pending else text)
+            btn.setText("⚪  Apagar" if state else "🟢  Encender")
+            set_state(lbl, "on" if state else "off")
 
-        state4 = self.led_states[3]
         lbl4 = self.led_state_labels[3]
-        if state4:
-            lbl4.setText("🟢  ON")
-            if self.current_theme == "dark":
-                lbl4.setStyleSheet("padding:6px; border-radius:6px; background:#1a6b2a; color:#e6fff0; font-weight:700;")
-            else:
-                lbl4.setStyleSheet("padding:6px; border-radius:6px; background:#dff5e0; color:#1a8f2a; font-weight:700;")
-        else:
-            lbl4.setText("⚪  OFF")
-            if self.current_theme == "dark":
-                lbl4.setStyleSheet("padding:6px; border-radius:6px; background:#131a22; color:#9fb0c8; font-weight:700;")
-            else:
-                lbl4.setStyleSheet("padding:6px; border-radius:6px; background:#f2f5f9; color:#6c7a89; font-weight:700;")
+        lbl4.setText("🟢  ON" if self.led_states[3] else "⚪  OFF")
+        set_state(lbl4, "on" if self.led_states[3] else "off")
 
         recent = self.history[-200:]
         lines = [f"{t[0]} - LED {t[1]} - {t[2]}" for t in recent]
@@ -468,12 +444,14 @@ class MainWindow(QWidget):
         if not (self.serial_thread and self.serial_thread.isRunning()):
             self.connect_btn.setText("🔌  Conectar")
 
+        telemetry.gauge("history_size", len(self.history))
+        telemetry.observe("ui_frame_ms", (time.perf_counter() - t0) * 1000)
+
     def on_toggle_theme(self):
-        self.current_theme = "dark" if self.current_theme == "light" else "light"
-        self.apply_theme(self.current_theme)
+        self.apply_theme("dark" if self.current_theme == "light" else "light")
 
     def closeEvent(self, event):
-        save_settings({"theme": self.current_theme})
+        self.theme_manager.flush()
         if self.serial_thread and self.serial_thread.isRunning():
             self.serial_thread.stop()
         super().closeEvent(event)
@@ -0,0 +1,128 @@
+from PyQt6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QGridLayout, QLabel, QPushButton,
+    QToolButton, QFileDialog, QMessageBox, QApplication
+)
+from PyQt6.QtCore import Qt, QTimer
+from datetime import datetime
+
+from app.utils.telemetry import telemetry
+
+REFRESH_MS = 1000
+
+# (key, label) of the windows shown as "last / p50 / p95 / max"
+ROWS = [
+    ("line_ms", "Procesado de línea (ms)"),
+    ("db_save_ms", "Guardado en BD (ms)"),
+    ("ui_frame_ms", "Refresco de UI (ms)"),
+]
+
+
+def _fmt(stats, key):
+    v = stats.get(key)
+    return "-" if v is None else f"{v:.2f}"
+
+
+class TelemetryPanel(QWidget):
+    """Collapsible diagnostics card; refreshes only while expanded."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setProperty("class", "card")
+        outer = QVBoxLayout(self)
+        outer.setContentsMargins(8, 8, 8, 8)
+        outer.setSpacing(6)
+
+        self.toggle_btn = QToolButton()
+        self.toggle_btn.setText("Diagnóstico")
+        self.toggle_btn.setCheckable(True)
+        self.toggle_btn.setToolButtonStyle(Qt.ToolButtonStyle.ToolButtonTextBesideIcon)
+        self.toggle_btn.setArrowType(Qt.ArrowType.RightArrow)
+        self.toggle_btn.toggled.connect(self.set_expanded)
+        outer.addWidget(self.toggle_btn)
+
+        self.body = QWidget()
+        grid = QGridLayout(self.body)
+        grid.setContentsMargins(4, 4, 4, 4)
+        grid.setHorizontalSpacing(14)
+
+        self.serial_lbl = QLabel("-")
+        self.db_lbl = QLabel("-")
+        self.history_lbl = QLabel("-")
+        self.sensor_lbl = QLabel("-")
+        grid.addWidget(QLabel("Serial (líneas/s)"), 0, 0)
+        grid.addWidget(self.serial_lbl, 0, 1, 1, 4)
+        grid.addWidget(QLabel("BD guardados / fallos"), 1, 0)
+        grid.addWidget(self.db_lbl, 1, 1, 1, 4)
+        grid.addWidget(QLabel("Historial (eventos)"), 2, 0)
+        grid.addWidget(self.history_lbl, 2, 1, 1, 4)
+        grid.addWidget(QLabel("Sensor flancos / glitches"), 3, 0)
+        grid.addWidget(self.sensor_lbl, 3, 1, 1, 4)
+
+        for col, head in enumerate(("último", "p50", "p95", "máx"), start=1):
+            grid.addWidget(QLabel(f"<b>{head}</b>"), 4, col)
+        self.window_lbls = {}
+        for row, (key, text) in enumerate(ROWS, start=5):
+            grid.addWidget(QLabel(text), row, 0)
+            lbls = [QLabel("-") for _ in range(4)]
+            for col, lbl in enumerate(lbls, start=1):
+                lbl.setAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                grid.addWidget(lbl, row, col)
+            self.window_lbls[key] = lbls
+
+        btns = QHBoxLayout()
+        btns.addStretch()
+        copy_btn = QPushButton("Copiar JSON")
+        copy_btn.clicked.connect(self.copy_json)
+        save_btn = QPushButton("Guardar JSON")
+        save_btn.clicked.connect(self.save_json)
+        reset_btn = QPushButton("Reiniciar")
+        reset_btn.clicked.connect(self.reset)
+        btns.addWidget(copy_btn)
+        btns.addWidget(save_btn)
+        btns.addWidget(reset_btn)
+        grid.addLayout(btns, len(ROWS) + 5, 0, 1, 5)
+
+        outer.addWidget(self.body)
+        self.body.setVisible(False)
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(REFRESH_MS)
+        self._timer.timeout.connect(self.refresh)
+
+    def set_expanded(self, expanded: bool):
+        self.toggle_btn.setArrowType(Qt.ArrowType.DownArrow if expanded else Qt.ArrowType.RightArrow)
+        self.body.setVisible(expanded)
+        if expanded:
+            self.refresh()
+            self._timer.start()
+        else:
+            self._timer.stop()
+
+    def refresh(self):
+        snap = telemetry.snapshot()
+        serial = snap["serial_lines"]
+        self.serial_lbl.setText(f"{serial['per_s']:.1f}  (total {serial['total']})")
+        self.db_lbl.setText(f"{snap['db_saves']} / {snap['db_failures']}")
+        self.history_lbl.setText(str(snap["history_size"]))
+        self.sensor_lbl.setText(f"{snap['sensor_edges']} / {snap['sensor_glitches']}")
+        for key, lbls in self.window_lbls.items():
+            stats = snap[key]
+            for lbl, field in zip(lbls, ("last", "p50", "p95", "max")):
+                lbl.setText(_fmt(stats, field))
+
+    def copy_json(self):
+        QApplication.clipboard().setText(telemetry.dump_json())
+
+    def save_json(self):
+        default = f"telemetria_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.json"
+        path, _ = QFileDialog.getSaveFileName(self, "Guardar diagnóstico", default, "JSON (*.json)")
+        if not path:
+            return
+        try:
+            telemetry.dump_json(path)
+        except Exception as e:
+            QMessageBox.warning(self, "Diagnóstico", f"No se pudo guardar: {e}")
+
+    def reset(self):
+        telemetry.reset()
+        self.refresh()
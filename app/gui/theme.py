@@ -0,0 +1,115 @@
+"""Themes for the protoboard window.
+
+Each theme's stylesheet is built once (``stylesheet``) and already contains
+the rules for every widget state, selected through a ``state`` dynamic
+property (``on``/``off`` for LEDs, ``blocked``/``free`` for the sensor).
+A state change is then ``set_state(widget, "on")``: a property flip plus one
+re-polish of that widget, instead of a ``setStyleSheet`` that Qt re-parses.
+
+``ThemeManager`` applies the theme to the window and persists the choice to
+``settings.json`` only when it differs from what is stored, debounced so
+quick toggling writes once.
+"""
+from functools import lru_cache
+from string import Template
+
+from PyQt6.QtCore import QTimer
+
+from app.utils.shared import save_settings
+
+THEMES = ("light", "dark")
+
+PALETTES = {
+    "light": {
+        "bg": "#f3f6fb", "fg": "#222", "title": "#23395d",
+        "counter": "stop:0 #6a89ff, stop:1 #5ecbe6", "counter_fg": "white",
+        "btn": "white", "btn_fg": "#222", "btn_border": "1px solid #d7e0ef", "btn_hover": "#f0f6ff",
+        "connect": "#23395d", "connect_fg": "white", "connect_border": "none",
+        "connect_extra": " min-width:130px;",
+        "reset": "#ff6b6b",
+        "card": "white", "card_border": "1px solid rgba(0,0,0,0.04)", "note": "#6c7a89",
+        "on": "#dff5e0", "on_fg": "#1a8f2a",
+        "off": "#f2f5f9", "off_fg": "#6c7a89",
+        "blocked": "#ffdede", "blocked_fg": "#8b1a1a",
+        "free": "#dff5e0", "free_fg": "#1a8f2a",
+    },
+    "dark": {
+        "bg": "#0f1724", "fg": "#e6eef8", "title": "#9bd1ff",
+        "counter": "stop:0 #2b6bff, stop:1 #00c1d4", "counter_fg": "#021029",
+        "btn": "#101826", "btn_fg": "#e6eef8", "btn_border": "1px solid #243444", "btn_hover": "#162134",
+        "connect": "#0b2946", "connect_fg": "#bfe7ff", "connect_border": "1px solid #24455f",
+        "connect_extra": "",
+        "reset": "#b94a4a",
+        "card": "#0b1520", "card_border": "1px solid #112233", "note": "#9fb0c8",
+        "on": "#1a6b2a", "on_fg": "#e6fff0",
+        "off": "#131a22", "off_fg": "#9fb0c8",
+        "blocked": "#4a1620", "blocked_fg": "#ffdcdc",
+        "free": "#163b20", "free_fg": "#dfffe6",
+    },
+}
+
+QSS = Template("""
+QWidget { background: $bg; color: $fg; font-family: "Segoe UI", Roboto, Arial, sans-serif; }
+QLabel#title { font-size:20px; font-weight:700; color:$title; }
+QLabel#counter { background: qlineargradient(x1:0,y1:0,x2:1,y2:0, $counter); color:$counter_fg; padding:10px 16px; border-radius:10px; font-weight:700; }
+QPushButton { background:$btn; border:$btn_border; padding:8px 10px; border-radius:8px; color:$btn_fg; font-weight:600; }
+QPushButton:hover { background:$btn_hover; }
+QPushButton#connectBtn { background:$connect; color:$connect_fg; border:$connect_border;$connect_extra }
+QPushButton#resetBtn { background:$reset; color:white; border:none; }
+QWidget.card { background:$card; border-radius:10px; padding:10px; border:$card_border; }
+QLabel.smallNote { color:$note; font-size:12px; }
+QLabel[state] { padding:6px; border-radius:6px; font-weight:700; }
+QLabel[state="on"] { background:$on; color:$on_fg; }
+QLabel[state="off"] { background:$off; color:$off_fg; }
+QLabel[state="blocked"] { background:$blocked; color:$blocked_fg; }
+QLabel[state="free"] { background:$free; color:$free_fg; }
+""")
+
+SAVE_DELAY_MS = 500
+
+
+@lru_cache(maxsize=None)
+def stylesheet(theme):
+    """Full QSS for ``theme`` (built once per process)."""
+    return QSS.substitute(PALETTES[theme if theme in PALETTES else "light"])
+
+
+def set_state(widget, state):
+    """Switch ``widget`` to another ``state`` rule; no-op (and no re-polish) if unchanged."""
+    if widget.property("state") == state:
+        return False
+    widget.setProperty("state", state)
+    style = widget.style()
+    style.unpolish(widget)
+    style.polish(widget)
+    return True
+
+
+class ThemeManager:
+    def __init__(self, window, saved_theme="light", save_delay_ms=SAVE_DELAY_MS):
+        self.window = window
+        self.theme = None
+        self._saved = saved_theme
+        self._save_timer = QTimer(window)
+        self._save_timer.setSingleShot(True)
+        self._save_timer.setInterval(save_delay_ms)
+        self._save_timer.timeout.connect(self.flush)
+
+    def apply(self, theme):
+        if theme not in THEMES:
+            theme = "light"
+        if theme != self.theme:
+            self.window.setStyleSheet(stylesheet(theme))
+            self.theme = theme
+        if theme != self._saved:
+            self._save_timer.start()
+        else:
+            self._save_timer.stop()
+        return theme
+
+    def flush(self):
+        """Write a pending theme change now (also called on close)."""
+        self._save_timer.stop()
+        if self.theme is not None and self.theme != self._saved:
+            save_settings({"theme": self.theme})
+            self._saved = self.theme
@@ -0,0 +1,96 @@
+"""Load Qt Designer forms without re-parsing the XML on every window.
+
+``load_ui("login.ui", self)`` behaves like ``uic.loadUi`` (children become
+attributes of ``self``) but:
+  - the path is resolved next to this module, so the app works from any
+    working directory
+  - the generated form class is cached per process, keyed by the file's
+    mtime; going back and forth between login and register reuses it
+  - if ``python -m app.gui.ui_loader`` was run, the form class comes from
+    the precompiled ``app/gui/compiled/<name>_ui.py`` and no XML is parsed
+    at all; a compiled module whose source .ui changed since is ignored
+
+Compiled modules are build output (git-ignored); without them everything
+still works through ``uic.loadUiType``.
+"""
+import hashlib
+import importlib
+import logging
+from pathlib import Path
+
+from PyQt6 import uic
+
+logger = logging.getLogger(__name__)
+
+UI_DIR = Path(__file__).resolve().parent
+COMPILED_DIR = UI_DIR / "compiled"
+COMPILED_PACKAGE = "app.gui.compiled"
+
+# path -> (mtime_ns, form class)
+_cache = {}
+
+
+def _sha1(path):
+    return hashlib.sha1(path.read_bytes()).hexdigest()
+
+
+def _compiled_form(path):
+    module_name = f"{COMPILED_PACKAGE}.{path.stem}_ui"
+    if not (COMPILED_DIR / f"{path.stem}_ui.py").exists():
+        return None
+    try:
+        module = importlib.import_module(module_name)
+        if getattr(module, "SOURCE_SHA1", None) != _sha1(path):
+            logger.debug("%s desactualizado respecto de %s; se ignora", module_name, path.name)
+            return None
+    except Exception:
+        logger.exception("No se pudo importar %s", module_name)
+        return None
+    return next((v for k, v in vars(module).items() if k.startswith("Ui_") and isinstance(v, type)), None)
+
+
+def form_class(name):
+    """Form class (``Ui_*``) for ``name``, relative to ``app/gui``."""
+    path = (UI_DIR / name).resolve()
+    mtime = path.stat().st_mtime_ns
+    cached = _cache.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    form = _compiled_form(path)
+    if form is None:
+        form, _ = uic.loadUiType(str(path))
+    _cache[path] = (mtime, form)
+    return form
+
+
+def load_ui(name, widget):
+    """Set up ``widget`` from the form ``name``; returns the form instance."""
+    form = form_class(name)()
+    form.setupUi(widget)
+    # same attribute access as uic.loadUi(path, widget)
+    for attr, value in vars(form).items():
+        setattr(widget, attr, value)
+    return form
+
+
+def compile_all(out_dir=COMPILED_DIR):
+    """Build step: compile every .ui in ``app/gui`` into ``compiled/<name>_ui.py``."""
+    out_dir.mkdir(exist_ok=True)
+    (out_dir / "__init__.py").touch()
+    written = []
+    for path in sorted(UI_DIR.glob("*.ui")):
+        target = out_dir / f"{path.stem}_ui.py"
+        with open(target, "w", encoding="utf-8") as f:
+            uic.compileUi(str(path), f)
+            f.write(f"\n\nSOURCE_SHA1 = {_sha1(path)!r}\n")
+        written.append(target)
+    return written
+
+
+def main():
+    for target in compile_all():
+        print(target.relative_to(UI_DIR.parent.parent))
+
+
+if __name__ == "__main__":
+    main()
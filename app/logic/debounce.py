@@ -0,0 +1,145 @@
+"""Signal conditioning for the IR sensor before anything is persisted.
+
+``SignalConditioner`` turns raw ``SENSOR:`` samples into clean edges:
+  - hysteresis: a sample counts as ON at ``>= on_threshold`` and as OFF at
+    ``<= off_threshold``; values in between keep the current level (for the
+    firmware's 1/0 both thresholds are 0.5)
+  - debounce: a new level must hold for ``rise_ms`` (OFF->ON) or ``fall_ms``
+    (ON->OFF) before it is accepted
+  - minimum dwell: after an edge, the opposite edge is not accepted until
+    ``min_dwell_ms`` have passed
+
+A level that reverts before it is accepted is a glitch and is only counted.
+Confirmation is time-based, so the caller must call ``poll()`` at
+``next_deadline()`` when no further samples arrive (``MainWindow`` uses a
+single-shot QTimer). Times are seconds on any monotonic clock.
+
+Configured from ``settings.json``::
+
+    "sensor_conditioning": {"enabled": true, "debounce_ms": 20, "min_dwell_ms": 50}
+
+``rise_ms``/``fall_ms`` override ``debounce_ms`` per direction.
+"""
+
+ON_VALUES = ("1", "ON", "TRUE")
+OFF_VALUES = ("0", "OFF", "FALSE")
+
+DEFAULTS = {
+    "enabled": True,
+    "debounce_ms": 20.0,
+    "min_dwell_ms": 50.0,
+    "on_threshold": 0.5,
+    "off_threshold": 0.5,
+}
+
+
+def sample_value(raw):
+    """``SENSOR:`` payload -> float (1/ON/TRUE -> 1.0, 0/OFF/FALSE -> 0.0, numbers as is); None if unreadable."""
+    if isinstance(raw, bool):
+        return 1.0 if raw else 0.0
+    if isinstance(raw, (int, float)):
+        return float(raw)
+    s = str(raw).strip().upper()
+    if s in ON_VALUES:
+        return 1.0
+    if s in OFF_VALUES:
+        return 0.0
+    try:
+        return float(s)
+    except ValueError:
+        return None
+
+
+class SignalConditioner:
+    def __init__(self, debounce_ms=20.0, rise_ms=None, fall_ms=None, min_dwell_ms=50.0,
+                 on_threshold=0.5, off_threshold=0.5, initial=False):
+        if off_threshold > on_threshold:
+            raise ValueError("off_threshold no puede ser mayor que on_threshold")
+        self.rise = (debounce_ms if rise_ms is None else rise_ms) / 1000.0
+        self.fall = (debounce_ms if fall_ms is None else fall_ms) / 1000.0
+        self.min_dwell = min_dwell_ms / 1000.0
+        self.on_threshold = on_threshold
+        self.off_threshold = off_threshold
+        self.state = initial
+        self.candidate = None
+        self.candidate_since = None
+        self.last_edge_at = None
+        self.samples = 0
+        self.edges = 0
+        self.glitches = 0
+        self.repeats = 0
+        self.invalid = 0
+
+    @classmethod
+    def from_settings(cls, conf):
+        """Build from the ``sensor_conditioning`` settings dict; None when disabled."""
+        conf = {**DEFAULTS, **(conf or {})}
+        if not conf.get("enabled", True):
+            return None
+        return cls(
+            debounce_ms=float(conf["debounce_ms"]),
+            rise_ms=conf.get("rise_ms"),
+            fall_ms=conf.get("fall_ms"),
+            min_dwell_ms=float(conf["min_dwell_ms"]),
+            on_threshold=float(conf["on_threshold"]),
+            off_threshold=float(conf["off_threshold"]),
+        )
+
+    def _level(self, value):
+        if value >= self.on_threshold:
+            return True
+        if value <= self.off_threshold:
+            return False
+        return self.state if self.candidate is None else self.candidate
+
+    def feed(self, raw, now):
+        """Add a sample; returns the edges confirmed so far as ``[(level, at)]``."""
+        # a candidate whose deadline passed without a poll() is accepted first
+        edges = self.poll(now)
+        value = sample_value(raw)
+        self.samples += 1
+        if value is None:
+            self.invalid += 1
+            return edges
+        level = self._level(value)
+        if level == self.state:
+            if self.candidate is not None:
+                # reverted before it was accepted
+                self.glitches += 1
+                self.candidate = None
+            else:
+                self.repeats += 1
+            return edges
+        if self.candidate != level:
+            self.candidate = level
+            self.candidate_since = now
+        return edges + self.poll(now)
+
+    def next_deadline(self):
+        """When the pending candidate (if any) will be accepted."""
+        if self.candidate is None:
+            return None
+        due = self.candidate_since + (self.rise if self.candidate else self.fall)
+        if self.last_edge_at is not None:
+            due = max(due, self.last_edge_at + self.min_dwell)
+        return due
+
+    def poll(self, now):
+        due = self.next_deadline()
+        if due is None or now < due:
+            return []
+        level, at = self.candidate, self.candidate_since
+        self.state = level
+        self.candidate = None
+        self.last_edge_at = at
+        self.edges += 1
+        return [(level, at)]
+
+    def stats(self):
+        return {
+            "samples": self.samples,
+            "edges": self.edges,
+            "glitches": self.glitches,
+            "repeats": self.repeats,
+            "invalid": self.invalid,
+        }
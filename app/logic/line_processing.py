@@ -3,50 +3,53 @@ from PyQt6.QtWidgets import QMessageBox
 import re
 import base64
 import logging
+import math
+import time
 
 logger = logging.getLogger(__name__)
 
 from app.utils.shared import db_save_event
+from app.utils.telemetry import telemetry
+from app.logic.debounce import ON_VALUES
+from app.serial.command_link import split_seq
 
 
 def on_line(parent, line: str):
+    t0 = time.perf_counter()
+    try:
+        return _on_line(parent, line)
+    finally:
+        telemetry.observe("line_ms", (time.perf_counter() - t0) * 1000)
+
+
+def _on_line(parent, line: str):
     line = line.strip()
     if not line:
         return
     
     up = line.upper()
 
-    # handle RESET ack explicitly
-    if up.startswith("ACK:RESET"):
-        try:
-            if parent._waiting_reset_ack:
-                parent._waiting_reset_ack = False
-                try:
-                    parent._reset_ack_timer.stop()
-                except Exception:
-                    pass
-                parent.total_counter = 0
-                parent.history.append((datetime.now().isoformat(), 0, "ACK:RESET"))
-                if parent.db_user_id:
-                    db_save_event(parent.db_user_id, "RESET_CONTADOR", "CONTADOR", "CIRCUITO", "0")
-                QMessageBox.information(parent, "Reset", "Contador reiniciado en ESP32 (ACK recibido).")
-                parent.update_ui()
-                return
-        except Exception:
-            pass
+    if up.startswith("ACK:"):
+        # acks for commands we sent run their callbacks in the command link
+        link = getattr(parent, 'command_link', None)
+        acked = link is not None and link.handle_line(line)
+        line, _ = split_seq(line)
+        up = line.upper()
+        if acked and up.startswith("ACK:RESET"):
+            return
 
     if up.startswith("BTN:"):
         try:
             idx = int(line.split(":")[1]) - 1
             if 0 <= idx <= 2:
-                parent.led_states[idx] = True
+                parent.led_states[idx] = _observe_led(parent, idx, True)
                 parent.history.append((datetime.now().isoformat(), idx+1, "BTN"))
                 if parent.db_user_id:
                     # store as numeric for clearer normalization
                     db_save_event(parent.db_user_id, "LED_ON", f"LED{idx+1}", "CIRCUITO", 1)
                 parent.update_ui()
             elif idx == 3:
-                handle_sensor_activation(parent, True)
+                feed_sensor(parent, "1")
         except Exception:
             pass
         return
@@ -59,13 +62,13 @@ def on_line(parent, line: str):
                 val = parts[3]
                 state = (val == "1")
                 if 0 <= idx <= 3:
-                    parent.led_states[idx] = state
+                    parent.led_states[idx] = _observe_led(parent, idx, state) if idx < 3 else state
                     parent.history.append((datetime.now().isoformat(), idx+1, f"ACK:{val}"))
                     if parent.db_user_id and idx < 3:
                                 tipo = "LED_ON" if state else "LED_OFF"
                                 db_save_event(parent.db_user_id, tipo, f"LED{idx+1}", "CIRCUITO", 1 if state else 0)
                     if idx == 3:
-                        handle_sensor_activation(parent, state)
+                        feed_sensor(parent, val)
                     parent.update_ui()
             except Exception:
                 pass
@@ -77,8 +80,7 @@ def on_line(parent, line: str):
         try:
             parts = line.split(":")
             val = parts[1] if len(parts) > 1 else ""
-            is_on = (val == "1" or val.upper() == "ON" or val.upper() == "TRUE")
-            handle_sensor_activation(parent, is_on)
+            feed_sensor(parent, val)
         except Exception:
             pass
         return
@@ -89,6 +91,62 @@ def on_line(parent, line: str):
     parent.update_ui()
 
 
+def _observe_led(parent, idx: int, state: bool):
+    """Board-reported LED state; with a scheduler, a newer GUI request still pending keeps precedence."""
+    scheduler = getattr(parent, 'led_scheduler', None)
+    if scheduler is None:
+        return state
+    return scheduler.observe(idx+1, state)
+
+
+def _clock(parent):
+    clock = getattr(parent, 'clock', None)
+    return clock() if clock is not None else time.monotonic()
+
+
+def feed_sensor(parent, raw):
+    """Pass a raw sensor sample through parent.sensor_conditioner; only clean edges reach
+    handle_sensor_activation (and therefore the counter, the DB and the UI)."""
+    cond = getattr(parent, 'sensor_conditioner', None)
+    if cond is None:
+        handle_sensor_activation(parent, str(raw).strip().upper() in ON_VALUES)
+        return
+    now = _clock(parent)
+    glitches = cond.glitches
+    edges = cond.feed(raw, now)
+    if cond.glitches != glitches:
+        telemetry.incr("sensor_glitches", cond.glitches - glitches)
+    _apply_sensor_edges(parent, edges)
+    _schedule_sensor_poll(parent, cond, now)
+
+
+def poll_sensor(parent):
+    """Accept a pending sensor edge once its debounce/dwell time is over (timer callback)."""
+    cond = getattr(parent, 'sensor_conditioner', None)
+    if cond is None:
+        return
+    now = _clock(parent)
+    _apply_sensor_edges(parent, cond.poll(now))
+    _schedule_sensor_poll(parent, cond, now)
+
+
+def _apply_sensor_edges(parent, edges):
+    for level, _ in edges:
+        telemetry.incr("sensor_edges")
+        handle_sensor_activation(parent, level)
+
+
+def _schedule_sensor_poll(parent, cond, now):
+    timer = getattr(parent, '_sensor_timer', None)
+    if timer is None:
+        return
+    deadline = cond.next_deadline()
+    if deadline is None:
+        timer.stop()
+    else:
+        timer.start(max(0, math.ceil((deadline - now) * 1000)))
+
+
 def handle_sensor_activation(parent, is_on: bool):
     prev = parent.sensor_last_state
     parent.sensor_last_state = is_on
@@ -100,7 +158,8 @@ def handle_sensor_activation(parent, is_on: bool):
             parent.history.append((datetime.now().isoformat(), 4, "SENSOR_ON"))
             if parent.db_user_id:
                 # guardar contador exacto como 'contador=N'
-                db_save_event(parent.db_user_id, "SENSOR_BLOQUEADO", "SENSOR_IR", "CIRCUITO", f"contador={parent.total_counter}")
+                db_save_event(parent.db_user_id, "SENSOR_BLOQUEADO", "SENSOR_IR", "CIRCUITO", f"contador={parent.total_counter}",
+                              contador=parent.total_counter)
         else:
             parent.history.append((datetime.now().isoformat(), 4, "SENSOR_ON"))
     else:
@@ -121,13 +180,8 @@ def gui_toggle_led(parent, idx: int):
 
     new_state = not parent.led_states[idx]
     if parent.serial_thread and parent.serial_thread.isRunning():
-        cmd = f"LED:{idx+1}:{'1' if new_state else '0'}"
-        parent.serial_thread.write(cmd)
-        parent.led_states[idx] = new_state
-        parent.history.append((datetime.now().isoformat(), idx+1, f"GUI_TOGGLE:{'1' if new_state else '0'}"))
-        if parent.db_user_id:
-            tipo = "LED_ON" if new_state else "LED_OFF"
-            db_save_event(parent.db_user_id, tipo, f"LED{idx+1}", "APP", "1" if new_state else "0")
+        # rapid toggles are coalesced; history and DB follow what is actually sent (on_led_sent)
+        parent.led_states[idx] = parent.led_scheduler.set(idx+1, new_state)
         parent.update_ui()
     else:
         parent.led_states[idx] = new_state
@@ -139,6 +193,21 @@ def gui_toggle_led(parent, idx: int):
         parent.update_ui()
 
 
+def on_led_sent(parent, n: int, value: bool):
+    parent.history.append((datetime.now().isoformat(), n, f"GUI_TOGGLE:{'1' if value else '0'}"))
+    if parent.db_user_id:
+        tipo = "LED_ON" if value else "LED_OFF"
+        db_save_event(parent.db_user_id, tipo, f"LED{n}", "APP", "1" if value else "0")
+
+
+def on_led_settled(parent, n: int, ok: bool):
+    parent.led_states[n-1] = parent.led_scheduler.state(n)
+    if not ok:
+        logger.warning("LED%d: sin ACK; se mantiene el último estado confirmado", n)
+        parent.history.append((datetime.now().isoformat(), n, "SIN_ACK"))
+    parent.update_ui()
+
+
 def reset_total(parent):
     from app.workers.serial_thread import SerialThread as _SerialThread
     confirm = QMessageBox.question(parent, "Confirmar reset",
@@ -148,25 +217,18 @@ def reset_total(parent):
         parent.total_counter = 0
         parent.history.append((datetime.now().isoformat(), 0, "RESET"))
         try:
-            sent = False
             if parent.serial_thread and parent.serial_thread.isRunning():
-                parent.serial_thread.write("RESET")
-                sent = True
-            else:
-                sel = parent.port_combo.currentText()
-                if sel:
-                    try:
-                        _SerialThread.hardware_reset_port(sel, 115200, pulse_ms=0)
-                    except Exception:
-                        pass
-            if sent:
-                parent._waiting_reset_ack = True
-                parent._reset_ack_timer.start(1500)
+                # retried with backoff; hardware reset only if every attempt goes unanswered
+                parent.command_link.send_reset(on_ack=lambda cmd: on_reset_ack(parent),
+                                               on_fail=lambda cmd: on_reset_failed(parent, cmd))
                 return
-            else:
-                sel = parent.port_combo.currentText()
-                if sel:
-                    _SerialThread.hardware_reset_port(sel, 115200)
+            sel = parent.port_combo.currentText()
+            if sel:
+                try:
+                    _SerialThread.hardware_reset_port(sel, 115200, pulse_ms=0)
+                except Exception:
+                    pass
+                _SerialThread.hardware_reset_port(sel, 115200)
         except Exception:
             logger.exception("Reset error")
         if parent.db_user_id:
@@ -174,14 +236,22 @@ def reset_total(parent):
         parent.update_ui()
 
 
-def on_reset_ack_timeout(parent):
+def on_reset_ack(parent):
+    parent.total_counter = 0
+    parent.history.append((datetime.now().isoformat(), 0, "ACK:RESET"))
+    if parent.db_user_id:
+        db_save_event(parent.db_user_id, "RESET_CONTADOR", "CONTADOR", "CIRCUITO", "0")
+    QMessageBox.information(parent, "Reset", "Contador reiniciado en ESP32 (ACK recibido).")
+    parent.update_ui()
+
+
+def on_reset_failed(parent, cmd):
     from app.workers.serial_thread import SerialThread as _SerialThread
     try:
-        if parent._waiting_reset_ack:
-            parent._waiting_reset_ack = False
-            sel = parent.port_combo.currentText()
-            if sel:
-                _SerialThread.hardware_reset_port(sel, 115200)
-            QMessageBox.information(parent, "Reset", "No se recibió ACK de ESP32; se ejecutó reset hardware como fallback.")
+        sel = parent.port_combo.currentText()
+        if sel:
+            _SerialThread.hardware_reset_port(sel, 115200)
+        QMessageBox.information(parent, "Reset", f"No se recibió ACK de ESP32 tras {cmd.attempts} intentos; "
+                                "se ejecutó reset hardware como fallback.")
     except Exception:
-        logger.exception("Reset ACK timeout handler error")
+        logger.exception("Reset fallback error")
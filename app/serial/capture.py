@@ -0,0 +1,186 @@
+"""Compact append-only capture of serial lines with monotonic timestamps.
+
+File layout::
+
+    MAGIC                                     once, at the start of the file
+    0x01 <float64 wall time> <varint base>    session start (one per SerialThread run)
+    0x02 <varint delta_us> <varint len> <utf-8 line>
+    ...
+
+``delta_us`` is the ``time.monotonic`` gap to the previous record of the same
+session, so a typical line costs 3-4 bytes plus its text. Sessions are only
+ever appended; a truncated tail (crash mid-write) is ignored by the reader and
+cut off by the next ``CaptureWriter`` before it appends its session.
+
+Written by ``SerialThread(capture_path=...)``; read by ``read_capture`` and
+``python -m app.serial.replay``.
+"""
+import struct
+import time
+from pathlib import Path
+
+MAGIC = b"ESPCAP\x01\n"
+SESSION = 0x01
+LINE = 0x02
+
+FLUSH_RECORDS = 64
+FLUSH_SECONDS = 0.5
+
+
+def _varint(n):
+    out = bytearray()
+    while True:
+        b = n & 0x7F
+        n >>= 7
+        if n:
+            out.append(b | 0x80)
+        else:
+            out.append(b)
+            return bytes(out)
+
+
+def _read_varint(buf, pos):
+    shift = result = 0
+    while True:
+        b = buf[pos]
+        pos += 1
+        result |= (b & 0x7F) << shift
+        if not b & 0x80:
+            return result, pos
+        shift += 7
+
+
+def is_capture(path):
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def _records(buf, strict=True):
+    """Yield ``(end, kind, value)`` for every complete record after ``MAGIC``.
+
+    Stops at a truncated record. An unknown record kind raises ValueError, or
+    also stops when ``strict`` is False.
+    """
+    pos = len(MAGIC)
+    while pos < len(buf):
+        kind = buf[pos]
+        try:
+            if kind == SESSION:
+                value = struct.unpack_from("<d", buf, pos + 1)[0]
+                _, end = _read_varint(buf, pos + 9)
+            elif kind == LINE:
+                delta, start = _read_varint(buf, pos + 1)
+                size, start = _read_varint(buf, start)
+                end = start + size
+                if end > len(buf):
+                    return
+                value = (delta, buf[start:end])
+            elif strict:
+                raise ValueError(f"registro desconocido 0x{kind:02x} en {pos}")
+            else:
+                return
+        except (IndexError, struct.error):
+            # truncated tail
+            return
+        yield end, kind, value
+        pos = end
+
+
+def complete_length(buf):
+    """Length of ``buf`` up to the end of its last complete record."""
+    end = len(MAGIC)
+    for end, _, _ in _records(buf, strict=False):
+        pass
+    return end
+
+
+class CaptureWriter:
+    """Appends one session to ``path`` (created with its parent directory if needed).
+
+    A partial record left by a crash is truncated away first, so the new
+    session starts on a record boundary.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        new = not self._repair()
+        self._f = open(self.path, "ab")
+        if new:
+            self._f.write(MAGIC)
+        self._last = time.monotonic()
+        self._f.write(bytes([SESSION]) + struct.pack("<d", time.time()) + _varint(int(self._last * 1e6)))
+        self._f.flush()
+        self._pending = 0
+        self._flushed_at = self._last
+        self.records = 0
+
+    def _repair(self):
+        """Cut the file back to its last complete record; False if it has no header yet."""
+        if not self.path.exists():
+            return False
+        buf = self.path.read_bytes()
+        if len(buf) < len(MAGIC) and MAGIC.startswith(buf):
+            # crashed while writing the header
+            keep = 0
+        elif not buf.startswith(MAGIC):
+            raise ValueError(f"{self.path} no es un archivo de captura")
+        else:
+            keep = complete_length(buf)
+        if keep < len(buf):
+            with open(self.path, "r+b") as f:
+                f.truncate(keep)
+        return keep > 0
+
+    def write(self, line, t=None):
+        t = time.monotonic() if t is None else t
+        delta = max(int((t - self._last) * 1e6), 0)
+        self._last = t
+        data = line.encode("utf-8")
+        self._f.write(bytes([LINE]) + _varint(delta) + _varint(len(data)) + data)
+        self.records += 1
+        self._pending += 1
+        if self._pending >= FLUSH_RECORDS or t - self._flushed_at >= FLUSH_SECONDS:
+            self.flush(t)
+
+    def flush(self, t=None):
+        self._f.flush()
+        self._pending = 0
+        self._flushed_at = time.monotonic() if t is None else t
+
+    def close(self):
+        if self._f.closed:
+            return
+        self._f.flush()
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_capture(path):
+    """Yield ``(session, seconds, line)``; ``seconds`` counts from the session start.
+
+    ``session`` is ``(index, wall_time)`` of the session the line belongs to.
+    """
+    buf = Path(path).read_bytes()
+    if not buf.startswith(MAGIC):
+        raise ValueError(f"{path} no es un archivo de captura")
+    session = None
+    elapsed = 0
+    index = -1
+    for _, kind, value in _records(buf):
+        if kind == SESSION:
+            index += 1
+            session = (index, value)
+            elapsed = 0
+        else:
+            delta, data = value
+            elapsed += delta
+            yield session, elapsed / 1e6, data.decode("utf-8", errors="ignore")
@@ -0,0 +1,207 @@
+"""Request/response commands over the serial link.
+
+Every command gets a sequence id and is tracked until its ACK arrives:
+  - several commands can be in flight at once (``max_in_flight``); an LED
+    toggle never waits behind a reset or another LED
+  - a command without ACK is re-sent after ``timeout``, doubling each time
+    (``backoff``), up to ``attempts`` sends; then ``on_fail`` runs (for
+    RESET that is where the caller falls back to a hardware reset)
+
+Wire format: the id travels as a ``#<seq>`` suffix (``LED:1:1#12``) and a
+firmware that knows it echoes it back (``ACK:LED:1:1#12``, ``ACK:RESET#12``).
+The firmware in ``docs/codigo ide.txt`` before sequence ids reads
+``LED:1:1#12`` as ``LED:1:1`` but ignores ``RESET#12``, so RESET is sent
+bare until the board has echoed an id once. ACKs without an id are matched
+by content to the oldest pending command that expects them.
+
+Commands queued within ``flush_delay`` of each other go out in one write
+(lines joined with ``\n``); ``app.serial.led_scheduler`` builds on this to
+coalesce LED toggles.
+
+The link is pure logic: ``write(text)`` sends the lines, ``schedule(delay)``
+asks the caller to call ``poll()`` after ``delay`` seconds (None = nothing
+pending). ``MainWindow`` wires these to ``SerialThread.write`` and a QTimer.
+"""
+import logging
+import re
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+_SEQ_RE = re.compile(r"#(\d+)\s*$")
+
+TIMEOUT = 0.3
+BACKOFF = 2.0
+ATTEMPTS = 4
+MAX_IN_FLIGHT = 8
+FLUSH_DELAY = 0.0
+
+
+def split_seq(line):
+    """``"ACK:LED:1:1#12"`` -> ``("ACK:LED:1:1", 12)``; lines without an id give ``(line, None)``."""
+    m = _SEQ_RE.search(line)
+    if not m:
+        return line, None
+    return line[:m.start()].rstrip(), int(m.group(1))
+
+
+class Command:
+    __slots__ = ("seq", "text", "seq_safe", "expect", "key", "on_ack", "on_fail",
+                 "attempts", "deadline", "sent_at", "created_at")
+
+    def __init__(self, seq, text, seq_safe, expect, key, on_ack, on_fail, now):
+        self.seq = seq
+        self.text = text
+        self.seq_safe = seq_safe
+        self.expect = expect
+        self.key = key
+        self.on_ack = on_ack
+        self.on_fail = on_fail
+        self.attempts = 0
+        self.deadline = None
+        self.sent_at = None
+        self.created_at = now
+
+
+class CommandLink:
+    def __init__(self, write, schedule=None, timeout=TIMEOUT, backoff=BACKOFF, attempts=ATTEMPTS,
+                 max_in_flight=MAX_IN_FLIGHT, flush_delay=FLUSH_DELAY, clock=time.monotonic):
+        self.write = write
+        self.schedule = schedule
+        self.timeout = timeout
+        self.backoff = backoff
+        self.attempts = attempts
+        self.max_in_flight = max_in_flight
+        self.flush_delay = flush_delay
+        self.clock = clock
+        self._flush_at = None
+        self.seq_capable = False
+        self._next_seq = 1
+        self.in_flight = {}
+        self.queue = deque()
+        self.stats = {"sent": 0, "writes": 0, "acked": 0, "retries": 0, "failed": 0, "unmatched_acks": 0}
+        self.ack_latency = deque(maxlen=200)
+
+    # ---- sending ----
+    def send(self, text, expect, key=None, on_ack=None, on_fail=None, seq_safe=True):
+        """Queue ``text``; ``expect`` is the ACK line without id. Returns the sequence id.
+
+        ``seq_safe=False`` marks commands an old firmware would not recognize
+        with a ``#seq`` suffix (RESET); they are sent bare until ids are echoed.
+        """
+        seq = self._next_seq
+        self._next_seq += 1
+        now = self.clock()
+        cmd = Command(seq, text, seq_safe, expect, key, on_ack, on_fail, now)
+        self.queue.append(cmd)
+        if self._flush_at is None and self.flush_delay:
+            self._flush_at = now + self.flush_delay
+        self._pump()
+        return seq
+
+    def send_led(self, n, on, on_ack=None, on_fail=None):
+        v = "1" if on else "0"
+        return self.send(f"LED:{n}:{v}", f"ACK:LED:{n}:{v}", key=("LED", n), on_ack=on_ack, on_fail=on_fail)
+
+    def send_reset(self, on_ack=None, on_fail=None):
+        return self.send("RESET", "ACK:RESET", key=("RESET",), on_ack=on_ack, on_fail=on_fail, seq_safe=False)
+
+    def pending(self, key=None):
+        cmds = list(self.in_flight.values()) + list(self.queue)
+        return [c for c in cmds if key is None or c.key == key]
+
+    def _wire(self, cmd):
+        if cmd.seq_safe or self.seq_capable:
+            return f"{cmd.text}#{cmd.seq}"
+        return cmd.text
+
+    def _transmit(self, batch, now):
+        if not batch:
+            return
+        for cmd in batch:
+            cmd.attempts += 1
+            cmd.sent_at = now
+            cmd.deadline = now + self.timeout * (self.backoff ** (cmd.attempts - 1))
+        try:
+            self.write("\n".join(self._wire(cmd) for cmd in batch))
+            self.stats["sent"] += len(batch)
+            self.stats["writes"] += 1
+        except Exception:
+            # counts as an attempt; retried on the same schedule
+            logger.exception("serial write failed (seq %s)", ", ".join(str(c.seq) for c in batch))
+
+    def _pump(self):
+        now = self.clock()
+        if self.queue and (self._flush_at is None or self._flush_at <= now):
+            batch = []
+            while self.queue and len(self.in_flight) < self.max_in_flight:
+                cmd = self.queue.popleft()
+                self.in_flight[cmd.seq] = cmd
+                batch.append(cmd)
+            self._transmit(batch, now)
+            self._flush_at = None
+        self._reschedule(now)
+
+    def _reschedule(self, now):
+        if self.schedule is None:
+            return
+        deadlines = [c.deadline for c in self.in_flight.values()]
+        if self.queue and self._flush_at is not None:
+            deadlines.append(self._flush_at)
+        self.schedule(max(min(deadlines) - now, 0.0) if deadlines else None)
+
+    # ---- receiving ----
+    def handle_line(self, line):
+        """Match an incoming line against pending commands; True if it acknowledged one."""
+        body, seq = split_seq(line.strip())
+        if not body.upper().startswith("ACK:"):
+            return False
+        cmd = None
+        if seq is not None:
+            self.seq_capable = True
+            cmd = self.in_flight.get(seq)
+        else:
+            for c in sorted(self.in_flight.values(), key=lambda c: c.seq):
+                if c.expect == body:
+                    cmd = c
+                    break
+        if cmd is None:
+            self.stats["unmatched_acks"] += 1
+            return False
+        del self.in_flight[cmd.seq]
+        self.stats["acked"] += 1
+        self.ack_latency.append(self.clock() - cmd.created_at)
+        self._pump()
+        if cmd.on_ack is not None:
+            cmd.on_ack(cmd)
+        return True
+
+    def poll(self):
+        """Retry or fail commands whose ACK is overdue (call when ``schedule`` says)."""
+        now = self.clock()
+        failed = []
+        retry = []
+        for cmd in sorted(self.in_flight.values(), key=lambda c: c.seq):
+            if cmd.deadline > now:
+                continue
+            if cmd.attempts >= self.attempts:
+                del self.in_flight[cmd.seq]
+                self.stats["failed"] += 1
+                failed.append(cmd)
+            else:
+                self.stats["retries"] += 1
+                retry.append(cmd)
+        self._transmit(retry, now)
+        self._pump()
+        for cmd in failed:
+            logger.warning("no ACK for %r after %d attempts", cmd.text, cmd.attempts)
+            if cmd.on_fail is not None:
+                cmd.on_fail(cmd)
+
+    def cancel_all(self):
+        """Forget everything pending (port closed); no callbacks run."""
+        self.in_flight.clear()
+        self.queue.clear()
+        self._flush_at = None
+        self._reschedule(self.clock())
@@ -0,0 +1,90 @@
+"""Desired vs acknowledged LED state on top of ``CommandLink``.
+
+The GUI only says what it wants (``set``); the scheduler decides what goes
+on the wire:
+  - at most one command per LED is in flight; toggles made meanwhile only
+    update the desired state, so a burst of clicks collapses to its final
+    value and is sent once the pending ACK arrives (or not at all if the
+    board already matches)
+  - commands for different LEDs queued close together leave in a single
+    write (``CommandLink(flush_delay=...)``)
+  - ``acked`` follows the board: ACKs of our commands and state the board
+    reports on its own (``observe``: keypad, buttons); when nothing is in
+    flight a board-side change becomes the new desired state
+  - if a command exhausts its retries the desired state falls back to the
+    last acknowledged one, so the UI never keeps showing a state the board
+    did not confirm
+
+LEDs are numbered 1..n like the serial protocol. Callbacks:
+``on_sent(n, value)`` once per command put on the link and
+``on_settled(n, ok)`` when an LED has nothing pending any more.
+"""
+
+
+class LedScheduler:
+    def __init__(self, link, leds=3, on_sent=None, on_settled=None):
+        self.link = link
+        self.on_sent = on_sent
+        self.on_settled = on_settled
+        self.desired = [None] * leds
+        self.acked = [None] * leds
+        self._in_flight = {}
+        self.coalesced = 0
+
+    def set(self, n, value):
+        """Ask for LED ``n`` to be ``value``; returns the state to show."""
+        self.desired[n - 1] = bool(value)
+        if n in self._in_flight:
+            self.coalesced += 1
+        else:
+            self._dispatch(n)
+        return self.desired[n - 1]
+
+    def observe(self, n, value):
+        """State reported by the board; returns the state to show."""
+        value = bool(value)
+        self.acked[n - 1] = value
+        if n not in self._in_flight:
+            self.desired[n - 1] = value
+        return self.state(n)
+
+    def state(self, n):
+        desired = self.desired[n - 1]
+        return bool(self.acked[n - 1]) if desired is None else desired
+
+    def pending(self, n):
+        return n in self._in_flight or (self.desired[n - 1] is not None and self.desired[n - 1] != self.acked[n - 1])
+
+    def reset(self):
+        """Forget everything (port closed: the next board may be in any state)."""
+        self.desired = [None] * len(self.desired)
+        self.acked = [None] * len(self.acked)
+        self._in_flight.clear()
+
+    def _dispatch(self, n):
+        want = self.desired[n - 1]
+        if want is None or want == self.acked[n - 1]:
+            if self.on_settled is not None:
+                self.on_settled(n, True)
+            return
+        self._in_flight[n] = want
+        self.link.send_led(n, want,
+                           on_ack=lambda cmd: self._acked(n, want),
+                           on_fail=lambda cmd: self._failed(n, want))
+        if self.on_sent is not None:
+            self.on_sent(n, want)
+
+    def _acked(self, n, value):
+        if self._in_flight.get(n) != value:
+            return
+        del self._in_flight[n]
+        self.acked[n - 1] = value
+        self._dispatch(n)
+
+    def _failed(self, n, value):
+        if self._in_flight.get(n) != value:
+            return
+        del self._in_flight[n]
+        self.desired[n - 1] = self.acked[n - 1]
+        if self.on_settled is not None:
+            self.on_settled(n, False)
@@ -0,0 +1,179 @@
+"""Replay a serial capture through ``line_processing`` without hardware.
+
+    python -m app.serial.replay capture.espcap [--speed 1|N|max] [--session K]
+                                [--user USUARIO] [--window] [--list]
+
+``--speed 1`` keeps the original timing, ``--speed 10`` runs ten times
+faster and ``--speed max`` feeds lines back to back. Lines go through the
+same ``on_line`` as the app; by default into a headless host (no widgets,
+no DB) and with ``--window`` into a real ``MainWindow`` (offscreen unless a
+display is set, never scanning or connecting serial ports). Both run the
+sensor conditioner on the capture's clock. ``--user`` saves events to the
+DB as that user; without it nothing touches the DB.
+
+Reports lines/s, per-line processing time and how far replay fell behind
+the recorded schedule (a storm the app cannot keep up with shows as lag).
+"""
+import argparse
+import os
+import time
+from datetime import datetime
+
+from app.logic.debounce import SignalConditioner
+from app.serial.capture import read_capture
+
+
+class _ReplaySerial:
+    """Stands in for the connected SerialThread: on_line only counts sensor edges while it runs."""
+
+    def isRunning(self):
+        return True
+
+    def write(self, data):
+        pass
+
+    def stop(self):
+        pass
+
+
+class ReplayHost:
+    """Minimal ``parent`` for ``line_processing.on_line`` (state only, no widgets).
+
+    The sensor conditioner runs on the capture's clock (``now``), so debounce
+    behaves the same at any replay speed.
+    """
+
+    def __init__(self, db_user_id=None, sensor_conditioning=None):
+        self.history = []
+        self.total_counter = 0
+        self.led_states = [False, False, False, False]
+        self.sensor_last_state = False
+        self.serial_thread = _ReplaySerial()
+        self.db_user_id = db_user_id
+        self.sensor_conditioner = SignalConditioner.from_settings(sensor_conditioning)
+        self.now = 0.0
+        self.ui_updates = 0
+
+    def clock(self):
+        return self.now
+
+    def update_ui(self):
+        self.ui_updates += 1
+
+
+def _pct(data, q):
+    return data[min(len(data) - 1, int(len(data) * q))] if data else 0.0
+
+
+def list_sessions(path):
+    sessions = {}
+    for (index, wall), t, _ in read_capture(path):
+        n, _, _ = sessions.get(index, (0, wall, 0.0))
+        sessions[index] = (n + 1, wall, t)
+    for index, (n, wall, t) in sorted(sessions.items()):
+        started = datetime.fromtimestamp(wall).isoformat(timespec="seconds")
+        print(f"sesión {index}: {started}  {n} líneas  {t:.1f} s")
+
+
+def replay(path, speed=1.0, session=None, parent=None, pump=None):
+    """Feed the capture to ``parent.on_line`` / ``line_processing.on_line``; returns stats.
+
+    A host with a ``now`` attribute (``ReplayHost``, or a window given a
+    ``clock`` reading it) has ``now`` set from the capture timestamps.
+    """
+    from app.logic import line_processing
+
+    host = parent if parent is not None else ReplayHost()
+    handle = host.on_line if hasattr(host, "on_line") else (lambda line: line_processing.on_line(host, line))
+    on_capture_clock = hasattr(host, "now")
+    durations = []
+    max_lag = 0.0
+    current = None
+    offset = 0.0
+    t_start = time.perf_counter()
+    base = t_start
+    for (index, _), t, line in read_capture(path):
+        if session is not None and index != session:
+            continue
+        if index != current:
+            # each session restarts its own clock
+            current = index
+            base = time.perf_counter() - (t / speed if speed else 0.0)
+            offset = host.now if on_capture_clock else 0.0
+        if on_capture_clock:
+            host.now = offset + t
+            line_processing.poll_sensor(host)
+        if speed:
+            due = base + t / speed
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                max_lag = max(max_lag, -delay)
+        t0 = time.perf_counter()
+        handle(line)
+        if pump is not None:
+            pump()
+        durations.append(time.perf_counter() - t0)
+    if on_capture_clock:
+        # settle the last pending sensor edge
+        host.now += 3600.0
+        line_processing.poll_sensor(host)
+    wall = time.perf_counter() - t_start
+    durations.sort()
+    return {
+        "lines": len(durations),
+        "seconds": wall,
+        "lines_per_s": len(durations) / wall if wall > 0 else 0.0,
+        "line_ms_p50": _pct(durations, 0.50) * 1000,
+        "line_ms_p95": _pct(durations, 0.95) * 1000,
+        "line_ms_max": (durations[-1] if durations else 0.0) * 1000,
+        "max_lag_s": max_lag,
+        "counter": getattr(host, "total_counter", None),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("capture")
+    ap.add_argument("--speed", default="1", help="1 = tiempo real, N = N veces más rápido, max = sin esperas")
+    ap.add_argument("--session", type=int, help="reproducir solo esa sesión (ver --list)")
+    ap.add_argument("--user", help="guardar eventos en la BD como este usuario")
+    ap.add_argument("--window", action="store_true", help="reproducir sobre un MainWindow real")
+    ap.add_argument("--list", action="store_true", help="listar sesiones y salir")
+    args = ap.parse_args()
+
+    if args.list:
+        list_sessions(args.capture)
+        return
+    speed = 0.0 if args.speed == "max" else float(args.speed)
+
+    pump = None
+    if args.window:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from PyQt6.QtWidgets import QApplication
+        from app.gui.main_window import MainWindow
+        app = QApplication([])
+        parent = MainWindow(args.user or "replay", use_db=bool(args.user), scan_ports=False)
+        parent.serial_thread = _ReplaySerial()
+        # same capture clock as ReplayHost (replay() advances parent.now)
+        parent.now = 0.0
+        parent.clock = lambda: parent.now
+        pump = app.processEvents
+    else:
+        db_user_id = None
+        if args.user:
+            from app.utils.shared import get_or_create_user_id
+            db_user_id = get_or_create_user_id(args.user)
+        from app.utils.shared import load_settings
+        parent = ReplayHost(db_user_id, load_settings().get("sensor_conditioning"))
+
+    stats = replay(args.capture, speed=speed, session=args.session, parent=parent, pump=pump)
+    print(f"{stats['lines']} líneas en {stats['seconds']:.2f} s ({stats['lines_per_s']:.0f} líneas/s)")
+    print(f"on_line: p50={stats['line_ms_p50']:.3f} p95={stats['line_ms_p95']:.3f} max={stats['line_ms_max']:.3f} ms")
+    print(f"retraso máximo frente a la captura: {stats['max_lag_s'] * 1000:.0f} ms")
+    print(f"contador final: {stats['counter']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,9 @@
 """Serial UI helpers for MainWindow: connection toggles and port scanning."""
+from datetime import datetime
+from pathlib import Path
+
 from app.workers.serial_thread import SerialThread
+from app.utils.shared import load_settings
 
 try:
     import serial as _pyserial
@@ -21,6 +25,17 @@ def _scan_ports(parent):
         pass
 
 
+def _capture_path():
+    """Daily capture file under settings["serial_capture_dir"], or None when capture is off."""
+    try:
+        folder = load_settings().get("serial_capture_dir")
+    except Exception:
+        folder = None
+    if not folder:
+        return None
+    return Path(folder) / f"serial_{datetime.now().strftime('%Y-%m-%d')}.espcap"
+
+
 def toggle_connection(parent):
     # disconnect if already running
     if parent.serial_thread and getattr(parent.serial_thread, 'isRunning', lambda: False)():
@@ -78,7 +93,7 @@ def toggle_connection(parent):
         except Exception:
             pass
 
-    st = SerialThread(port)
+    st = SerialThread(port, capture_path=_capture_path())
     parent.serial_thread = st
     try:
         st.connected.connect(lambda ok: parent.on_connected(ok))
@@ -109,3 +124,7 @@ def on_connected(parent, ok: bool):
             parent.connect_btn.setText("🔌  Conectar")
     except Exception:
         pass
+    if not ok and getattr(parent, 'command_link', None) is not None:
+        # nothing pending can be acknowledged on a closed port
+        parent.command_link.cancel_all()
+        parent.led_scheduler.reset()
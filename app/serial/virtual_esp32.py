@@ -0,0 +1,261 @@
+"""pty-backed virtual ESP32 for exercising the desktop serial pipeline.
+
+Creates a pseudo-terminal whose slave side (``device.port``, e.g.
+``/dev/pts/3``) can be opened like the board's USB serial port. The device
+behaves like the firmware in ``docs/codigo ide.txt``:
+  - sends the ROM boot banner (``ets ...``/``rst:...``) every time the port
+    is opened, which is what ``SerialThread.detect_esp32_port`` looks for
+  - answers ``LED:n:v`` with ``ACK:LED:n:v`` and ``RESET`` with ``ACK:RESET``,
+    echoing a ``#seq`` suffix when the command has one; ``ack_loss`` drops
+    that fraction of ACKs to exercise ``app.serial.command_link`` retries
+  - streams traffic at ``rate`` lines per second (0 = as fast as the reader
+    takes it), either synthetic ``BTN:``/``SENSOR:``/``ACK:LED:`` lines or a
+    recording: a capture from ``app.serial.capture`` or a text file, one
+    line per row, optionally ``<seconds>\\t<line>`` to keep the timing
+
+POSIX only (``os.openpty``). Run standalone to point the GUI at it:
+    python -m app.serial.virtual_esp32 [--rate 50] [--replay capture.txt] [--count N] [--ack-loss 0.2]
+"""
+import argparse
+import errno
+import os
+import random
+import select
+import threading
+import time
+import tty
+
+from app.serial.capture import is_capture, read_capture
+
+BOOT_BANNER = [
+    "ets Jun  8 2016 00:22:57",
+    "",
+    "rst:0x1 (POWERON_RESET),boot:0x13 (SPI_FAST_FLASH_BOOT)",
+    "configsip: 0, SPIWP:0xee",
+    "mode:DIO, clock div:1",
+    "load:0x3fff0030,len:1184",
+    "entry 0x400805f0",
+]
+
+# synthetic traffic mix: (kind, weight)
+MIX = (("sensor", 0.6), ("btn", 0.25), ("ack", 0.15))
+
+
+def synthetic_lines(seed=1, mix=MIX):
+    """Endless firmware-like traffic: sensor edges alternate 1/0, buttons and LED acks."""
+    rnd = random.Random(seed)
+    kinds = [k for k, _ in mix]
+    weights = [w for _, w in mix]
+    sensor = False
+    leds = [False, False, False]
+    while True:
+        kind = rnd.choices(kinds, weights)[0]
+        if kind == "sensor":
+            sensor = not sensor
+            yield f"SENSOR:{'1' if sensor else '0'}"
+        elif kind == "btn":
+            i = rnd.randrange(3)
+            leds[i] = True
+            yield f"BTN:{i + 1}"
+        else:
+            i = rnd.randrange(3)
+            leds[i] = not leds[i]
+            yield f"ACK:LED:{i + 1}:{'1' if leds[i] else '0'}"
+
+
+def recorded_lines(path):
+    """``(offset_seconds or None, line)`` from a capture file or a text recording."""
+    if is_capture(path):
+        # sessions are played back to back
+        offset = end = 0.0
+        current = None
+        for (index, _), t, line in read_capture(path):
+            if index != current:
+                current, offset = index, end
+            end = offset + t
+            yield end, line
+        return
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        for raw in f:
+            raw = raw.rstrip("\r\n")
+            if not raw:
+                continue
+            head, sep, rest = raw.partition("\t")
+            if sep:
+                try:
+                    yield float(head), rest
+                    continue
+                except ValueError:
+                    pass
+            yield None, raw
+
+
+class VirtualESP32:
+    def __init__(self, rate=50.0, lines=None, replay=None, count=None, baud=115200,
+                 banner=True, seed=1, ack_loss=0.0):
+        self.rate = rate
+        self.ack_loss = ack_loss
+        self._rng = random.Random(seed)
+        self.count = count
+        self.baud = baud
+        self.banner = banner
+        if replay:
+            self._source = recorded_lines(replay)
+        else:
+            self._source = ((None, line) for line in (lines if lines is not None else synthetic_lines(seed)))
+        self._master, slave = os.openpty()
+        self.port = os.ttyname(slave)
+        tty.setraw(slave)
+        # closing our slave fd lets POLLHUP on the master tell when the port is opened/closed
+        os.close(slave)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._open = threading.Event()
+        self._threads = []
+        self.sent = 0
+        self.sent_at = []
+        self.received = []
+        self.opens = 0
+        self.done = threading.Event()
+
+    def start(self):
+        for target in (self._reader, self._writer):
+            t = threading.Thread(target=target, name=f"virtual-esp32-{target.__name__}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._open.set()
+        for t in self._threads:
+            t.join(timeout=2)
+        try:
+            os.close(self._master)
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def write_line(self, line):
+        """Write one line; returns the ``perf_counter`` time it was written, or None if the pty is gone."""
+        data = (line + "\r\n").encode("utf-8")
+        with self._lock:
+            at = time.perf_counter()
+            view = memoryview(data)
+            while view:
+                try:
+                    n = os.write(self._master, view)
+                except OSError as e:
+                    if e.errno in (errno.EIO, errno.EBADF):
+                        return None
+                    raise
+                view = view[n:]
+        if self.baud:
+            # ~10 bits per byte on the wire
+            time.sleep(len(data) * 10 / self.baud)
+        return at
+
+    def _reader(self):
+        poller = select.poll()
+        poller.register(self._master, select.POLLIN | select.POLLHUP)
+        buf = b""
+        was_open = False
+        while not self._stop.is_set():
+            events = poller.poll(50)
+            hup = any(ev & select.POLLHUP for _, ev in events)
+            if hup:
+                if was_open:
+                    was_open = False
+                    self._open.clear()
+                time.sleep(0.02)
+                continue
+            if not was_open:
+                was_open = True
+                self.opens += 1
+                if self.banner:
+                    for line in BOOT_BANNER:
+                        self.write_line(line)
+                self._open.set()
+            if not any(ev & select.POLLIN for _, ev in events):
+                continue
+            try:
+                buf += os.read(self._master, 4096)
+            except OSError:
+                continue
+            while b"\n" in buf:
+                raw, buf = buf.split(b"\n", 1)
+                self._handle(raw.decode("utf-8", errors="ignore").strip())
+
+    def _handle(self, cmd):
+        if not cmd:
+            return
+        self.received.append(cmd)
+        cmd, _, seq = cmd.partition("#")
+        seq = f"#{seq}" if seq else ""
+        if self.ack_loss and self._rng.random() < self.ack_loss:
+            return
+        if cmd.startswith("LED:"):
+            parts = cmd.split(":")
+            if len(parts) >= 3:
+                self.write_line(f"ACK:LED:{parts[1]}:{parts[2]}{seq}")
+        elif cmd == "RESET":
+            self.write_line(f"ACK:RESET{seq}")
+
+    def _writer(self):
+        interval = 1.0 / self.rate if self.rate else 0.0
+        self._open.wait()
+        start = time.perf_counter()
+        next_due = start
+        for offset, line in self._source:
+            if self._stop.is_set() or (self.count is not None and self.sent >= self.count):
+                break
+            if offset is not None:
+                next_due = start + offset
+            delay = next_due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            if not self._open.is_set():
+                self._open.wait()
+                if self._stop.is_set():
+                    break
+            at = self.write_line(line)
+            if at is None:
+                break
+            self.sent_at.append(at)
+            self.sent += 1
+            if offset is None:
+                # fixed schedule: a slow reader makes the device fall behind, not speed up later
+                next_due = max(next_due + interval, time.perf_counter() - 1.0)
+        self.done.set()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rate", type=float, default=50.0, help="lines per second (0 = unthrottled)")
+    ap.add_argument("--replay", help="text recording to replay instead of synthetic traffic")
+    ap.add_argument("--count", type=int, help="stop after N lines")
+    ap.add_argument("--baud", type=int, default=115200, help="emulated line speed (0 = no limit)")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--ack-loss", type=float, default=0.0, help="fraction of command ACKs to drop")
+    args = ap.parse_args()
+    dev = VirtualESP32(rate=args.rate, replay=args.replay, count=args.count, baud=args.baud, seed=args.seed,
+                       ack_loss=args.ack_loss)
+    dev.start()
+    print(f"ESP32 virtual en {dev.port} (Ctrl+C para salir)", flush=True)
+    try:
+        while not dev.done.wait(1.0):
+            pass
+        print(f"{dev.sent} líneas enviadas")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        dev.stop()
+
+
+if __name__ == "__main__":
+    main()
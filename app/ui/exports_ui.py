@@ -1,23 +1,19 @@
-from PyQt6.QtWidgets import QFileDialog, QMessageBox, QDialog, QVBoxLayout, QListWidget, QPushButton, QHBoxLayout, QLabel, QPlainTextEdit
+from PyQt6.QtWidgets import QFileDialog, QMessageBox, QDialog, QVBoxLayout, QListView, QPushButton, QHBoxLayout, QLabel, QPlainTextEdit, QProgressDialog
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, QThread
 from pathlib import Path
-import csv
 import os
 import webbrowser
 from datetime import datetime
-from io import BytesIO, StringIO
-import base64
-import shutil
 
 from app.utils.shared import (
-    EXPORTS_SESSION,
     EXPORTS_BD,
     db_list_exported,
-    db_fetch_export_file,
-    db_save_export_file,
-    REPORTLAB_AVAILABLE,
-    pdfcanvas,
+    db_count_exported,
+    EXPORTS_PAGE_SIZE,
+    EXPORTS_PREVIEW_BYTES,
+    db_export_to_tempfile,
+    pdf_canvas,
 )
-from app.utils.shared import get_db_conn
 
 
 def export_dialog(parent):
@@ -35,55 +31,48 @@ def export_dialog(parent):
         return None
 
 
-def _make_csv_bytes(history):
-    # csv.writer expects a text file; use StringIO and then encode to bytes
-    buf = StringIO()
-    try:
-        writer = csv.writer(buf)
-        writer.writerow(['timestamp', 'led', 'event'])
-        for r in history or []:
-            writer.writerow(r)
-        return buf.getvalue().encode('utf-8')
-    finally:
-        try:
-            buf.close()
-        except Exception:
-            pass
-
-
-def _make_pdf_bytes(history):
-    # Very small PDF generator using reportlab if available
-    buf = BytesIO()
-    try:
-        if not REPORTLAB_AVAILABLE or pdfcanvas is None:
-            return None
-        from reportlab.lib.pagesizes import A4
-        c = pdfcanvas.Canvas(buf, pagesize=A4)
-        w, h = A4
-        y = h - 40
-        c.setFont('Helvetica', 12)
-        c.drawString(40, y, 'Historial de sesión')
-        y -= 24
-        c.setFont('Helvetica', 9)
-        for r in history or []:
-            line = f"{r[0]} | LED:{r[1]} | {r[2]}"
-            # wrap if necessary
-            if y < 60:
-                c.showPage()
-                y = h - 40
-                c.setFont('Helvetica', 9)
-            c.drawString(40, y, line[:200])
-            y -= 14
-        c.save()
-        data = buf.getvalue()
-        return data
-    except Exception:
-        return None
-    finally:
-        try:
-            buf.close()
-        except Exception:
-            pass
+def _start_export(parent, fmt, filename, hist):
+    """Run the export in an ExportWorker thread with a progress dialog."""
+    from app.workers.export_worker import ExportWorker
+
+    thread = QThread(parent)
+    worker = ExportWorker(hist, fmt, filename, user_id=getattr(parent, 'db_user_id', None))
+    worker.moveToThread(thread)
+
+    prog = QProgressDialog(f"Exportando {len(hist)} registros...", "Cancelar", 0, max(len(hist), 1), parent)
+    prog.setWindowTitle("Exportar")
+    prog.setWindowModality(Qt.WindowModality.NonModal)
+    prog.setMinimumDuration(300)
+    prog.canceled.connect(worker.cancel, Qt.ConnectionType.DirectConnection)
+
+    def on_progress(done, total):
+        prog.setMaximum(max(total, 1))
+        prog.setValue(done)
+
+    def on_finished(ok, msg):
+        prog.reset()
+        prog.deleteLater()
+        parent._export_jobs.discard(job)
+        label = fmt.upper()
+        if ok:
+            QMessageBox.information(parent, "Exportado", f"{label} guardado en: {msg}")
+        elif msg != "Exportación cancelada":
+            QMessageBox.critical(parent, "Error exportando", msg)
+
+    worker.progress.connect(on_progress)
+    thread.started.connect(worker.run)
+    worker.finished.connect(on_finished)
+    worker.finished.connect(thread.quit)
+    worker.finished.connect(worker.deleteLater)
+    thread.finished.connect(thread.deleteLater)
+
+    # keep Python references alive until the worker is done
+    job = (thread, worker)
+    if not hasattr(parent, '_export_jobs'):
+        parent._export_jobs = set()
+    parent._export_jobs.add(job)
+    thread.start()
+    return filename
 
 
 def export_session(parent, format="csv", filename: Path = None):
@@ -108,25 +97,12 @@ def export_session(parent, format="csv", filename: Path = None):
                 filename = Path(path)
             else:
                 filename = Path(filename)
-            # create CSV bytes and save
-            data_bytes = _make_csv_bytes(hist)
-            with open(filename, 'wb') as f:
-                f.write(data_bytes)
-                # Do not create global EXPORTS_BD automatically; the user chose `filename` so keep only that.
-            # try to store in DB if user id exists
-            try:
-                uid = getattr(parent, 'db_user_id', None)
-                if uid:
-                    db_save_export_file(uid, 'CSV', filename=str(filename), content_bytes=data_bytes)
-            except Exception:
-                pass
-            QMessageBox.information(parent, "Exportado", f"CSV guardado en: {filename}")
-            return filename
+            # Do not create global EXPORTS_BD automatically; the user chose `filename` so keep only that.
+            # the worker writes the file and stores it in DB (if user id exists)
+            return _start_export(parent, 'csv', filename, hist)
 
         elif format == 'pdf':
-            # generate PDF bytes
-            data_bytes = _make_pdf_bytes(hist)
-            if data_bytes is None:
+            if pdf_canvas() is None:
                 QMessageBox.information(parent, "Exportar PDF", "ReportLab no está disponible; no se puede generar PDF.")
                 return None
             if not filename:
@@ -137,17 +113,7 @@ def export_session(parent, format="csv", filename: Path = None):
                 filename = Path(path)
             else:
                 filename = Path(filename)
-            with open(filename, 'wb') as f:
-                f.write(data_bytes)
-                # Do not create global EXPORTS_BD automatically; the user chose `filename` so keep only that.
-            try:
-                uid = getattr(parent, 'db_user_id', None)
-                if uid:
-                    db_save_export_file(uid, 'PDF', filename=str(filename), content_bytes=data_bytes)
-            except Exception:
-                pass
-            QMessageBox.information(parent, "Exportado", f"PDF guardado en: {filename}")
-            return filename
+            return _start_export(parent, 'pdf', filename, hist)
 
         else:
             QMessageBox.information(parent, "Exportar", "Formato no soportado.")
@@ -167,16 +133,94 @@ def show_csv_table(parent, csv_path: Path):
         QMessageBox.information(parent, "Abrir CSV", f"Error al abrir CSV: {e}")
 
 
+def _fmt_size(n):
+    if n is None:
+        return ''
+    for unit in ('B', 'KB', 'MB'):
+        if n < 1024:
+            return f"{n:.0f} {unit}" if unit == 'B' else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GB"
+
+
+def _read_preview(path, limit):
+    """First ``limit`` bytes of a text file, cut at the last full line; ``(text, truncated)``."""
+    with open(path, 'rb') as f:
+        data = f.read(limit + 1)
+    truncated = len(data) > limit
+    if truncated:
+        data = data[:limit]
+        end = data.rfind(b'\n')
+        if end > 0:
+            data = data[:end]
+    try:
+        return data.decode('utf-8'), truncated
+    except UnicodeDecodeError:
+        return data.decode('latin-1', errors='ignore'), truncated
+
+
+class ExportsListModel(QAbstractListModel):
+    """Rows ``(id, formato, filename, fecha, size)`` fetched page by page.
+
+    With ``fetch_page`` the view pulls the next page from the DB only when it
+    scrolls near the end; otherwise ``rows`` is a fixed list (filesystem mode).
+    """
+
+    def __init__(self, fetch_page=None, rows=None, parent=None):
+        super().__init__(parent)
+        self._fetch_page = fetch_page
+        self._rows = list(rows or [])
+        self._done = fetch_page is None
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        rec_id, fmt, fn, fecha, size = self._rows[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            parts = [str(rec_id), fmt or '?', fn or 'sin_nombre']
+            if size is not None:
+                parts.append(_fmt_size(size))
+            parts.append(str(fecha or ''))
+            return " | ".join(parts)
+        if role == Qt.ItemDataRole.UserRole:
+            return rec_id
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._done
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._done:
+            return
+        after = None
+        if self._rows:
+            last = self._rows[-1]
+            after = (last[3], last[0])
+        page = self._fetch_page(after)
+        if len(page) < EXPORTS_PAGE_SIZE:
+            self._done = True
+        if not page:
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(page) - 1)
+        self._rows.extend(page)
+        self.endInsertRows()
+
+
 def view_exports_dialog(parent):
     try:
-        rows = db_list_exported()
+        total = db_count_exported()
         # If DB not available, inform user and fallback to filesystem listing
-        if get_db_conn() is None:
+        if total is None:
             QMessageBox.information(parent, 'Exportados', 'No es posible conectar a la base de datos. Se listarán archivos en disco si existen.')
 
-        # If DB returned nothing, try filesystem fallback: list files under EXPORTS_BD
-        fs_mode = False
-        if not rows:
+        if total:
+            model = ExportsListModel(fetch_page=lambda after: db_list_exported(after=after, limit=EXPORTS_PAGE_SIZE))
+        else:
+            # If DB returned nothing, try filesystem fallback: list files under EXPORTS_BD
             try:
                 files = []
                 if EXPORTS_BD.exists() and EXPORTS_BD.is_dir():
@@ -185,14 +229,13 @@ def view_exports_dialog(parent):
                             fmt = p.suffix.lstrip('.').upper() if p.suffix else ''
                             # Use a synthetic id starting with FS: so we can detect it later
                             rec_id = f"FS:{str(p)}"
-                            fecha = datetime.fromtimestamp(p.stat().st_mtime)
-                            files.append((rec_id, (fmt or '?'), p.name, fecha))
-                if files:
-                    rows = files
-                    fs_mode = True
-                else:
+                            st = p.stat()
+                            files.append((rec_id, (fmt or '?'), p.name, datetime.fromtimestamp(st.st_mtime), st.st_size))
+                if not files:
                     QMessageBox.information(parent, "Exportados", "No hay archivos exportados registrados en BD.")
                     return
+                total = len(files)
+                model = ExportsListModel(rows=files)
             except Exception:
                 QMessageBox.information(parent, "Exportados", "No hay archivos exportados registrados en BD.")
                 return
@@ -200,16 +243,13 @@ def view_exports_dialog(parent):
         dlg = QDialog(parent)
         dlg.setWindowTitle('Exportados (BD)')
         layout = QVBoxLayout(dlg)
-        info = QLabel(f'Se encontraron {len(rows)} registros. Selecciona uno para abrir:')
+        info = QLabel(f'Se encontraron {total} registros. Selecciona uno para abrir:')
         layout.addWidget(info)
-        lw = QListWidget()
-        id_map = {}
-        for rec in rows:
-            rec_id, fmt, fn, fecha = rec
-            display = f"{rec_id} | {fmt or '?'} | {fn or 'sin_nombre'} | {fecha or ''}"
-            item = display
-            lw.addItem(item)
-            id_map[item] = rec_id
+        lw = QListView()
+        # every row has the same height: lets the view skip measuring 100k items
+        lw.setUniformItemSizes(True)
+        model.setParent(dlg)
+        lw.setModel(model)
         layout.addWidget(lw)
 
         buttons_h = QHBoxLayout()
@@ -221,11 +261,11 @@ def view_exports_dialog(parent):
         layout.addLayout(buttons_h)
 
         def on_open():
-            sel = lw.currentItem()
-            if not sel:
+            sel = lw.currentIndex()
+            if not sel.isValid():
                 QMessageBox.information(dlg, 'Seleccionar', 'Por favor selecciona un registro.')
                 return
-            rec_id = id_map.get(sel.text())
+            rec_id = sel.data(Qt.ItemDataRole.UserRole)
             # If this is a filesystem fallback entry, open the file directly
             if isinstance(rec_id, str) and rec_id.startswith('FS:'):
                 fp = rec_id[3:]
@@ -241,72 +281,47 @@ def view_exports_dialog(parent):
                     QMessageBox.information(dlg, 'Exportado', f'No se pudo abrir el archivo: {e}')
                     return
 
-            data = db_fetch_export_file(rec_id)
-            if not data:
+            res = db_export_to_tempfile(rec_id)
+            if not res:
                 QMessageBox.information(dlg, 'Exportado', 'No se pudo obtener contenido del registro.')
                 return
+            path, content_type, _fn = res
 
-            # If bytes, try detect PDF vs CSV. If str, treat as CSV text.
-            is_bytes = isinstance(data, (bytes, bytearray))
             try:
-                if is_bytes:
-                    # detect PDF
-                    if data[:4] == b'%PDF':
-                        # Write to a system temp file and open with default PDF viewer
-                        import tempfile, os as _os
-                        try:
-                            tf = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
-                            tf.write(data)
-                            tf.flush()
-                            tf.close()
-                            # On Windows use os.startfile, otherwise fallback to webbrowser
-                            try:
-                                _os.startfile(tf.name)
-                            except Exception:
-                                webbrowser.open(f'file://{tf.name}')
-                            dlg.accept()
-                            return
-                        except Exception as e:
-                            QMessageBox.information(dlg, 'Exportado', f'No se pudo abrir PDF temporal: {e}')
-                            return
-                    else:
-                        # attempt decode as text and show in dialog
-                        try:
-                            txt = data.decode('utf-8')
-                        except Exception:
-                            txt = data.decode('latin-1', errors='ignore')
-                        show_dlg = QDialog(parent)
-                        show_dlg.setWindowTitle('Exportado (vista)')
-                        v = QVBoxLayout(show_dlg)
-                        te = QPlainTextEdit()
-                        te.setReadOnly(True)
-                        te.setPlainText(txt)
-                        v.addWidget(te)
-                        btn = QPushButton('Cerrar')
-                        btn.clicked.connect(show_dlg.accept)
-                        v.addWidget(btn)
-                        show_dlg.exec()
-                        return
-                else:
-                    # string-like: show as CSV text
-                    txt = str(data)
-                    show_dlg = QDialog(parent)
-                    show_dlg.setWindowTitle('Exportado (vista)')
-                    v = QVBoxLayout(show_dlg)
-                    te = QPlainTextEdit()
-                    te.setReadOnly(True)
-                    te.setPlainText(txt)
-                    v.addWidget(te)
-                    btn = QPushButton('Cerrar')
-                    btn.clicked.connect(show_dlg.accept)
-                    v.addWidget(btn)
-                    show_dlg.exec()
+                if content_type == 'application/pdf':
+                    # open the temp file with the default PDF viewer
+                    # On Windows use os.startfile, otherwise fallback to webbrowser
+                    try:
+                        os.startfile(path)
+                    except Exception:
+                        webbrowser.open(Path(path).as_uri())
+                    dlg.accept()
                     return
+                # CSV / text: preview the start in a dialog, the temp file is no longer needed
+                try:
+                    txt, truncated = _read_preview(path, EXPORTS_PREVIEW_BYTES)
+                finally:
+                    os.remove(path)
+                if truncated:
+                    txt += f'\n… (vista limitada a los primeros {_fmt_size(EXPORTS_PREVIEW_BYTES)})'
+                show_dlg = QDialog(parent)
+                show_dlg.setWindowTitle('Exportado (vista)')
+                v = QVBoxLayout(show_dlg)
+                te = QPlainTextEdit()
+                te.setReadOnly(True)
+                te.setPlainText(txt)
+                v.addWidget(te)
+                btn = QPushButton('Cerrar')
+                btn.clicked.connect(show_dlg.accept)
+                v.addWidget(btn)
+                show_dlg.exec()
+                return
             except Exception as e:
-                QMessageBox.information(dlg, 'Exportado', f'No se pudo mostrar el contenido en memoria: {e}')
+                QMessageBox.information(dlg, 'Exportado', f'No se pudo abrir el archivo exportado: {e}')
                 return
 
         btn_open.clicked.connect(on_open)
+        lw.doubleClicked.connect(lambda _idx: on_open())
         btn_cancel.clicked.connect(dlg.reject)
 
         dlg.exec()
@@ -2,13 +2,20 @@
 
 By default the server uses Werkzeug's generate_password_hash (PBKDF2), so to
 be compatible we generate hashes with Werkzeug too. For legacy Argon2 hashes
-we keep a verification fallback.
+we keep a verification fallback; argon2 is only imported the first time
+that fallback is needed (or by app.utils.warmup), not at startup.
 """
 from werkzeug.security import generate_password_hash, check_password_hash
-from argon2 import PasswordHasher
-from argon2.exceptions import VerifyMismatchError, VerificationError
 
-ph = PasswordHasher()
+_ph = None
+
+
+def _argon2_hasher():
+    global _ph
+    if _ph is None:
+        from argon2 import PasswordHasher
+        _ph = PasswordHasher()
+    return _ph
 
 
 def hash_password(password: str) -> str:
@@ -36,8 +43,9 @@ def verify_password(hashed_password: str, plain_password: str) -> bool:
         # back to Argon2 verification for legacy hashes created by older
         # desktop versions.
         try:
-            return ph.verify(hashed_password, plain_password)
-        except (VerifyMismatchError, VerificationError, Exception):
+            return _argon2_hasher().verify(hashed_password, plain_password)
+        except Exception:
+            # VerifyMismatchError / VerificationError, or argon2 not installed
             return False
 
 
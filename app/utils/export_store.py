@@ -0,0 +1,340 @@
+"""Exported file store (content-addressed).
+
+Exported CSV/PDF files are stored once per distinct content:
+  - ``export_blobs``: one row per SHA-256 (size, content type, chunk count)
+  - ``export_blob_chunks``: the raw bytes in ``CHUNK_SIZE`` pieces
+  - ``historialexportado``: one row per export pointing at ``sha256``
+
+Content is uploaded in chunks (no base64, no single giant parameter). When
+the content is known up front (bytes or a file on disk) it is hashed first
+and an identical existing blob is reused without uploading anything. Every
+upload goes under its own temporary key and is renamed to the SHA-256 when
+its ``export_blobs`` row is inserted (or discarded, if another upload stored
+the same content first), so aborting an upload never touches chunks that a
+concurrent upload of the same content or a stored blob owns.
+
+Reading goes the other way: :func:`stream_export_to_file` fetches the
+metadata and every chunk of one export with a single query on an unbuffered
+cursor and writes the chunks to a temp file as they arrive, so only one chunk
+is ever held in memory.
+
+The tables are created by ``docs/migrations/003_export_artifacts.sql``.
+Exports saved before it kept base64 text in ``historialexportado.contenido``;
+:func:`backfill_legacy_contenido` moves them into the store, run once with
+``python -m app.utils.export_store --backfill``.
+"""
+import argparse
+import base64
+import binascii
+import hashlib
+import logging
+import os
+import tempfile
+import uuid
+from pathlib import Path
+
+try:
+    from pymysql.cursors import SSCursor
+except Exception:
+    SSCursor = None
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+
+CONTENT_TYPES = {"CSV": "text/csv", "PDF": "application/pdf"}
+SUFFIXES = {"text/csv": ".csv", "application/pdf": ".pdf"}
+
+
+def content_type_for(formato):
+    return CONTENT_TYPES.get(str(formato).upper(), "application/octet-stream")
+
+
+def _iter_chunks(source, chunk_size=CHUNK_SIZE):
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        mv = memoryview(source)
+        for i in range(0, len(mv), chunk_size):
+            yield bytes(mv[i:i + chunk_size])
+    elif isinstance(source, (str, Path)):
+        with open(source, "rb") as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+    else:
+        # iterable of byte chunks of any size; re-chunk to CHUNK_SIZE
+        buf = bytearray()
+        for piece in source:
+            buf += piece
+            while len(buf) >= chunk_size:
+                yield bytes(buf[:chunk_size])
+                del buf[:chunk_size]
+        if buf:
+            yield bytes(buf)
+
+
+def _sha256_of(source):
+    h = hashlib.sha256()
+    size = 0
+    for chunk in _iter_chunks(source):
+        h.update(chunk)
+        size += len(chunk)
+    return h.hexdigest(), size
+
+
+def _blob_exists(cursor, sha):
+    cursor.execute("SELECT 1 FROM export_blobs WHERE sha256 = %s", (sha,))
+    return cursor.fetchone() is not None
+
+
+class BlobUpload:
+    """Chunked upload of one blob; use :meth:`write` then :meth:`finish`.
+
+    ``conn`` must be a PyMySQL connection (``autocommit=True`` as returned by
+    ``get_connection``); each chunk is its own INSERT. ``sha256``, when known
+    up front, is only checked against the uploaded content.
+    """
+
+    def __init__(self, conn, content_type, sha256=None):
+        self.conn = conn
+        self.content_type = content_type
+        self.known_sha = sha256
+        self.key = f"tmp-{uuid.uuid4().hex}"
+        self._hash = hashlib.sha256()
+        self._buf = bytearray()
+        self.size = 0
+        self.chunks = 0
+
+    def write(self, data):
+        self._hash.update(data)
+        self.size += len(data)
+        self._buf += data
+        while len(self._buf) >= CHUNK_SIZE:
+            self._put(bytes(self._buf[:CHUNK_SIZE]))
+            del self._buf[:CHUNK_SIZE]
+
+    def _put(self, chunk):
+        with self.conn.cursor() as cur:
+            cur.execute(
+                "INSERT INTO export_blob_chunks (sha256, seq, data) VALUES (%s, %s, %s)",
+                (self.key, self.chunks, chunk),
+            )
+        self.chunks += 1
+
+    def finish(self):
+        """Flush the last chunk and publish the blob; returns its SHA-256."""
+        if self._buf:
+            self._put(bytes(self._buf))
+            self._buf = bytearray()
+        sha = self._hash.hexdigest()
+        if self.known_sha and self.known_sha != sha:
+            self.abort()
+            raise ValueError("el contenido cambió durante la subida")
+        self.conn.begin()
+        try:
+            with self.conn.cursor() as cur:
+                try:
+                    # the primary key serializes concurrent uploads of the same content
+                    cur.execute(
+                        "INSERT INTO export_blobs (sha256, size_bytes, content_type, chunks) VALUES (%s, %s, %s, %s)",
+                        (sha, self.size, self.content_type, self.chunks),
+                    )
+                except self.conn.IntegrityError:
+                    # identical content already stored: drop our copy
+                    cur.execute("DELETE FROM export_blob_chunks WHERE sha256 = %s", (self.key,))
+                else:
+                    cur.execute("UPDATE export_blob_chunks SET sha256 = %s WHERE sha256 = %s", (sha, self.key))
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            self.abort()
+            raise
+        self.key = sha
+        return sha
+
+    def abort(self):
+        """Delete the chunks of this upload (only its temporary key)."""
+        try:
+            with self.conn.cursor() as cur:
+                cur.execute("DELETE FROM export_blob_chunks WHERE sha256 = %s", (self.key,))
+        except Exception:
+            logger.exception("export_store abort error")
+
+
+def store_blob(conn, source, content_type):
+    """Store ``source`` (bytes, file path or iterable of chunks).
+
+    Returns ``(sha256, size)``. Bytes and files are hashed first so existing
+    content is never re-uploaded.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview, str, Path)):
+        sha, size = _sha256_of(source)
+        with conn.cursor() as cur:
+            if _blob_exists(cur, sha):
+                return sha, size
+        up = BlobUpload(conn, content_type, sha256=sha)
+    else:
+        up = BlobUpload(conn, content_type)
+    try:
+        for chunk in _iter_chunks(source):
+            up.write(chunk)
+    except Exception:
+        up.abort()
+        raise
+    return up.finish(), up.size
+
+
+def record_export(conn, user_id, formato, filename, sha, size, content_type):
+    with conn.cursor() as cur:
+        cur.execute(
+            "INSERT INTO historialexportado (id_usuario, formato, filename, content_type, size_bytes, sha256) "
+            "VALUES (%s, %s, %s, %s, %s, %s)",
+            (user_id, formato, filename, content_type, size, sha),
+        )
+        return cur.lastrowid
+
+
+def save_export_artifact(conn, user_id, formato, filename=None, source=None):
+    """Store an exported file and record it in ``historialexportado``.
+
+    Returns the new ``id_exportacion``.
+    """
+    content_type = content_type_for(formato)
+    sha = size = None
+    if source is not None:
+        sha, size = store_blob(conn, source, content_type)
+    if filename:
+        filename = Path(filename).name
+    return record_export(conn, user_id, formato, filename, sha, size, content_type)
+
+
+def _has_column(conn, table, column):
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT 1 FROM information_schema.COLUMNS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s",
+            (table, column),
+        )
+        return cur.fetchone() is not None
+
+
+def _legacy_bytes(value):
+    # the old db_save_export_file stored base64 text; anything else is kept raw
+    raw = value.encode("utf-8") if isinstance(value, str) else bytes(value)
+    try:
+        return base64.b64decode(b"".join(raw.split()), validate=True)
+    except (binascii.Error, ValueError):
+        return raw
+
+
+def backfill_legacy_contenido(conn):
+    """Store the legacy ``contenido`` of every export without ``sha256``.
+
+    One record at a time (contents can be large), keyed by id so it can be
+    re-run after an interruption. ``contenido`` itself is left in place.
+    Returns the number of exports migrated.
+    """
+    if not _has_column(conn, "historialexportado", "contenido"):
+        return 0
+    last_id = done = 0
+    while True:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT id_exportacion, formato, contenido FROM historialexportado "
+                "WHERE sha256 IS NULL AND contenido IS NOT NULL AND id_exportacion > %s "
+                "ORDER BY id_exportacion LIMIT 1",
+                (last_id,),
+            )
+            row = cur.fetchone()
+        if row is None:
+            return done
+        if isinstance(row, dict):
+            row = tuple(row.values())
+        last_id, formato, contenido = row
+        content_type = content_type_for(formato)
+        sha, size = store_blob(conn, _legacy_bytes(contenido), content_type)
+        with conn.cursor() as cur:
+            cur.execute(
+                "UPDATE historialexportado SET sha256 = %s, size_bytes = %s, "
+                "content_type = COALESCE(content_type, %s) WHERE id_exportacion = %s",
+                (sha, size, content_type, last_id),
+            )
+        done += 1
+
+
+def stream_export_to_file(conn, rec_id, dest_dir=None):
+    """Write the content of export ``rec_id`` to a new temp file.
+
+    Returns ``(path, content_type, filename)``, or ``None`` when the record
+    doesn't exist or has no stored content.
+    """
+    cur = conn.cursor(SSCursor) if SSCursor is not None else conn.cursor()
+    out = path = None
+    try:
+        # one query: metadata + chunks in order (PK sha256, seq)
+        cur.execute(
+            "SELECT h.filename, h.content_type, h.size_bytes, h.sha256, c.data "
+            "FROM historialexportado h "
+            "LEFT JOIN export_blob_chunks c ON c.sha256 = h.sha256 "
+            "WHERE h.id_exportacion = %s ORDER BY c.seq",
+            (rec_id,),
+        )
+        meta = None
+        h = hashlib.sha256()
+        written = 0
+        for row in cur:
+            if isinstance(row, dict):
+                row = tuple(row.values())
+            if meta is None:
+                meta = row[:4]
+                if row[4] is None:
+                    break
+                suffix = SUFFIXES.get(meta[1]) or Path(meta[0] or "").suffix
+                fd, path = tempfile.mkstemp(prefix="export_", suffix=suffix, dir=dest_dir)
+                out = os.fdopen(fd, "wb")
+            out.write(row[4])
+            h.update(row[4])
+            written += len(row[4])
+        if path is None:
+            return None
+        out.close()
+        filename, content_type, size, sha = meta
+        if (size is not None and written != size) or h.hexdigest() != sha:
+            raise ValueError(f"contenido incompleto para la exportación {rec_id}")
+        return path, content_type, filename
+    except Exception:
+        if out is not None:
+            out.close()
+        if path is not None:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        raise
+    finally:
+        cur.close()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Almacén de archivos exportados")
+    ap.add_argument("--backfill", action="store_true",
+                    help="mover el contenido base64 antiguo (historialexportado.contenido) al almacén")
+    args = ap.parse_args()
+    if not args.backfill:
+        ap.print_help()
+        return
+    from app.models.database import get_connection
+
+    conn = get_connection()
+    if conn is None:
+        raise SystemExit("No se pudo conectar a la base de datos")
+    try:
+        n = backfill_legacy_contenido(conn)
+    finally:
+        conn.close()
+    print(f"{n} exportaciones migradas")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,38 +1,22 @@
 """Shared helpers moved into app.utils"""
 
-import sys
-import os
-import webbrowser
 import time
 import json
-import csv
-from functools import partial
 from pathlib import Path
-from datetime import datetime
-import re
-import base64
-import binascii
-from io import BytesIO, StringIO
 import logging
-import socket
+import atexit
+import shutil
+import tempfile
 
 logger = logging.getLogger(__name__)
 
 # optional serial is handled in serial_thread module
+# reportlab and PyMySQL are imported on first use (pdf_canvas / get_db_conn) so
+# they stay out of the startup path; app.utils.warmup loads them after the first paint
 
-# optional pdf generation
-try:
-    from reportlab.pdfgen import canvas as pdfcanvas
-    REPORTLAB_AVAILABLE = True
-except Exception:
-    pdfcanvas = None
-    REPORTLAB_AVAILABLE = False
-
-# DB helper
-try:
-    from app.models.database import get_connection
-except Exception:
-    get_connection = None
+from app.utils.export_store import save_export_artifact, stream_export_to_file
+from server.normalize import normalize_valor
+from app.utils.telemetry import telemetry
 
 # constants
 MAX_WIDTH = 820
@@ -59,15 +43,28 @@ def load_settings():
 
 
 def save_settings(settings: dict):
+    # merge so keys written elsewhere (e.g. serial_capture_dir) survive a theme change
+    data = {**load_settings(), **settings}
     try:
         with open(SETTINGS_FILE, "w", encoding="utf-8") as f:
-            json.dump(settings, f, ensure_ascii=False, indent=2)
+            json.dump(data, f, ensure_ascii=False, indent=2)
     except Exception:
         logger.exception("No se pudo guardar settings")
 
 
+def pdf_canvas():
+    """``reportlab.pdfgen.canvas`` or None when reportlab is not installed."""
+    try:
+        from reportlab.pdfgen import canvas
+    except Exception:
+        return None
+    return canvas
+
+
 def get_db_conn():
-    if get_connection is None:
+    try:
+        from app.models.database import get_connection
+    except Exception:
         return None
     try:
         return get_connection()
@@ -109,63 +106,40 @@ def get_or_create_user_id(username: str):
 
 
 def _normalize_val(valor, tipo_evento=None, detalle=None, origen=None):
-    """Normaliza el campo 'valor' para eventos: mapea 1/0, true/false, 'on'/'off' a 'ON'/'OFF'.
-    Si el valor contiene 'contador=' se deja tal cual. Devuelve siempre string de max 50 caracteres.
-    """
-    try:
-        if valor is None:
-            return ""
-        # bytes -> str
-        if isinstance(valor, (bytes, bytearray)):
-            try:
-                valor = valor.decode('utf-8', errors='ignore')
-            except Exception:
-                valor = str(valor)
-
-        # ints
-        if isinstance(valor, (int,)):
-            if valor == 1:
-                return "ON"
-            if valor == 0:
-                return "OFF"
-            return str(valor)[:50]
-
-        s = str(valor).strip()
-        if not s:
-            return ""
-
-        # preserve contador=NN strings
-        if s.lower().startswith('contador='):
-            return s[:50]
-
-        # common true/false/1/0/on/off mappings
-        low = s.lower()
-        if low in ('1', 'true', 'on', 'activo', 'encendido'):
-            return 'ON'
-        if low in ('0', 'false', 'off', 'inactivo', 'apagado'):
-            return 'OFF'
-
-        # sometimes the value may be like 'LED1' or numeric with extra text; try to extract a trailing 1/0
-        m = re.search(r'\b(1|0)\b', s)
-        if m:
-            return 'ON' if m.group(1) == '1' else 'OFF'
-
-        # fallback: truncate to 50 chars
-        return s[:50]
-    except Exception:
-        try:
-            return str(valor)[:50]
-        except Exception:
-            return ''
+    """Normaliza el campo 'valor' para eventos (ver server/normalize.py)."""
+    return normalize_valor(valor)
+
+
+def _contador_from(tipo_evento, detalle, valor):
+    """Counter reading for ``eventos.contador`` (same rules as server/state.contador_value)."""
+    if detalle == "CONTADOR":
+        if tipo_evento == "RESET_CONTADOR":
+            return 0
+        if tipo_evento != "CONTADOR_CAMBIO":
+            return None
+    s = str(valor if valor is not None else "").strip()
+    if s.lower().startswith("contador="):
+        s = s[len("contador="):]
+    elif detalle != "CONTADOR":
+        return None
+    return int(s) if s.isdigit() else None
 
 
-def db_save_event(user_id, tipo_evento, detalle, origen, valor):
+# False once the DB reported eventos.contador missing (migration 005 not applied)
+_EVENTOS_HAS_CONTADOR = True
+
+
+def db_save_event(user_id, tipo_evento, detalle, origen, valor, contador=None):
+    global _EVENTOS_HAS_CONTADOR
     if user_id is None:
         return False
+    t0 = time.perf_counter()
     conn = get_db_conn()
     if conn is None:
+        telemetry.record_db_save(None, False)
         return False
     cursor = None
+    ok = False
     try:
         cursor = conn.cursor()
         # normalize valor for consistency (store ON/OFF where applicable)
@@ -177,6 +151,7 @@ def db_save_event(user_id, tipo_evento, detalle, origen, valor):
         # attempt to detect the local IP address to store in origen_ip
         ip_addr = None
         try:
+            import socket
             # create a UDP socket and connect to a public IP to discover the outbound address
             s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
             s.settimeout(0.5)
@@ -197,12 +172,26 @@ def db_save_event(user_id, tipo_evento, detalle, origen, valor):
         except Exception:
             ip_addr = None
 
-        sql = "INSERT INTO eventos (id_usuario, tipo_evento, detalle, origen, valor, origen_ip) VALUES (%s, %s, %s, %s, %s, %s)"
-        cursor.execute(sql, (user_id, tipo_evento, detalle, origen, valor_norm, ip_addr))
+        if contador is None:
+            contador = _contador_from(tipo_evento, detalle, valor)
+        if _EVENTOS_HAS_CONTADOR:
+            try:
+                sql = "INSERT INTO eventos (id_usuario, tipo_evento, detalle, origen, valor, contador, origen_ip) VALUES (%s, %s, %s, %s, %s, %s, %s)"
+                cursor.execute(sql, (user_id, tipo_evento, detalle, origen, valor_norm, contador, ip_addr))
+            except Exception as e:
+                # 1054 = unknown column: keep saving events on a DB without migration 005
+                if not (e.args and e.args[0] == 1054):
+                    raise
+                logger.warning("eventos.contador no existe; aplicar docs/migrations/005_eventos_contador.sql")
+                _EVENTOS_HAS_CONTADOR = False
+        if not _EVENTOS_HAS_CONTADOR:
+            sql = "INSERT INTO eventos (id_usuario, tipo_evento, detalle, origen, valor, origen_ip) VALUES (%s, %s, %s, %s, %s, %s)"
+            cursor.execute(sql, (user_id, tipo_evento, detalle, origen, valor_norm, ip_addr))
         try:
             conn.commit()
         except Exception:
             pass
+        ok = True
         return True
     except Exception:
         logger.exception("DB save_event error")
@@ -215,223 +204,73 @@ def db_save_event(user_id, tipo_evento, detalle, origen, valor):
                 conn.close()
         except Exception:
             pass
+        telemetry.record_db_save((time.perf_counter() - t0) * 1000, ok)
 
 
 def db_save_export_file(user_id, formato, filename=None, content_bytes=None):
+    """Store an exported file (bytes, a path on disk or an iterable of chunks).
+
+    Content goes to the content-addressed store in ``app.utils.export_store``;
+    identical exports are stored once.
+    """
     if user_id is None:
         return False
     conn = get_db_conn()
     if conn is None:
         return False
-    cursor = None
     try:
-        cursor = conn.cursor()
-        if content_bytes is not None:
-            try:
-                b64 = base64.b64encode(content_bytes).decode('ascii')
-            except Exception:
-                try:
-                    b64 = base64.b64encode(str(content_bytes).encode('utf-8')).decode('ascii')
-                except Exception:
-                    b64 = None
-
-            if b64:
-                inserted = False
-                try:
-                    cursor.execute("INSERT INTO historialexportado (id_usuario, formato, contenido) VALUES (%s, %s, %s)",
-                                   (user_id, formato, b64))
-                    try:
-                        conn.commit()
-                    except Exception:
-                        pass
-                    inserted = True
-                except Exception as e:
-                    try:
-                        msg = str(e).lower()
-                        if 'unknown column' in msg or 'columna' in msg or 'contenido' in msg:
-                            try:
-                                cursor.execute("ALTER TABLE historialexportado ADD COLUMN contenido LONGBLOB")
-                                try:
-                                    conn.commit()
-                                except Exception:
-                                    pass
-                                cursor.execute("INSERT INTO historialexportado (id_usuario, formato, contenido) VALUES (%s, %s, %s)",
-                                               (user_id, formato, b64))
-                                try:
-                                    conn.commit()
-                                except Exception:
-                                    pass
-                                inserted = True
-                            except Exception:
-                                inserted = False
-                        else:
-                            inserted = False
-                    except Exception:
-                        inserted = False
-
-                if not inserted:
-                    try:
-                        cursor.execute("INSERT INTO historialexportado (id_usuario, formato, detalle) VALUES (%s, %s, %s)",
-                                       (user_id, formato, b64))
-                        try:
-                            conn.commit()
-                        except Exception:
-                            pass
-                        inserted = True
-                    except Exception:
-                        try:
-                            cursor.execute("INSERT INTO historialexportado (id_usuario, formato, valor) VALUES (%s, %s, %s)",
-                                           (user_id, formato, b64))
-                            try:
-                                conn.commit()
-                            except Exception:
-                                pass
-                            inserted = True
-                        except Exception:
-                            inserted = False
-
-                if inserted:
-                    return True
-
-        if filename:
-            try:
-                cursor.execute(
-                    "INSERT INTO historialexportado (id_usuario, formato, filename) VALUES (%s, %s, %s)",
-                    (user_id, formato, filename)
-                )
-                try:
-                    conn.commit()
-                except Exception:
-                    pass
-                return True
-            except Exception:
-                try:
-                    cursor.execute("INSERT INTO historialexportado (id_usuario, formato, detalle) VALUES (%s, %s, %s)",
-                                   (user_id, formato, filename))
-                    try:
-                        conn.commit()
-                    except Exception:
-                        pass
-                    return True
-                except Exception:
-                    try:
-                        cursor.execute("INSERT INTO historialexportado (id_usuario, formato) VALUES (%s, %s)", (user_id, formato))
-                        try:
-                            conn.commit()
-                        except Exception:
-                            pass
-                        return True
-                    except Exception:
-                        return False
-
-        try:
-            cursor.execute("INSERT INTO historialexportado (id_usuario, formato) VALUES (%s, %s)", (user_id, formato))
-            try:
-                conn.commit()
-            except Exception:
-                pass
-            return True
-        except Exception:
-            logger.exception("DB save_export_file error")
-            return False
+        save_export_artifact(conn, user_id, formato, filename=filename, source=content_bytes)
+        return True
     except Exception:
-        logger.exception("DB save_export_file error")
+        logger.exception("DB save_export_file error (¿falta docs/migrations/003_export_artifacts.sql?)")
         return False
     finally:
         try:
-            if cursor:
-                cursor.close()
-            if conn:
-                conn.close()
+            conn.close()
         except Exception:
             pass
 
 
-def _extract_filename_from_row(cursor, row):
-    candidates = ["filename", "file", "nombre", "ruta", "path", "detalle", "valor", "name"]
-    try:
-        if isinstance(row, dict):
-            for c in candidates:
-                if c in row and row[c]:
-                    return str(row[c])
-            for k, v in row.items():
-                try:
-                    if isinstance(v, str) and (v.lower().endswith(".pdf") or v.lower().endswith(".csv")):
-                        return v
-                except Exception:
-                    pass
-            return None
-        desc = []
-        try:
-            desc = [d[0].lower() for d in cursor.description] if cursor and cursor.description else []
-        except Exception:
-            desc = []
-        for idx, colname in enumerate(desc):
-            if colname in candidates:
-                try:
-                    val = row[idx]
-                    if val:
-                        return str(val)
-                except Exception:
-                    pass
-        for item in row:
-            try:
-                if isinstance(item, str) and (item.lower().endswith(".pdf") or item.lower().endswith(".csv")):
-                    return item
-            except Exception:
-                pass
-        return None
-    except Exception:
-        return None
+EXPORTS_PAGE_SIZE = 500
+# the exports dialog shows at most this much of a CSV (the rest is cut at a line end)
+EXPORTS_PREVIEW_BYTES = 1 << 20
+
+_EXPORT_META_COLS = "id_exportacion, formato, filename, fecha_exportacion, size_bytes"
 
 
-def db_list_exported(formato=None):
+def db_list_exported(formato=None, after=None, limit=EXPORTS_PAGE_SIZE):
+    """List exported files (metadata only), newest first.
+
+    Returns ``[(id, formato, filename, fecha, size_bytes)]``. Pages are
+    keyset-based: pass ``after=(fecha, id)`` of the last row of the previous
+    page. No content is read; see ``db_export_to_tempfile`` for that.
+    """
     conn = get_db_conn()
     if conn is None:
         return []
     cursor = None
-    out = []
     try:
         cursor = conn.cursor()
+        where, params = [], []
         if formato in ("CSV", "PDF"):
-            cursor.execute("SELECT * FROM historialexportado WHERE formato=%s", (formato,))
-        else:
-            cursor.execute("SELECT * FROM historialexportado")
-        rows = cursor.fetchall()
-        if not rows:
-            return []
-        for r in rows:
-            fn = _extract_filename_from_row(cursor, r)
-            rec_id = None
-            fecha = None
-            fmt = None
-            try:
-                if isinstance(r, dict):
-                    rec_id = r.get("id") or r.get("id_exportacion") or r.get("id_historial") or None
-                    fecha = r.get("fecha_hora") or r.get("fecha_exportacion") or r.get("created_at") or None
-                    fmt = r.get("formato")
-                else:
-                    desc_names = [d[0].lower() for d in cursor.description] if cursor.description else []
-                    if "id" in desc_names:
-                        rec_id = r[desc_names.index("id")]
-                    elif "id_exportacion" in desc_names:
-                        rec_id = r[desc_names.index("id_exportacion")]
-                    if "fecha_hora" in desc_names:
-                        fecha = r[desc_names.index("fecha_hora")]
-                    elif "fecha_exportacion" in desc_names:
-                        fecha = r[desc_names.index("fecha_exportacion")]
-                    elif "created_at" in desc_names:
-                        fecha = r[desc_names.index("created_at")]
-                    if "formato" in desc_names:
-                        fmt = r[desc_names.index("formato")]
-            except Exception:
-                pass
-            out.append((rec_id, (fmt or "?"), fn, fecha))
-        try:
-            out_sorted = sorted(out, key=lambda x: x[3] or "", reverse=True)
-        except Exception:
-            out_sorted = out
-        return out_sorted
+            where.append("formato=%s")
+            params.append(formato)
+        if after is not None:
+            fecha, rec_id = after
+            where.append("(fecha_exportacion < %s OR (fecha_exportacion = %s AND id_exportacion < %s))")
+            params += [fecha, fecha, rec_id]
+        sql = f"SELECT {_EXPORT_META_COLS} FROM historialexportado"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY fecha_exportacion DESC, id_exportacion DESC"
+        if limit:
+            sql += " LIMIT %s"
+            params.append(int(limit))
+        cursor.execute(sql, params)
+        return [
+            (r["id_exportacion"], r["formato"] or "?", r["filename"], r["fecha_exportacion"], r["size_bytes"])
+            for r in cursor.fetchall()
+        ]
     except Exception:
         logger.exception("db_list_exported error")
         return []
@@ -445,110 +284,60 @@ def db_list_exported(formato=None):
             pass
 
 
-def db_fetch_export_file(rec_id):
+def db_count_exported(formato=None):
+    """Number of exports recorded in the DB; ``None`` when the DB is unreachable."""
     conn = get_db_conn()
     if conn is None:
         return None
-    cursor = None
     try:
-        cursor = conn.cursor()
-        for id_col in ("id_exportacion", "id", "id_historial"):
-            try:
-                cursor.execute(f"SELECT * FROM historialexportado WHERE {id_col}=%s LIMIT 1", (rec_id,))
-                rows = cursor.fetchall()
-                if not rows:
-                    continue
-                row = rows[0]
-                row_map = {}
-                if isinstance(row, dict):
-                    row_map = row
-                else:
-                    try:
-                        desc = [d[0].lower() for d in cursor.description] if cursor.description else []
-                        for idx, name in enumerate(desc):
-                            try:
-                                row_map[name] = row[idx]
-                            except Exception:
-                                pass
-                    except Exception:
-                        pass
-
-                def _try_decode_b64_from_text(text):
-                    s_clean = re.sub(r"\s+", "", text)
-                    try:
-                        decoded = base64.b64decode(s_clean, validate=False)
-                        return decoded
-                    except Exception:
-                        return None
-
-                def _is_likely_pdf(bts):
-                    return bts[:4] == b"%PDF"
-
-                def _is_likely_text_csv(bts):
-                    try:
-                        txt = bts.decode('utf-8', errors='ignore')
-                        return (',' in txt) and ('\n' in txt or '\r' in txt)
-                    except Exception:
-                        return False
-
-                if 'contenido' in row_map and row_map.get('contenido'):
-                    val = row_map['contenido']
-                    if isinstance(val, (bytes, bytearray)):
-                        b = bytes(val)
-                        if _is_likely_pdf(b) or not all(32 <= x <= 127 or x in (9,10,13) for x in b[:64]):
-                            return b
-                        try:
-                            txt = b.decode('utf-8', errors='ignore')
-                            decoded = _try_decode_b64_from_text(txt)
-                            if decoded:
-                                if _is_likely_pdf(decoded) or _is_likely_text_csv(decoded):
-                                    return decoded
-                                try:
-                                    _ = decoded.decode('utf-8')
-                                    return decoded
-                                except Exception:
-                                    return b
-                            else:
-                                return b
-                        except Exception:
-                            return b
-                    elif isinstance(val, str):
-                        s = val.strip()
-                        if s.lower().endswith('.pdf') or s.lower().endswith('.csv'):
-                            return None
-                        decoded = _try_decode_b64_from_text(s)
-                        if decoded:
-                            return decoded
-                        else:
-                            return s.encode('utf-8')
-
-                candidates = ["file", "data", "blob", "detalle", "valor", "contenido_base64", "content", "archivo", "filename"]
-                for c in candidates:
-                    if c in row_map and row_map[c]:
-                        val = row_map[c]
-                        if isinstance(val, (bytes, bytearray)):
-                            return bytes(val)
-                        if isinstance(val, str):
-                            s = val.strip()
-                            if s.lower().endswith('.pdf') or s.lower().endswith('.csv'):
-                                continue
-                            decoded = _try_decode_b64_from_text(s)
-                            if decoded:
-                                return decoded
-                            else:
-                                return s.encode('utf-8')
-                return None
-            except Exception:
-                continue
+        with conn.cursor() as cursor:
+            if formato in ("CSV", "PDF"):
+                cursor.execute("SELECT COUNT(*) AS n FROM historialexportado WHERE formato=%s", (formato,))
+            else:
+                cursor.execute("SELECT COUNT(*) AS n FROM historialexportado")
+            row = cursor.fetchone()
+            return int(row["n"]) if row else 0
+    except Exception:
+        logger.exception("db_count_exported error")
+        return None
+    finally:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+_exports_tmp = None
+
+
+def exports_tmp_dir():
+    """Temp directory for exports opened from the DB, removed when the app exits.
+
+    Files handed to an external viewer (PDF) can't be deleted while it may
+    still be reading them, so they live here until exit.
+    """
+    global _exports_tmp
+    if _exports_tmp is None:
+        _exports_tmp = tempfile.mkdtemp(prefix="protoboard_exports_")
+        atexit.register(shutil.rmtree, _exports_tmp, True)
+    return _exports_tmp
+
+
+def db_export_to_tempfile(rec_id):
+    """Stream the stored content of export ``rec_id`` into a temp file (see ``exports_tmp_dir``).
+
+    Returns ``(path, content_type, filename)`` or ``None``.
+    """
+    conn = get_db_conn()
+    if conn is None:
         return None
+    try:
+        return stream_export_to_file(conn, rec_id, dest_dir=exports_tmp_dir())
     except Exception:
-        logger.exception("db_fetch_export_file error")
+        logger.exception("db_export_to_tempfile error")
         return None
     finally:
         try:
-            if cursor:
-                cursor.close()
-            if conn:
-                conn.close()
+            conn.close()
         except Exception:
             pass
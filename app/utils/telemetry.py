@@ -0,0 +1,138 @@
+"""In-process performance telemetry for the desktop app.
+
+Fixed-size rolling windows (``collections.deque`` with ``maxlen``) for:
+  - ``serial_lines``: lines read by ``SerialThread`` (rate, lines/s)
+  - ``line_ms``: time spent in ``line_processing.on_line``
+  - ``db_save_ms``: ``db_save_event`` latency, plus ``db_saves``/``db_failures``
+  - ``ui_frame_ms``: ``MainWindow.update_ui`` time, plus ``history_size``
+  - ``sensor_edges``/``sensor_glitches``: output of the sensor debounce stage
+
+Recording is a ``perf_counter`` call and a deque append under a lock, cheap
+enough to stay on; the serial thread and the GUI thread both write here.
+``snapshot()``/``dump_json()`` give the current figures (shown by
+``app.gui.telemetry_panel``).
+"""
+import json
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+WINDOW = 500
+RATE_SECONDS = 10.0
+
+
+class RollingWindow:
+    """Last ``maxlen`` samples of a duration (ms) or any other value."""
+
+    def __init__(self, maxlen=WINDOW):
+        self.samples = deque(maxlen=maxlen)
+        self.total = 0
+
+    def add(self, value):
+        self.samples.append(value)
+        self.total += 1
+
+    def stats(self):
+        data = sorted(self.samples)
+        n = len(data)
+        if not n:
+            return {"n": 0, "total": self.total}
+        return {
+            "n": n,
+            "total": self.total,
+            "last": round(self.samples[-1], 3),
+            "mean": round(sum(data) / n, 3),
+            "p50": round(data[n // 2], 3),
+            "p95": round(data[min(n - 1, int(n * 0.95))], 3),
+            "max": round(data[-1], 3),
+        }
+
+
+class RateWindow:
+    """Events per second over the last ``seconds`` (timestamps, capped at ``maxlen``).
+
+    Until ``seconds`` have passed since it was created (or reset, which
+    creates a new one), the rate is over the time elapsed so far.
+    """
+
+    def __init__(self, seconds=RATE_SECONDS, maxlen=4096, started=None):
+        self.seconds = seconds
+        self.stamps = deque(maxlen=maxlen)
+        self.total = 0
+        self.started = time.monotonic() if started is None else started
+
+    def mark(self, now=None):
+        self.stamps.append(time.monotonic() if now is None else now)
+        self.total += 1
+
+    def stats(self, now=None):
+        now = time.monotonic() if now is None else now
+        horizon = now - self.seconds
+        while self.stamps and self.stamps[0] < horizon:
+            self.stamps.popleft()
+        n = len(self.stamps)
+        # if the deque is full the window is shorter than ``seconds``
+        span = now - self.stamps[0] if n == self.stamps.maxlen else min(self.seconds, now - self.started)
+        return {"per_s": round(n / span, 2) if span > 0 else 0.0, "total": self.total}
+
+
+class Telemetry:
+    def __init__(self, window=WINDOW, rate_seconds=RATE_SECONDS):
+        self._lock = threading.Lock()
+        self.window = window
+        self.rate_seconds = rate_seconds
+        self._clear()
+
+    def _clear(self):
+        self.started = datetime.now()
+        self.rates = {"serial_lines": RateWindow(self.rate_seconds)}
+        self.windows = {name: RollingWindow(self.window) for name in ("line_ms", "db_save_ms", "ui_frame_ms")}
+        self.counters = {"db_saves": 0, "db_failures": 0, "sensor_edges": 0, "sensor_glitches": 0}
+        self.gauges = {"history_size": 0}
+
+    def mark(self, name):
+        with self._lock:
+            self.rates[name].mark()
+
+    def observe(self, name, value):
+        with self._lock:
+            self.windows[name].add(value)
+
+    def incr(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def gauge(self, name, value):
+        self.gauges[name] = value
+
+    def record_db_save(self, ms, ok):
+        with self._lock:
+            if ms is not None:
+                self.windows["db_save_ms"].add(ms)
+            self.counters["db_saves" if ok else "db_failures"] += 1
+
+    def reset(self):
+        with self._lock:
+            self._clear()
+
+    def snapshot(self):
+        with self._lock:
+            out = {name: r.stats() for name, r in self.rates.items()}
+            out.update({name: w.stats() for name, w in self.windows.items()})
+            out.update(self.counters)
+            out.update(self.gauges)
+        out["since"] = self.started.isoformat(timespec="seconds")
+        out["at"] = datetime.now().isoformat(timespec="seconds")
+        return out
+
+    def dump_json(self, path=None):
+        """Return the snapshot as JSON; also write it to ``path`` if given."""
+        text = json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+        return text
+
+
+telemetry = Telemetry()
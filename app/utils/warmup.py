@@ -0,0 +1,51 @@
+"""Background preloading of the modules kept out of the startup path.
+
+``main.py`` shows the login window first and then calls ``start()`` from the
+event loop, so the imports below run in a daemon thread while the user is
+typing instead of before the first paint. Anything the user reaches before
+the thread gets to it is simply imported on demand (the import lock makes
+that safe). Missing optional packages (reportlab, pyserial) are skipped.
+"""
+import importlib
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# roughly in the order the user needs them: login, main window, serial, exports
+MODULES = (
+    "app.utils.auth_service",
+    "argon2",
+    "pymysql",
+    "app.models.usuario",
+    "app.gui.main_window",
+    "app.serial.serial_ui",
+    "reportlab.pdfgen.canvas",
+    "reportlab.lib.pagesizes",
+)
+
+_thread = None
+timings = {}
+
+
+def _run(modules):
+    t_start = time.perf_counter()
+    for name in modules:
+        t0 = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            logger.debug("warmup: %s no disponible (%s)", name, e)
+            continue
+        timings[name] = (time.perf_counter() - t0) * 1000
+    logger.debug("warmup: %d módulos en %.0f ms", len(timings), (time.perf_counter() - t_start) * 1000)
+
+
+def start(modules=MODULES):
+    """Start the warm-up thread once; later calls return the same thread."""
+    global _thread
+    if _thread is None:
+        _thread = threading.Thread(target=_run, args=(modules,), name="import-warmup", daemon=True)
+        _thread.start()
+    return _thread
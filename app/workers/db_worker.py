@@ -1,5 +1,4 @@
 from PyQt6.QtCore import QObject, pyqtSignal
-from app.models.usuario import UsuarioModel
 
 class DBWorker(QObject):
     finished = pyqtSignal(bool, str)
@@ -11,6 +10,8 @@ class DBWorker(QObject):
 
     def run(self):
         try:
+            # imported here (worker thread) so PyMySQL is not loaded with the window
+            from app.models.usuario import UsuarioModel
             usuario_model = UsuarioModel()
             ok, msg = usuario_model.crear_usuario(self.user, self.pwd)
             self.finished.emit(ok, msg)
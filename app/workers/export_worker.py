@@ -0,0 +1,157 @@
+import csv
+import io
+import logging
+import os
+from pathlib import Path
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from app.utils.shared import get_db_conn, pdf_canvas
+from app.utils.export_store import BlobUpload, content_type_for, record_export, store_blob
+
+logger = logging.getLogger(__name__)
+
+BATCH_ROWS = 5000
+
+
+class ExportWorker(QObject):
+    """Exports the session history to CSV/PDF off the GUI thread.
+
+    Rows are read straight from ``history`` (append-only, so only the rows
+    present when the export starts are written). CSV is encoded in batches
+    and each batch goes to the file and, in the same pass, to the DB store
+    (``BlobUpload``). ReportLab keeps the document until ``save()``, so the
+    PDF is written to the file first and then streamed from disk to the DB.
+    """
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(bool, str)
+
+    def __init__(self, history, format, filename, user_id=None):
+        super().__init__()
+        self.history = history
+        self.format = format
+        self.filename = Path(filename)
+        self.user_id = user_id
+        self._cancel = False
+
+    def cancel(self):
+        self._cancel = True
+
+    def run(self):
+        total = len(self.history)
+        conn = get_db_conn() if self.user_id else None
+        try:
+            if self.format == 'csv':
+                self._write_csv(total, conn)
+            else:
+                self._write_pdf(total, conn)
+        except _Cancelled:
+            self._remove_partial()
+            self.finished.emit(False, "Exportación cancelada")
+            return
+        except Exception as e:
+            logger.exception("export worker error")
+            self._remove_partial()
+            self.finished.emit(False, f"No se pudo exportar: {e}")
+            return
+        finally:
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+        self.finished.emit(True, str(self.filename))
+
+    def _batches(self, total):
+        for start in range(0, total, BATCH_ROWS):
+            if self._cancel:
+                raise _Cancelled()
+            end = min(start + BATCH_ROWS, total)
+            yield self.history[start:end]
+            self.progress.emit(end, total)
+
+    def _write_csv(self, total, conn):
+        upload = None
+        if conn is not None:
+            upload = BlobUpload(conn, content_type_for('CSV'))
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        try:
+            with open(self.filename, 'wb') as f:
+                writer.writerow(['timestamp', 'led', 'event'])
+                for rows in self._batches(total):
+                    writer.writerows(rows)
+                    data = buf.getvalue().encode('utf-8')
+                    buf.seek(0)
+                    buf.truncate()
+                    f.write(data)
+                    upload = self._upload(upload, data)
+                if buf.tell():
+                    # header only (empty history)
+                    data = buf.getvalue().encode('utf-8')
+                    f.write(data)
+                    upload = self._upload(upload, data)
+        except BaseException:
+            if upload is not None:
+                upload.abort()
+            raise
+        if upload is not None:
+            self._record(conn, 'CSV', upload)
+
+    def _upload(self, upload, data):
+        # a DB failure must not break the file export; drop the DB copy instead
+        if upload is None:
+            return None
+        try:
+            upload.write(data)
+            return upload
+        except Exception:
+            logger.exception("export worker: DB upload failed, keeping only the file")
+            upload.abort()
+            return None
+
+    def _record(self, conn, formato, upload):
+        try:
+            sha = upload.finish()
+            record_export(conn, self.user_id, formato, self.filename.name, sha, upload.size, upload.content_type)
+        except Exception:
+            logger.exception("export worker: could not record export in DB")
+
+    def _write_pdf(self, total, conn):
+        pdfcanvas = pdf_canvas()
+        if pdfcanvas is None:
+            raise RuntimeError("ReportLab no está disponible; no se puede generar PDF.")
+        from reportlab.lib.pagesizes import A4
+        c = pdfcanvas.Canvas(str(self.filename), pagesize=A4)
+        w, h = A4
+        y = h - 40
+        c.setFont('Helvetica', 12)
+        c.drawString(40, y, 'Historial de sesión')
+        y -= 24
+        c.setFont('Helvetica', 9)
+        for rows in self._batches(total):
+            for r in rows:
+                if y < 60:
+                    c.showPage()
+                    y = h - 40
+                    c.setFont('Helvetica', 9)
+                c.drawString(40, y, f"{r[0]} | LED:{r[1]} | {r[2]}"[:200])
+                y -= 14
+        c.save()
+        if conn is not None:
+            try:
+                ctype = content_type_for('PDF')
+                sha, size = store_blob(conn, self.filename, ctype)
+                record_export(conn, self.user_id, 'PDF', self.filename.name, sha, size, ctype)
+            except Exception:
+                logger.exception("export worker: could not store PDF in DB")
+
+    def _remove_partial(self):
+        try:
+            os.remove(self.filename)
+        except OSError:
+            pass
+
+
+class _Cancelled(Exception):
+    pass
@@ -5,6 +5,8 @@ import time
 import re
 import logging
 
+from app.utils.telemetry import telemetry
+
 logger = logging.getLogger(__name__)
 
 try:
@@ -18,10 +20,12 @@ class SerialThread(QThread):
     line_received = pyqtSignal(str)
     connected = pyqtSignal(bool)
 
-    def __init__(self, port, baud=115200):
+    def __init__(self, port, baud=115200, capture_path=None):
         super().__init__()
         self.port = port
         self.baud = baud
+        # optional: record every received line (app.serial.capture)
+        self.capture_path = capture_path
         self._running = True
         self.ser = None
 
@@ -37,17 +41,38 @@ class SerialThread(QThread):
             self.connected.emit(False)
             return
 
+        capture = None
+        if self.capture_path:
+            try:
+                from app.serial.capture import CaptureWriter
+                capture = CaptureWriter(self.capture_path)
+            except Exception:
+                logger.exception("Serial capture disabled: cannot open %s", self.capture_path)
+
         while self._running:
             try:
                 if self.ser.in_waiting:
                     line = self.ser.readline().decode(errors='ignore').strip()
                     if line:
+                        telemetry.mark("serial_lines")
+                        if capture is not None:
+                            try:
+                                capture.write(line)
+                            except Exception:
+                                logger.exception("Serial capture write error; capture stopped")
+                                capture.close()
+                                capture = None
                         self.line_received.emit(line)
                 self.msleep(10)
             except Exception as e:
                 logger.exception("Serial read error")
                 break
 
+        if capture is not None:
+            try:
+                capture.close()
+            except Exception:
+                pass
         try:
             self.ser.close()
         except Exception:
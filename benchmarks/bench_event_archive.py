@@ -0,0 +1,96 @@
+"""Columnar event archive vs a table scan.
+
+Loads the same synthetic events (one every ``--step`` seconds over ``--days``
+days) into a SQLite table (stand-in for MySQL; point ``--db`` at a MySQL URI
+to compare against the real server) and into an ``.evca`` archive, then
+times a range count, a filtered count and a range scan on both.
+
+Run from the project root:
+    python -m benchmarks.bench_event_archive [--days 365] [--step 30]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import Index, create_engine, func, select
+
+from server.event_archive import EventArchive, write_archive
+from server.models import Evento
+from server.serialization import FIELDS
+
+TIPOS = ["LED_ON", "LED_OFF", "SENSOR_BLOQUEADO", "SENSOR_LIBRE"]
+DETALLES = ["LED1", "LED2", "LED3", "SENSOR_IR"]
+
+
+def _rows(days, step):
+    rnd = random.Random(7)
+    base = datetime(2024, 1, 1)
+    n = days * 86400 // step
+    for i in range(n):
+        yield (i + 1, 1, rnd.choice(TIPOS), rnd.choice(DETALLES), "CIRCUITO",
+               f"contador={i}", i, "10.0.0.2", base + timedelta(seconds=i * step))
+
+
+def _time(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return (time.perf_counter() - t0) * 1000, out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--days", type=int, default=365)
+    ap.add_argument("--step", type=int, default=30)
+    ap.add_argument("--db", default=None, help="SQLAlchemy URI (por defecto SQLite temporal)")
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    engine = create_engine(args.db or f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+    table = Evento.__table__
+    table.create(engine, checkfirst=True)
+    Index("idx_fecha_hora", table.c.fecha_hora).create(engine, checkfirst=True)
+    keys = FIELDS[Evento]
+
+    rows = list(_rows(args.days, args.step))
+    with engine.begin() as conn:
+        conn.execute(table.delete())
+        for i in range(0, len(rows), 20000):
+            conn.execute(table.insert(), [dict(zip(keys, r)) for r in rows[i:i + 20000]])
+
+    path = os.path.join(tmp, "eventos.evca")
+    ms, n = _time(lambda: write_archive(path, rows))
+    print(f"rows={n} archive={os.path.getsize(path) / 1e6:.1f} MB written in {ms:.0f} ms")
+
+    desde, hasta = datetime(2024, 3, 1), datetime(2024, 3, 31, 23, 59, 59)
+    fecha = table.c.fecha_hora
+
+    def sql_count():
+        with engine.connect() as c:
+            return c.execute(select(func.count()).where(fecha >= desde, fecha <= hasta)).scalar()
+
+    def sql_filtered():
+        with engine.connect() as c:
+            return c.execute(select(func.count()).where(table.c.detalle == "SENSOR_IR")).scalar()
+
+    def sql_scan():
+        with engine.connect() as c:
+            return sum(1 for _ in c.execute(select(table).where(fecha >= desde, fecha <= hasta).order_by(fecha)))
+
+    with EventArchive(path) as arch:
+        cases = [
+            ("count one month", sql_count, lambda: arch.count(desde, hasta)),
+            ("count detalle=SENSOR_IR", sql_filtered, lambda: arch.count(detalle="SENSOR_IR")),
+            ("scan one month", sql_scan, lambda: sum(1 for _ in arch.iter_rows(desde, hasta))),
+        ]
+        for name, sql_fn, arch_fn in cases:
+            sql_ms, a = _time(sql_fn)
+            arch_ms, b = _time(arch_fn)
+            assert a == b, (name, a, b)
+            print(f"{name:<26} sql={sql_ms:8.1f} ms  archive={arch_ms:8.1f} ms  rows={a}")
+
+
+if __name__ == "__main__":
+    main()
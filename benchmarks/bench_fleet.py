@@ -0,0 +1,133 @@
+"""End-to-end load: a simulated ESP32 fleet against ``server.create_app()``.
+
+Starts the app on a threaded werkzeug server (127.0.0.1, random port) backed
+by a temporary SQLite file, or by ``--db-uri`` (e.g. a local MySQL), runs
+``simulator.Fleet`` against it and reports ingest throughput, web-command
+latency (web request -> board sees it in ``last-event``) and p50/p95/p99
+response times per route.
+
+``--ingest inprocess|redis`` answers board events with 202 and writes them
+through ``server.ingest`` (``redis`` uses ``INGEST_REDIS_URL``, by default the
+in-memory ``fake://``, with a worker thread of this process); the queue is
+drained before ``eventos`` rows are counted.
+
+Run from the project root:
+    python -m benchmarks.bench_fleet [--boards 20] [--duration 20] [--sensor-rate 2] [--db-uri URI]
+                                     [--ingest sync|inprocess|redis] [--json]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import threading
+
+from flask_jwt_extended import create_access_token
+from werkzeug.serving import make_server
+
+from server import ingest, presence
+from server.app import create_app
+from server.config import Config
+from server.extensions import db
+from server.ingest.worker import Worker
+from server.models import Evento, Usuario
+from simulator.__main__ import add_fleet_args, fleet_from_args
+
+
+def _config(db_uri, ingest_mode):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = db_uri
+        INGEST_MODE = ingest_mode
+        INGEST_REDIS_URL = os.getenv("INGEST_REDIS_URL", "fake://")
+        # SQLite serializes writers; wait for the lock instead of failing
+        SQLALCHEMY_ENGINE_OPTIONS = {"connect_args": {"timeout": 30}} if db_uri.startswith("sqlite") else {}
+        RETENTION_INTERVAL_HOURS = 0
+        SLOW_REQUEST_MS = 60000
+        SLOW_QUERY_MS = 60000
+        # simulated boards have no dispositivos row; register them so presence writes are measured
+        PRESENCE_AUTO_REGISTER = True
+    return BenchConfig
+
+
+def _print(report):
+    ingest, cmd = report["ingest"], report["commands"]
+    print(f"boards={report['boards']} seconds={report['seconds']} client={report['backend']} ingest={report['ingest_mode']}")
+    print(f"ingest: {ingest['events']} events, {ingest['per_s']} events/s (rows in eventos: {report['rows']})")
+    lat = cmd["latency"]
+    print(f"commands: {cmd['issued']} issued, {cmd['deliveries']}/{cmd['expected']} board deliveries", end="")
+    if lat["n"]:
+        print(f", latency p50={lat['p50_ms']} p95={lat['p95_ms']} p99={lat['p99_ms']} max={lat['max_ms']} ms")
+    else:
+        print()
+    print(f"{'route':<16} {'n':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}  status")
+    for route, s in report["routes"].items():
+        print(f"{route:<16} {s['n']:>7} {s['p50_ms']:>8} {s['p95_ms']:>8} {s['p99_ms']:>8} {s['max_ms']:>8}  {s['status']}")
+    if report["errors"]:
+        print("errors:", report["errors"])
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--db-uri", help="SQLAlchemy URI (default: temporary SQLite file)")
+    ap.add_argument("--ingest", choices=ingest.MODES, default="sync", help="INGEST_MODE of the server")
+    ap.add_argument("--json", action="store_true", help="print the full report as JSON")
+    add_fleet_args(ap)
+    ap.set_defaults(boards=20, duration=20.0, sensor_rate=2.0)
+    args = ap.parse_args()
+
+    tmp = None
+    db_uri = args.db_uri
+    if not db_uri:
+        fd, tmp = tempfile.mkstemp(suffix=".sqlite")
+        os.close(fd)
+        db_uri = f"sqlite:///{tmp}"
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    app = create_app(_config(db_uri, args.ingest))
+    with app.app_context():
+        db.create_all()
+        if db.session.get(Usuario, 1) is None:
+            db.session.add(Usuario(id_usuario=1, usuario="bench", contrasena="x"))
+            db.session.commit()
+        start_rows = db.session.query(Evento).count()
+        token = create_access_token(identity="1")
+
+    worker = app.extensions.get("ingest_worker")
+    if worker is None and args.ingest == "redis":
+        # stands in for a `python -m server.ingest.worker` process
+        worker = Worker(app, ingest.get_broker(app), batch_size=app.config["INGEST_BATCH_SIZE"],
+                        max_wait=app.config["INGEST_MAX_WAIT_SECONDS"])
+        threading.Thread(target=worker.run, name="ingest-worker", daemon=True).start()
+
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        fleet = fleet_from_args(args, f"http://127.0.0.1:{server.server_port}", token)
+        report = asyncio.run(fleet.run(args.duration))
+    finally:
+        server.shutdown()
+        thread.join()
+    report["ingest_mode"] = args.ingest
+    if worker is not None:
+        worker.stop()
+        worker.drain()
+        report["ingest_worker"] = dict(worker.stats)
+
+    with app.app_context():
+        # write the last heartbeats now; the exit-time flush would find the DB gone
+        presence.tracker.flush()
+        report["rows"] = db.session.query(Evento).count() - start_rows
+        db.engine.dispose()
+    if tmp:
+        os.remove(tmp)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        _print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Per-request overhead of ``server.instrumentation``.
+
+Runs the same request mix (ESP32 ingest, polling, state, command list)
+through the Flask test client against two apps, one with
+``METRICS_ENABLED = False`` and one with it on, and prints the time per
+request of each endpoint. The SQLAlchemy listeners are global, so they are
+removed while the "off" app runs. Ends with a sample of ``/metrics``.
+
+Run from the project root:
+    python -m benchmarks.bench_instrumentation [--requests 2000] [--repeat 3] [--commands 200]
+"""
+import argparse
+import time
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from server import instrumentation
+from server.app import create_app
+from server.config import Config
+from server.extensions import db
+from server.models import Command, Usuario
+
+
+class BenchConfig(Config):
+    SQLALCHEMY_DATABASE_URI = "sqlite://"
+    PRESENCE_FLUSH_SECONDS = 0
+    RETENTION_INTERVAL_HOURS = 0
+    SLOW_QUERY_MS = 10000
+    SLOW_REQUEST_MS = 10000
+
+
+class OffConfig(BenchConfig):
+    METRICS_ENABLED = False
+
+
+def _setup(config, commands):
+    app = create_app(config)
+    with app.app_context():
+        db.create_all()
+        db.session.add(Usuario(id_usuario=1, usuario="bench", contrasena="x"))
+        db.session.execute(db.insert(Command), [
+            {"id_usuario": 1, "device_id": f"esp32-{i % 4}", "tipo": "LED", "detalle": f"LED{i % 4 + 1}",
+             "accion": "ON" if i % 2 else "OFF"}
+            for i in range(commands)
+        ])
+        db.session.commit()
+        token = create_access_token(identity="1")
+    return app, {"Authorization": f"Bearer {token}"}
+
+
+def _cases(auth):
+    return [
+        ("POST /api/esp32/data", "post", "/api/esp32/data",
+         {"json": {"tipo_evento": "SENSOR_BLOQUEADO", "detalle": "SENSOR_IR", "valor": "contador=1"}}),
+        ("GET /api/esp32/get-data", "get", "/api/esp32/get-data", {}),
+        ("GET /api/state", "get", "/api/state", {}),
+        ("GET /api/commands", "get", "/api/commands", {"headers": auth}),
+    ]
+
+
+def _time(client, method, url, kwargs, requests):
+    call = getattr(client, method)
+    t0 = time.perf_counter()
+    for _ in range(requests):
+        call(url, **kwargs)
+    return (time.perf_counter() - t0) / requests
+
+
+def _listeners(on):
+    hooks = (("before_cursor_execute", instrumentation._before_cursor_execute),
+             ("after_cursor_execute", instrumentation._after_cursor_execute))
+    for name, fn in hooks:
+        if on and not event.contains(Engine, name, fn):
+            event.listen(Engine, name, fn)
+        elif not on and event.contains(Engine, name, fn):
+            event.remove(Engine, name, fn)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=2000)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--commands", type=int, default=200)
+    args = ap.parse_args()
+
+    on_app, on_auth = _setup(BenchConfig, args.commands)
+    off_app, off_auth = _setup(OffConfig, args.commands)
+
+    runs = ((False, off_app.test_client(), off_auth), (True, on_app.test_client(), on_auth))
+    print(f"requests={args.requests} x{args.repeat} commands={args.commands}")
+    print(f"{'endpoint':<26} {'off us':>9} {'on us':>9} {'overhead':>9}")
+    for name, method, url, kwargs in _cases(None):
+        best = {}
+        # alternate off/on rounds so drift (growing eventos table, CPU clock) hits both alike
+        for _ in range(args.repeat + 1):
+            for on, client, auth in runs:
+                _listeners(on)
+                if "headers" in kwargs:
+                    kwargs = dict(kwargs, headers=auth)
+                dt = _time(client, method, url, kwargs, args.requests)
+                best[on] = min(best.get(on, float("inf")), dt)
+        a, b = best[False] * 1e6, best[True] * 1e6
+        print(f"{name:<26} {a:9.1f} {b:9.1f} {b - a:+8.1f}us ({(b / a - 1) * 100:+.1f}%)")
+
+    body = on_app.test_client().get("/metrics").get_data(as_text=True)
+    print()
+    print("\n".join(l for l in body.splitlines() if l.startswith(("db_", "http_requests_total"))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Event value normalization: original function vs ``server.normalize``.
+
+Times the original ``_normalize_val`` (kept as ``reference`` in
+``tests/test_normalize.py``, which also checks both give the same results)
+against ``normalize_valor`` / ``normalize_many`` on a realistic ingest mix.
+
+Run from the project root:
+    python -m benchmarks.bench_normalize [--rows 200000] [--seed 1]
+"""
+import argparse
+import random
+import time
+
+from server.normalize import normalize_valor, normalize_many
+from tests.test_normalize import reference
+
+
+def _ingest_mix(rows, seed):
+    rnd = random.Random(seed)
+    pool = ["ON", "OFF", "1", "0", 1, 0, "true", "false", "RESET"]
+    return [f"contador={i}" if rnd.random() < 0.4 else rnd.choice(pool) for i in range(rows)]
+
+
+def _time(fn, values, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(values)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=200000)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    values = _ingest_mix(args.rows, args.seed)
+    old = _time(lambda vs: [reference(v) for v in vs], values)
+    new = _time(lambda vs: [normalize_valor(v) for v in vs], values)
+    bulk = _time(normalize_many, values)
+    for name, t in (("original", old), ("normalize_valor", new), ("normalize_many", bulk)):
+        print(f"{name:<16} {t * 1000:8.1f} ms  {t / args.rows * 1e9:7.0f} ns/valor  x{old / t:4.1f}")
+
+
+if __name__ == "__main__":
+    main()
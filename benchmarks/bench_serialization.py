@@ -0,0 +1,91 @@
+"""Per-row serialization cost of list responses.
+
+Compares the old path (ORM objects + ``to_dict()`` + ``jsonify``) with the
+column-select path in ``server.serialization`` for a 10k-row response.
+
+Run from the project root:
+    python -m benchmarks.bench_serialization [--rows 10000] [--repeat 5]
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from flask import jsonify
+
+from server.app import create_app
+from server.config import Config
+from server.extensions import db
+from server.models import Evento, Usuario
+from server import serialization
+
+
+class BenchConfig(Config):
+    SQLALCHEMY_DATABASE_URI = "sqlite://"
+
+
+def _seed(n):
+    db.session.add(Usuario(id_usuario=1, usuario="bench", contrasena="x"))
+    base = datetime(2025, 1, 1)
+    db.session.execute(db.insert(Evento), [
+        {
+            "id_usuario": 1,
+            "tipo_evento": "SENSOR_BLOQUEADO" if i % 2 else "SENSOR_LIBRE",
+            "detalle": "SENSOR_IR",
+            "origen": "CIRCUITO",
+            "valor": f"contador={i}",
+            "origen_ip": "10.0.0.2",
+            "fecha_hora": base + timedelta(seconds=i),
+        }
+        for i in range(n)
+    ])
+    db.session.commit()
+
+
+def _best(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        db.session.expunge_all()
+        t0 = time.perf_counter()
+        size = fn()
+        dt = time.perf_counter() - t0
+        best = dt if best is None or dt < best else best
+    return best, size
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=10000)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+        _seed(args.rows)
+
+        def orm_to_dict():
+            rows = Evento.query.order_by(Evento.fecha_hora.desc()).all()
+            return len(jsonify([r.to_dict() for r in rows]).get_data())
+
+        def tuples(fmt):
+            def run():
+                rows = serialization.fetch_rows(
+                    serialization.select_columns(Evento).order_by(Evento.fecha_hora.desc())
+                )
+                return len(serialization.encode_rows(Evento, rows, fmt=fmt))
+            return run
+
+        cases = [
+            ("orm + to_dict + jsonify", orm_to_dict),
+            ("select columns, records", tuples("records")),
+            ("select columns, columnar", tuples("columnar")),
+        ]
+        with app.test_request_context():
+            print(f"rows={args.rows} orjson={'yes' if serialization.ORJSON_AVAILABLE else 'no'}")
+            for name, fn in cases:
+                dt, size = _best(fn, args.repeat)
+                print(f"{name:<28} total={dt * 1000:8.1f} ms  per_row={dt / args.rows * 1e6:6.2f} us  bytes={size}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Desktop cold start: what ``import main`` costs before the login window.
+
+Runs ``python -X importtime -c "import main"`` in fresh interpreters (the
+first run only warms the .pyc cache and is discarded) and reports:
+  - cumulative import time of ``main`` (median / min over the runs)
+  - the modules with the largest self time
+  - any of the deferred packages (argon2, PyMySQL, reportlab, pyserial) that
+    were imported anyway; those belong to ``app.utils.warmup``, not startup
+
+With ``--window`` it also times process start -> login window shown on the
+offscreen platform. Exits with status 1 when the median is over
+``--budget-ms`` or a deferred package was imported, so it can gate CI.
+
+Run from the project root:
+    python -m benchmarks.bench_startup [--runs 5] [--budget-ms 400] [--top 15] [--window]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+DEFERRED = ("argon2", "pymysql", "reportlab", "serial")
+
+SHOW_LOGIN = """
+import os, time
+t0 = time.perf_counter()
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+import main
+from PyQt6.QtWidgets import QApplication
+app = QApplication([])
+w = main.LoginController()
+w.show()
+app.processEvents()
+print(f"{(time.perf_counter() - t0) * 1000:.1f}")
+"""
+
+
+def parse_importtime(stderr):
+    """``-X importtime`` output -> ``[(module, self_us, cumulative_us)]``."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        try:
+            self_us, cum_us, name = line[len("import time:"):].split("|", 2)
+            rows.append((name.strip(), int(self_us), int(cum_us)))
+        except ValueError:
+            continue
+    return rows
+
+
+def import_main():
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                          cwd=ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        tail = proc.stderr.strip().splitlines()[-1:] or ["?"]
+        raise SystemExit(f"import main falló: {tail[0]}")
+    return parse_importtime(proc.stderr)
+
+
+def show_login():
+    proc = subprocess.run([sys.executable, "-c", SHOW_LOGIN], cwd=ROOT, capture_output=True, text=True,
+                          env={**os.environ, "QT_QPA_PLATFORM": "offscreen"})
+    if proc.returncode != 0:
+        tail = proc.stderr.strip().splitlines()[-1:] or ["?"]
+        raise SystemExit(f"no se pudo mostrar el login: {tail[0]}")
+    return float(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--budget-ms", type=float, default=400.0, help="máximo para la mediana de import main")
+    ap.add_argument("--top", type=int, default=15, help="módulos más lentos a listar")
+    ap.add_argument("--window", action="store_true", help="medir también hasta mostrar el login (offscreen)")
+    args = ap.parse_args()
+
+    import_main()  # .pyc warm-up
+    totals = []
+    rows = []
+    for _ in range(args.runs):
+        rows = import_main()
+        totals.append(next((cum for name, _, cum in rows if name == "main"), 0) / 1000)
+    median = statistics.median(totals)
+    print(f"import main: mediana {median:.1f} ms, mínimo {min(totals):.1f} ms ({args.runs} ejecuciones)")
+
+    print("\nmódulos más lentos (self, última ejecución):")
+    for name, self_us, cum_us in sorted(rows, key=lambda r: r[1], reverse=True)[:args.top]:
+        print(f"  {self_us / 1000:8.2f} ms  (acum. {cum_us / 1000:8.2f} ms)  {name}")
+
+    loaded = sorted({name for name, _, _ in rows if name.split(".")[0] in DEFERRED})
+    if loaded:
+        print("\npaquetes diferidos importados al arrancar:")
+        for name in loaded:
+            print(f"  {name}")
+
+    if args.window:
+        shown = [show_login() for _ in range(args.runs)]
+        print(f"\ninicio -> login visible: mediana {statistics.median(shown):.1f} ms")
+
+    ok = median <= args.budget_ms and not loaded
+    print(f"\npresupuesto {args.budget_ms:.0f} ms: {'OK' if ok else 'EXCEDIDO'}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -62,6 +62,13 @@ const char *baseUrl = "http://10.92.129.180:5000"; // IP actual
 bool wifiConnected = false;
 unsigned long lastWiFiCheck = 0;
 
+// Identificador de la placa para /api/esp32/* (el servidor solo registra
+// presencia de las peticiones que lo envían)
+String deviceId()
+{
+  return String("esp32-") + WiFi.macAddress();
+}
+
 // TECLADO MATRICIAL
 const byte ROWS = 4;
 const byte COLS = 4;
@@ -209,6 +216,7 @@ void fetchAndShowLastEvents()
   HTTPClient http;
   String url = String(baseUrl) + "/api/esp32/get-data";
   http.begin(url);
+  http.addHeader("X-Device-Id", deviceId()); // presencia en el servidor
   int httpCode = http.GET();
   if (httpCode != HTTP_CODE_OK)
   {
@@ -398,6 +406,7 @@ void checkWiFiStatus()
     serializeJson(jsonDoc, jsonString);
 
     http.begin(String(baseUrl) + "/api/esp32/data");
+    http.addHeader("X-Device-Id", deviceId()); // presencia en el servidor
     http.addHeader("Content-Type", "application/json");
     int httpResponseCode = http.POST(jsonString);
 
@@ -544,6 +553,7 @@ void updateBlynkSensor() {
   HTTPClient http;
   String url = String(baseUrl) + "/api/esp32/last-event";
   http.begin(url);
+  http.addHeader("X-Device-Id", deviceId()); // presencia en el servidor
   int httpCode = http.GET();
   if (httpCode == HTTP_CODE_OK)
   {
@@ -50,14 +50,36 @@ CREATE TABLE `eventos` (
   `origen` enum('APP','WEB','CIRCUITO') NOT NULL,
   `origen_ip` varchar(45) DEFAULT NULL,
   `valor` varchar(50) NOT NULL,
+  `contador` int(11) DEFAULT NULL,
   `fecha_hora` timestamp NOT NULL DEFAULT current_timestamp(),
-  PRIMARY KEY (`id_evento`),
+  PRIMARY KEY (`id_evento`, `fecha_hora`),
   KEY `id_usuario` (`id_usuario`),
   KEY `idx_usuario_fecha` (`id_usuario`, `fecha_hora`),
-  CONSTRAINT `fk_eventos_usuario` FOREIGN KEY (`id_usuario`) 
-    REFERENCES `usuarios` (`id_usuario`) 
-    ON DELETE CASCADE ON UPDATE CASCADE
-) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+  KEY `idx_fecha_hora` (`fecha_hora`),
+  KEY `idx_fecha_contador` (`fecha_hora`, `contador`),
+  KEY `idx_detalle_tipo_fecha` (`detalle`, `tipo_evento`, `fecha_hora`)
+  -- sin FK a usuarios: InnoDB no admite claves foráneas en tablas particionadas
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci
+-- particiones mensuales; server/retention.py crea las futuras y archiva/elimina las antiguas
+PARTITION BY RANGE (UNIX_TIMESTAMP(`fecha_hora`)) (
+  PARTITION p202509 VALUES LESS THAN (UNIX_TIMESTAMP('2025-10-01 00:00:00')),
+  PARTITION p202510 VALUES LESS THAN (UNIX_TIMESTAMP('2025-11-01 00:00:00')),
+  PARTITION p202511 VALUES LESS THAN (UNIX_TIMESTAMP('2025-12-01 00:00:00')),
+  PARTITION p202512 VALUES LESS THAN (UNIX_TIMESTAMP('2026-01-01 00:00:00')),
+  PARTITION p202601 VALUES LESS THAN (UNIX_TIMESTAMP('2026-02-01 00:00:00')),
+  PARTITION p202602 VALUES LESS THAN (UNIX_TIMESTAMP('2026-03-01 00:00:00')),
+  PARTITION p202603 VALUES LESS THAN (UNIX_TIMESTAMP('2026-04-01 00:00:00')),
+  PARTITION p202604 VALUES LESS THAN (UNIX_TIMESTAMP('2026-05-01 00:00:00')),
+  PARTITION p202605 VALUES LESS THAN (UNIX_TIMESTAMP('2026-06-01 00:00:00')),
+  PARTITION p202606 VALUES LESS THAN (UNIX_TIMESTAMP('2026-07-01 00:00:00')),
+  PARTITION p202607 VALUES LESS THAN (UNIX_TIMESTAMP('2026-08-01 00:00:00')),
+  PARTITION p202608 VALUES LESS THAN (UNIX_TIMESTAMP('2026-09-01 00:00:00')),
+  PARTITION p202609 VALUES LESS THAN (UNIX_TIMESTAMP('2026-10-01 00:00:00')),
+  PARTITION p202610 VALUES LESS THAN (UNIX_TIMESTAMP('2026-11-01 00:00:00')),
+  PARTITION p202611 VALUES LESS THAN (UNIX_TIMESTAMP('2026-12-01 00:00:00')),
+  PARTITION p202612 VALUES LESS THAN (UNIX_TIMESTAMP('2027-01-01 00:00:00')),
+  PARTITION pmax VALUES LESS THAN MAXVALUE
+);
 
 -- --------------------------------------------------------
 -- TABLA: historialexportado
@@ -67,13 +89,40 @@ CREATE TABLE `historialexportado` (
   `id_usuario` int(11) NOT NULL,
   `formato` enum('CSV','PDF') NOT NULL,
   `fecha_exportacion` timestamp NOT NULL DEFAULT current_timestamp(),
+  `filename` varchar(255) DEFAULT NULL,
+  `content_type` varchar(100) DEFAULT NULL,
+  `size_bytes` bigint(20) DEFAULT NULL,
+  `sha256` char(64) DEFAULT NULL,
   PRIMARY KEY (`id_exportacion`),
   KEY `id_usuario` (`id_usuario`),
+  KEY `idx_hist_sha256` (`sha256`),
+  KEY `idx_hist_fecha` (`fecha_exportacion`, `id_exportacion`),
+  KEY `idx_hist_formato_fecha` (`formato`, `fecha_exportacion`, `id_exportacion`),
   CONSTRAINT `fk_historial_usuario` FOREIGN KEY (`id_usuario`) 
     REFERENCES `usuarios` (`id_usuario`) 
     ON DELETE CASCADE ON UPDATE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
 
+-- --------------------------------------------------------
+-- TABLAS: export_blobs / export_blob_chunks
+-- contenido de los archivos exportados, una vez por SHA-256
+-- --------------------------------------------------------
+CREATE TABLE `export_blobs` (
+  `sha256` char(64) NOT NULL,
+  `size_bytes` bigint(20) NOT NULL,
+  `content_type` varchar(100) NOT NULL,
+  `chunks` int(11) NOT NULL,
+  `fecha_creacion` timestamp NOT NULL DEFAULT current_timestamp(),
+  PRIMARY KEY (`sha256`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+
+CREATE TABLE `export_blob_chunks` (
+  `sha256` char(64) NOT NULL,
+  `seq` int(11) NOT NULL,
+  `data` mediumblob NOT NULL,
+  PRIMARY KEY (`sha256`, `seq`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+
 -- --------------------------------------------------------
 -- TABLA: dispositivos
 -- --------------------------------------------------------
@@ -110,13 +159,14 @@ CREATE TABLE IF NOT EXISTS `commands` (
 -- --------------------------------------------------------
 CREATE TABLE IF NOT EXISTS `estados_actuales` (
   `id_estado` int(11) NOT NULL AUTO_INCREMENT,
-  `device_id` varchar(100) DEFAULT NULL,
+  `device_id` varchar(100) NOT NULL DEFAULT 'default',
   `detalle` varchar(50) NOT NULL,
   `valor` varchar(20) NOT NULL,
   `fecha_actualizacion` timestamp NOT NULL 
       DEFAULT current_timestamp() 
       ON UPDATE current_timestamp(),
-  PRIMARY KEY (`id_estado`)
+  PRIMARY KEY (`id_estado`),
+  UNIQUE KEY `uq_estado_device_detalle` (`device_id`, `detalle`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
 
 COMMIT;
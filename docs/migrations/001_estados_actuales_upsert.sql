@@ -0,0 +1,32 @@
+-- --------------------------------------------------------
+-- MIGRACIÓN 001: estados_actuales como caché del estado actual
+-- Una fila por (device_id, detalle), actualizada con upsert en cada ingesta
+-- (server/state.py). Ejecutar una sola vez sobre db_app.
+-- --------------------------------------------------------
+USE `db_app`;
+
+UPDATE `estados_actuales` SET `device_id` = 'default' WHERE `device_id` IS NULL;
+
+-- conservar solo la fila más reciente por (device_id, detalle)
+DELETE e1 FROM `estados_actuales` e1
+  JOIN `estados_actuales` e2
+    ON e1.`device_id` = e2.`device_id`
+   AND e1.`detalle` = e2.`detalle`
+   AND e1.`id_estado` < e2.`id_estado`;
+
+ALTER TABLE `estados_actuales`
+  MODIFY `device_id` varchar(100) NOT NULL DEFAULT 'default',
+  ADD UNIQUE KEY `uq_estado_device_detalle` (`device_id`, `detalle`);
+
+-- sembrar el estado inicial a partir del último evento de cada LED / sensor
+INSERT INTO `estados_actuales` (`device_id`, `detalle`, `valor`, `fecha_actualizacion`)
+SELECT 'default', e.`detalle`,
+       CASE WHEN e.`tipo_evento` IN ('LED_ON', 'SENSOR_BLOQUEADO') THEN 'ON' ELSE 'OFF' END,
+       e.`fecha_hora`
+  FROM `eventos` e
+  JOIN (SELECT `detalle`, MAX(`id_evento`) AS `id_evento`
+          FROM `eventos`
+         WHERE `detalle` IN ('LED1', 'LED2', 'LED3', 'LED4', 'SENSOR_IR')
+         GROUP BY `detalle`) ult
+    ON ult.`id_evento` = e.`id_evento`
+ON DUPLICATE KEY UPDATE `valor` = VALUES(`valor`), `fecha_actualizacion` = VALUES(`fecha_actualizacion`);
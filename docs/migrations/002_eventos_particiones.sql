@@ -0,0 +1,38 @@
+-- --------------------------------------------------------
+-- MIGRACIÓN 002: particionado mensual de `eventos` por `fecha_hora`
+-- Requisitos de MySQL/MariaDB para tablas particionadas:
+--   * la columna de partición debe formar parte de la clave primaria
+--   * InnoDB no admite claves foráneas en tablas particionadas
+-- El job de retención (server/retention.py) crea las particiones futuras,
+-- archiva las cerradas y las elimina. Ejecutar una sola vez sobre db_app.
+-- --------------------------------------------------------
+USE `db_app`;
+
+ALTER TABLE `eventos` DROP FOREIGN KEY `fk_eventos_usuario`;
+
+ALTER TABLE `eventos`
+  DROP PRIMARY KEY,
+  ADD PRIMARY KEY (`id_evento`, `fecha_hora`),
+  ADD KEY `idx_fecha_hora` (`fecha_hora`);
+
+-- p202509 contiene también todo el historial anterior a octubre de 2025
+ALTER TABLE `eventos`
+PARTITION BY RANGE (UNIX_TIMESTAMP(`fecha_hora`)) (
+  PARTITION p202509 VALUES LESS THAN (UNIX_TIMESTAMP('2025-10-01 00:00:00')),
+  PARTITION p202510 VALUES LESS THAN (UNIX_TIMESTAMP('2025-11-01 00:00:00')),
+  PARTITION p202511 VALUES LESS THAN (UNIX_TIMESTAMP('2025-12-01 00:00:00')),
+  PARTITION p202512 VALUES LESS THAN (UNIX_TIMESTAMP('2026-01-01 00:00:00')),
+  PARTITION p202601 VALUES LESS THAN (UNIX_TIMESTAMP('2026-02-01 00:00:00')),
+  PARTITION p202602 VALUES LESS THAN (UNIX_TIMESTAMP('2026-03-01 00:00:00')),
+  PARTITION p202603 VALUES LESS THAN (UNIX_TIMESTAMP('2026-04-01 00:00:00')),
+  PARTITION p202604 VALUES LESS THAN (UNIX_TIMESTAMP('2026-05-01 00:00:00')),
+  PARTITION p202605 VALUES LESS THAN (UNIX_TIMESTAMP('2026-06-01 00:00:00')),
+  PARTITION p202606 VALUES LESS THAN (UNIX_TIMESTAMP('2026-07-01 00:00:00')),
+  PARTITION p202607 VALUES LESS THAN (UNIX_TIMESTAMP('2026-08-01 00:00:00')),
+  PARTITION p202608 VALUES LESS THAN (UNIX_TIMESTAMP('2026-09-01 00:00:00')),
+  PARTITION p202609 VALUES LESS THAN (UNIX_TIMESTAMP('2026-10-01 00:00:00')),
+  PARTITION p202610 VALUES LESS THAN (UNIX_TIMESTAMP('2026-11-01 00:00:00')),
+  PARTITION p202611 VALUES LESS THAN (UNIX_TIMESTAMP('2026-12-01 00:00:00')),
+  PARTITION p202612 VALUES LESS THAN (UNIX_TIMESTAMP('2027-01-01 00:00:00')),
+  PARTITION pmax VALUES LESS THAN MAXVALUE
+);
@@ -0,0 +1,37 @@
+-- --------------------------------------------------------
+-- MIGRACIÓN 003: almacén de archivos exportados direccionado por contenido
+-- Los bytes se guardan una sola vez por SHA-256 (export_blobs + export_blob_chunks)
+-- y historialexportado guarda los metadatos y la referencia (app/utils/export_store.py).
+-- Ejecutar una sola vez sobre db_app.
+-- --------------------------------------------------------
+USE `db_app`;
+
+CREATE TABLE IF NOT EXISTS `export_blobs` (
+  `sha256` char(64) NOT NULL,
+  `size_bytes` bigint(20) NOT NULL,
+  `content_type` varchar(100) NOT NULL,
+  `chunks` int(11) NOT NULL,
+  `fecha_creacion` timestamp NOT NULL DEFAULT current_timestamp(),
+  PRIMARY KEY (`sha256`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+
+-- trozos de 1 MiB; sha256 = 'tmp-…' mientras la subida está en curso
+CREATE TABLE IF NOT EXISTS `export_blob_chunks` (
+  `sha256` char(64) NOT NULL,
+  `seq` int(11) NOT NULL,
+  `data` mediumblob NOT NULL,
+  PRIMARY KEY (`sha256`, `seq`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+
+ALTER TABLE `historialexportado`
+  ADD COLUMN `filename` varchar(255) DEFAULT NULL,
+  ADD COLUMN `content_type` varchar(100) DEFAULT NULL,
+  ADD COLUMN `size_bytes` bigint(20) DEFAULT NULL,
+  ADD COLUMN `sha256` char(64) DEFAULT NULL,
+  ADD KEY `idx_hist_sha256` (`sha256`);
+
+-- Las exportaciones guardadas antes de esta migración tienen su archivo en
+-- base64 en `historialexportado.contenido`. Después de ejecutar este script:
+--   python -m app.utils.export_store --backfill
+-- copia cada una al almacén y rellena sha256/size_bytes/content_type (se
+-- puede repetir; `contenido` no se modifica).
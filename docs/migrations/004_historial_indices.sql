@@ -0,0 +1,11 @@
+-- --------------------------------------------------------
+-- MIGRACIÓN 004: índices para listar historialexportado por fecha
+-- El diálogo "Ver archivos exportados" pagina en SQL (más recientes primero)
+-- sin leer contenido; estos índices evitan ordenar la tabla completa.
+-- Ejecutar una sola vez sobre db_app.
+-- --------------------------------------------------------
+USE `db_app`;
+
+ALTER TABLE `historialexportado`
+  ADD KEY `idx_hist_fecha` (`fecha_exportacion`, `id_exportacion`),
+  ADD KEY `idx_hist_formato_fecha` (`formato`, `fecha_exportacion`, `id_exportacion`);
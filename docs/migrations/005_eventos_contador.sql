@@ -0,0 +1,35 @@
+-- --------------------------------------------------------
+-- MIGRACIÓN 005: columna numérica `contador` en `eventos`
+-- Las lecturas del contador se guardaban solo como texto en `valor`
+-- ('contador=N' en SENSOR_BLOQUEADO, 'N' en CONTADOR_CAMBIO). La app de
+-- escritorio y el servidor llenan ahora `contador` al insertar; este script
+-- rellena el histórico. Ejecutar una sola vez sobre db_app.
+-- --------------------------------------------------------
+USE `db_app`;
+
+ALTER TABLE `eventos`
+  ADD COLUMN `contador` int(11) DEFAULT NULL AFTER `valor`,
+  ADD KEY `idx_fecha_contador` (`fecha_hora`, `contador`);
+
+-- 'contador=N' (activaciones del sensor registradas por la app)
+UPDATE `eventos`
+   SET `contador` = CAST(SUBSTRING(`valor`, 10) AS UNSIGNED)
+ WHERE `valor` LIKE 'contador=%'
+   AND SUBSTRING(`valor`, 10) REGEXP '^[0-9]+$';
+
+-- CONTADOR_CAMBIO guarda el número directamente (o 'contador=N', ya cubierto)
+UPDATE `eventos`
+   SET `contador` = CAST(`valor` AS UNSIGNED)
+ WHERE `tipo_evento` = 'CONTADOR_CAMBIO' AND `detalle` = 'CONTADOR'
+   AND `valor` REGEXP '^[0-9]+$';
+
+UPDATE `eventos`
+   SET `contador` = 0
+ WHERE `tipo_evento` = 'RESET_CONTADOR' AND `detalle` = 'CONTADOR';
+
+-- Ejemplo: máximo del contador por turno (06-14, 14-22, 22-06) en un día
+-- SELECT FLOOR(((HOUR(fecha_hora) + 2) % 24) / 8) AS turno, MAX(contador)
+--   FROM eventos
+--  WHERE fecha_hora >= '2026-01-15 06:00:00' AND fecha_hora < '2026-01-16 06:00:00'
+--    AND contador IS NOT NULL
+--  GROUP BY turno;
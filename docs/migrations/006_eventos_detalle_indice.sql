@@ -0,0 +1,11 @@
+-- --------------------------------------------------------
+-- MIGRACIÓN 006: índice `(detalle, tipo_evento, fecha_hora)` en `eventos`
+-- Las series de /charts y /api/series leen el estado de cada LED y del
+-- sensor al inicio del rango con una sola consulta agrupada (último evento
+-- de cada detalle y tipo anterior a `desde`); este índice la resuelve sin
+-- recorrer el histórico. Ejecutar una sola vez sobre db_app.
+-- --------------------------------------------------------
+USE `db_app`;
+
+ALTER TABLE `eventos`
+  ADD KEY `idx_detalle_tipo_fecha` (`detalle`, `tipo_evento`, `fecha_hora`);
@@ -1,6 +1,7 @@
 import sys
 import os
 from PyQt6.QtWidgets import QApplication
+from PyQt6.QtCore import QTimer
 
 ROOT = os.path.dirname(os.path.abspath(__file__))
 if ROOT not in sys.path:
@@ -16,6 +17,11 @@ def main():
     login_window = LoginController()
     login_window.show()
 
+    # Precargamos en segundo plano (BD, hashers, ventana principal) una vez
+    # que el bucle de eventos pintó el login
+    from app.utils import warmup
+    QTimer.singleShot(0, warmup.start)
+
     # Ejecutamos la app
     sys.exit(app.exec())
 
@@ -6,12 +6,17 @@ from .routes.esp32 import bp as esp32_bp
 from .routes.events import bp as events_bp
 from .routes.actuador import bp as actuador_bp
 from .routes.export import bp as export_bp
+from .routes.state import bp as state_bp
+from .routes.devices import bp as devices_bp
+from .routes.charts import bp as charts_bp
+from .routes.series import bp as series_bp
+from . import presence, retention, instrumentation, ingest
 from flask_cors import CORS
 import os
 
-def create_app():
+def create_app(config_object=Config):
     app = Flask(__name__, static_folder="static_frontend", static_url_path="/")
-    app.config.from_object(Config)
+    app.config.from_object(config_object)
 
     cors_origins = app.config.get("CORS_ORIGINS", "*")
     if isinstance(cors_origins, str) and cors_origins != "*":
@@ -21,6 +26,7 @@ def create_app():
     CORS(app, origins=origins)
 
     db.init_app(app)
+    instrumentation.init_app(app)
     migrate.init_app(app, db)
     jwt.init_app(app)
 
@@ -29,6 +35,14 @@ def create_app():
     app.register_blueprint(events_bp)
     app.register_blueprint(actuador_bp)
     app.register_blueprint(export_bp)
+    app.register_blueprint(state_bp)
+    app.register_blueprint(devices_bp)
+    app.register_blueprint(charts_bp)
+    app.register_blueprint(series_bp)
+
+    presence.init_app(app)
+    retention.init_app(app)
+    ingest.init_app(app)
 
     @app.route("/", defaults={"path": ""})
     @app.route("/<path:path>")
@@ -0,0 +1,70 @@
+"""Dependency-free SVG line charts for the ``/charts`` blueprint."""
+from datetime import datetime, timedelta
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+_EPOCH = datetime(1970, 1, 1)
+
+MARGIN = {"left": 48, "right": 12, "top": 28, "bottom": 28}
+
+
+def _fmt_time(us, span_us):
+    ts = _EPOCH + timedelta(microseconds=int(us))
+    if span_us <= 2 * 86400 * 1000000:
+        return ts.strftime("%H:%M")
+    return ts.strftime("%d/%m")
+
+
+def _fmt_value(v):
+    return f"{v:.0f}" if float(v).is_integer() else f"{v:.2f}"
+
+
+def render_svg(t, y, title, width=600, height=240, step=True, color="#d62020", t0=None, t1=None):
+    """Render ``(t, y)`` (µs, values) as an SVG document (``str``).
+
+    ``step`` draws a step function (value held until the next point), which
+    is how every event-derived series behaves.
+    """
+    left, right, top, bottom = MARGIN["left"], MARGIN["right"], MARGIN["top"], MARGIN["bottom"]
+    pw, ph = width - left - right, height - top - bottom
+    t0 = int(t[0]) if t0 is None else t0
+    t1 = int(t[-1]) if t1 is None else t1
+    span = max(t1 - t0, 1)
+    ymin, ymax = (float(y.min()), float(y.max())) if len(y) else (0.0, 1.0)
+    ymin = min(ymin, 0.0)
+    if ymax <= ymin:
+        ymax = ymin + 1.0
+
+    xs = left + (t.astype(np.float64) - t0) * (pw / span)
+    ys = top + ph - (y - ymin) * (ph / (ymax - ymin))
+    if step and len(xs) > 1:
+        # (x0,y0) (x1,y0) (x1,y1) (x2,y1) ...
+        sx = np.repeat(xs, 2)[1:]
+        sy = np.repeat(ys, 2)[:-1]
+        xs, ys = sx, sy
+    path = " ".join(f"{x:.1f},{v:.1f}" for x, v in zip(xs.tolist(), ys.tolist()))
+
+    out = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'viewBox="0 0 {width} {height}" font-family="Arial, sans-serif" font-size="11">',
+        f'<rect width="{width}" height="{height}" fill="#ffffff"/>',
+        f'<text x="{width / 2:.0f}" y="18" text-anchor="middle" font-size="13">{escape(title)}</text>',
+    ]
+    for frac in (0.0, 0.5, 1.0):
+        gy = top + ph - frac * ph
+        out.append(f'<line x1="{left}" y1="{gy:.1f}" x2="{left + pw}" y2="{gy:.1f}" stroke="#e0e0e0"/>')
+        out.append(
+            f'<text x="{left - 6}" y="{gy + 4:.1f}" text-anchor="end">{_fmt_value(ymin + frac * (ymax - ymin))}</text>'
+        )
+    for frac in (0.0, 0.25, 0.5, 0.75, 1.0):
+        gx = left + frac * pw
+        anchor = "start" if frac == 0 else "end" if frac == 1 else "middle"
+        out.append(
+            f'<text x="{gx:.1f}" y="{height - 8}" text-anchor="{anchor}">{_fmt_time(t0 + frac * span, span)}</text>'
+        )
+    out.append(f'<rect x="{left}" y="{top}" width="{pw}" height="{ph}" fill="none" stroke="#333"/>')
+    if path:
+        out.append(f'<polyline fill="none" stroke="{color}" stroke-width="1.5" points="{path}"/>')
+    out.append("</svg>")
+    return "\n".join(out)
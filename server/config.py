@@ -23,4 +23,33 @@ class Config:
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=8)
     CORS_ORIGINS = os.getenv("CORS_ORIGINS", "*")
 
+    # presence: heartbeats are flushed to dispositivos.last_seen every N seconds (0 disables the flusher)
+    PRESENCE_FLUSH_SECONDS = float(os.getenv("PRESENCE_FLUSH_SECONDS", "10"))
+    PRESENCE_ONLINE_SECONDS = float(os.getenv("PRESENCE_ONLINE_SECONDS", "30"))
+    PRESENCE_OFFLINE_SECONDS = float(os.getenv("PRESENCE_OFFLINE_SECONDS", "120"))
+    # insert boards seen for the first time into dispositivos (off: only registered devices are tracked)
+    PRESENCE_AUTO_REGISTER = os.getenv("PRESENCE_AUTO_REGISTER", "false").lower() in ("1", "true", "yes")
 
+    # eventos retention: months kept in the table, archive location and job interval (0 disables)
+    RETENTION_KEEP_MONTHS = int(os.getenv("RETENTION_KEEP_MONTHS", "12"))
+    RETENTION_INTERVAL_HOURS = float(os.getenv("RETENTION_INTERVAL_HOURS", "24"))
+    EVENTS_ARCHIVE_DIR = os.getenv("EVENTS_ARCHIVE_DIR")
+    EVENTS_ARCHIVE_FORMAT = os.getenv("EVENTS_ARCHIVE_FORMAT", "columnar")  # columnar | csv
+
+    # /charts: how long a chart whose range ends "now" is served from cache
+    CHARTS_LIVE_TTL_SECONDS = float(os.getenv("CHARTS_LIVE_TTL_SECONDS", "15"))
+    # /api/series: cache lifetime of buckets for ranges that end "now"
+    SERIES_LIVE_TTL_SECONDS = float(os.getenv("SERIES_LIVE_TTL_SECONDS", "5"))
+
+    # instrumentation: /metrics endpoint plus slow request/query logging (milliseconds)
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1").lower() not in ("0", "false", "no")
+    SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "1000"))
+    SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+
+    # ingest: sync (commit in the request) | inprocess | redis (queued, 202; see server/ingest)
+    INGEST_MODE = os.getenv("INGEST_MODE", "sync")
+    INGEST_REDIS_URL = os.getenv("INGEST_REDIS_URL", "redis://localhost:6379/0")
+    INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "500"))
+    INGEST_MAX_WAIT_SECONDS = float(os.getenv("INGEST_MAX_WAIT_SECONDS", "0.5"))
+    # inprocess and redis: queued events beyond this answer 503 (0 = unbounded)
+    INGEST_QUEUE_MAX = int(os.getenv("INGEST_QUEUE_MAX", "100000"))
@@ -0,0 +1,327 @@
+"""Compressed columnar archive for historical ``eventos``.
+
+File layout (``.evca``)::
+
+    MAGIC
+    block 0 | block 1 | ...            one day per block (split at BLOCK_ROWS)
+    footer (JSON)                      dictionaries, codec and the block index
+    u32 footer length | MAGIC
+
+A block is a run of independently compressed columns, so a scan only
+decompresses the columns it needs. Decompressed, every column is a
+little-endian array readable with ``numpy.frombuffer``:
+
+    id_evento   int64  (delta-encoded)
+    fecha_hora  int64  microseconds since epoch (delta-encoded)
+    id_usuario  int32
+    valor       uint32 codes into the block's valor dictionary
+    contador    int32  (NULL stored as -2**31)
+    origen_ip   uint32 codes into the block's ip dictionary
+    tipo_evento uint8  codes into the file dictionary (Evento enums)
+    detalle     uint8  codes into the file dictionary
+    origen      uint8  codes into the file dictionary
+    dicts       JSON {"valor": [...], "origen_ip": [...]}
+
+The block index keeps ``rows``, the column offsets and min/max of
+``fecha_hora`` and ``id_evento`` so range scans and counts skip blocks without
+decompressing them; a count over whole blocks is answered from the index
+alone. The file is read through ``mmap`` so only the columns that are
+actually scanned are paged in. Archives written before ``contador`` existed
+have no such column in their blocks; it reads back as NULL.
+"""
+import json
+import mmap
+import os
+import struct
+import uuid
+import zlib
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from .models import Evento
+from .serialization import FIELDS
+
+try:
+    import zstandard
+except Exception:
+    zstandard = None
+
+MAGIC = b"EVCA1\x00\x00\x00"
+BLOCK_ROWS = 65536
+_EPOCH = datetime(1970, 1, 1)
+_US_PER_DAY = 86400 * 1000000
+
+COLUMNS = {
+    "id_evento": "<i8", "fecha_hora": "<i8", "id_usuario": "<i4",
+    "valor": "<u4", "contador": "<i4", "origen_ip": "<u4",
+    "tipo_evento": "u1", "detalle": "u1", "origen": "u1",
+}
+NULL_CONTADOR = -2 ** 31
+
+# position of each column in a row (``FIELDS[Evento]`` order)
+_POS = {name: i for i, name in enumerate(FIELDS[Evento])}
+
+DICTS = {
+    "tipo_evento": list(Evento.__table__.c.tipo_evento.type.enums),
+    "detalle": list(Evento.__table__.c.detalle.type.enums),
+    "origen": list(Evento.__table__.c.origen.type.enums),
+}
+
+
+def to_us(value):
+    """Datetime / ISO string -> microseconds since epoch (naive local time)."""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    value = value.replace(tzinfo=None)
+    delta = value - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+
+def from_us(us):
+    return _EPOCH + timedelta(microseconds=int(us))
+
+
+def _compressor(codec):
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=9).compress
+    return lambda b: zlib.compress(b, 6)
+
+
+def _decompressor(codec):
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("archivo comprimido con zstd pero 'zstandard' no está instalado")
+        return zstandard.ZstdDecompressor().decompress
+    return zlib.decompress
+
+
+def _delta(a):
+    out = np.empty_like(a)
+    if len(a):
+        out[0] = a[0]
+        np.subtract(a[1:], a[:-1], out=out[1:])
+    return out
+
+
+class ArchiveWriter:
+    """Write rows (``FIELDS[Evento]`` order, sorted by ``fecha_hora``)."""
+
+    def __init__(self, path, codec=None):
+        self.path = path
+        self.codec = codec or ("zstd" if zstandard is not None else "zlib")
+        self._compress = _compressor(self.codec)
+        self._codes = {k: {v: i for i, v in enumerate(vals)} for k, vals in DICTS.items()}
+        # unique so two writers of the same archive never share a temp file
+        self._tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        self._f = open(self._tmp, "wb")
+        self._f.write(MAGIC)
+        self._index = []
+        self._buf = []
+        self._day = None
+        self.rows = 0
+
+    def add(self, row):
+        ts = to_us(row[_POS["fecha_hora"]])
+        day = ts // _US_PER_DAY
+        if self._buf and (day != self._day or len(self._buf) >= BLOCK_ROWS):
+            self._flush()
+        self._day = day
+        self._buf.append((row, ts))
+
+    def add_rows(self, rows):
+        for r in rows:
+            self.add(r)
+        return self
+
+    def _flush(self):
+        rows = self._buf
+        self._buf = []
+        n = len(rows)
+        p = _POS
+        ids = np.fromiter((r[p["id_evento"]] for r, _ in rows), dtype="<i8", count=n)
+        ts = np.fromiter((t for _, t in rows), dtype="<i8", count=n)
+        users = np.fromiter((r[p["id_usuario"]] for r, _ in rows), dtype="<i4", count=n)
+        valor_dict, ip_dict = {}, {}
+        valor = np.fromiter((valor_dict.setdefault(r[p["valor"]] or "", len(valor_dict)) for r, _ in rows), dtype="<u4", count=n)
+        contador = np.fromiter((NULL_CONTADOR if r[p["contador"]] is None else r[p["contador"]] for r, _ in rows),
+                               dtype="<i4", count=n)
+        ip = np.fromiter((ip_dict.setdefault(r[p["origen_ip"]] or "", len(ip_dict)) for r, _ in rows), dtype="<u4", count=n)
+        enums = [
+            np.fromiter((self._codes[k][r[p[k]]] for r, _ in rows), dtype="u1", count=n)
+            for k in ("tipo_evento", "detalle", "origen")
+        ]
+        meta = json.dumps({"valor": list(valor_dict), "origen_ip": list(ip_dict)}, ensure_ascii=False).encode("utf-8")
+        columns = {
+            "id_evento": _delta(ids), "fecha_hora": _delta(ts), "id_usuario": users,
+            "valor": valor, "contador": contador, "origen_ip": ip,
+            "tipo_evento": enums[0], "detalle": enums[1], "origen": enums[2],
+        }
+        offsets = {}
+        for name, data in list(columns.items()) + [("dicts", meta)]:
+            data = self._compress(data.tobytes() if isinstance(data, np.ndarray) else data)
+            offsets[name] = [self._f.tell(), len(data)]
+            self._f.write(data)
+        self._index.append({
+            "rows": n, "cols": offsets,
+            "ts_min": int(ts.min()), "ts_max": int(ts.max()),
+            "id_min": int(ids.min()), "id_max": int(ids.max()),
+        })
+        self.rows += n
+
+    def close(self):
+        if self._buf:
+            self._flush()
+        footer = json.dumps({"codec": self.codec, "dicts": DICTS, "blocks": self._index}).encode("utf-8")
+        self._f.write(footer)
+        self._f.write(struct.pack("<I", len(footer)))
+        self._f.write(MAGIC)
+        self._f.close()
+        os.replace(self._tmp, self.path)
+        return self.rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._f.close()
+            os.remove(self._tmp)
+
+
+def write_archive(path, rows, codec=None):
+    """Write ``rows`` to ``path``; returns the number of rows written."""
+    w = ArchiveWriter(path, codec=codec)
+    try:
+        w.add_rows(rows)
+    except Exception:
+        w.__exit__(Exception, None, None)
+        raise
+    return w.close()
+
+
+class EventArchive:
+    """Memory-mapped reader for an ``.evca`` file."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        tail = len(MAGIC) + 4
+        if self._mm[:len(MAGIC)] != MAGIC or self._mm[-len(MAGIC):] != MAGIC:
+            self.close()
+            raise ValueError(f"{path}: no es un archivo de eventos columnar")
+        (flen,) = struct.unpack("<I", self._mm[-tail:-len(MAGIC)])
+        footer = json.loads(bytes(self._mm[-tail - flen:-tail]))
+        self.codec = footer["codec"]
+        self.dicts = footer["dicts"]
+        self.blocks = footer["blocks"]
+        self._decompress = _decompressor(self.codec)
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def rows(self):
+        return sum(b["rows"] for b in self.blocks)
+
+    def _select(self, t0, t1):
+        for b in self.blocks:
+            if t0 is not None and b["ts_max"] < t0:
+                continue
+            if t1 is not None and b["ts_min"] > t1:
+                continue
+            yield b
+
+    def _column(self, b, name):
+        if name == "contador" and name not in b["cols"]:
+            # archive written before the column existed
+            return np.full(b["rows"], NULL_CONTADOR, dtype=COLUMNS[name])
+        off, length = b["cols"][name]
+        raw = self._decompress(self._mm[off:off + length])
+        if name == "dicts":
+            return json.loads(raw)
+        a = np.frombuffer(raw, dtype=COLUMNS[name], count=b["rows"])
+        if name in ("id_evento", "fecha_hora"):
+            a = np.cumsum(a)
+        return a
+
+    def read_block(self, b, columns=None):
+        """Decompress the requested columns (all by default) of block ``b``."""
+        return {name: self._column(b, name) for name in (columns or list(COLUMNS) + ["dicts"])}
+
+    def _mask(self, cols, t0, t1, filters):
+        mask = None
+        ts = cols["fecha_hora"]
+        if t0 is not None:
+            mask = ts >= t0
+        if t1 is not None:
+            m = ts <= t1
+            mask = m if mask is None else mask & m
+        for key, value in filters.items():
+            vals = self.dicts[key]
+            code = vals.index(value) if value in vals else -1
+            m = cols[key] == code
+            mask = m if mask is None else mask & m
+        return mask
+
+    def scan(self, desde=None, hasta=None, columns=None, **filters):
+        """Yield ``(columns, mask)`` for every block overlapping the range.
+
+        ``columns`` limits what is decompressed (``fecha_hora`` and filtered
+        columns are always read). ``filters`` match dictionary columns
+        (``tipo_evento``, ``detalle``, ``origen``); ``mask`` is ``None`` when
+        the whole block matches.
+        """
+        t0 = to_us(desde) if desde is not None else None
+        t1 = to_us(hasta) if hasta is not None else None
+        filters = {k: v for k, v in filters.items() if v is not None}
+        if columns is not None:
+            columns = list(dict.fromkeys(["fecha_hora", *filters, *columns]))
+        for b in self._select(t0, t1):
+            cols = self.read_block(b, columns)
+            yield cols, self._mask(cols, t0, t1, filters)
+
+    def count(self, desde=None, hasta=None, **filters):
+        """Count matching rows; whole blocks without filters come from the index."""
+        t0 = to_us(desde) if desde is not None else None
+        t1 = to_us(hasta) if hasta is not None else None
+        filters = {k: v for k, v in filters.items() if v is not None}
+        total = 0
+        for b in self._select(t0, t1):
+            inside = (t0 is None or b["ts_min"] >= t0) and (t1 is None or b["ts_max"] <= t1)
+            if inside and not filters:
+                total += b["rows"]
+                continue
+            cols = self.read_block(b, ["fecha_hora", *filters])
+            total += int(np.count_nonzero(self._mask(cols, t0, t1, filters)))
+        return total
+
+    def iter_rows(self, desde=None, hasta=None, detalle=None):
+        """Yield rows as tuples (``FIELDS[Evento]`` order, ISO ``fecha_hora``)."""
+        tipos = np.array(self.dicts["tipo_evento"], dtype=object)
+        detalles = np.array(self.dicts["detalle"], dtype=object)
+        origenes = np.array(self.dicts["origen"], dtype=object)
+        for cols, mask in self.scan(desde, hasta, detalle=detalle):
+            if mask is not None:
+                cols = {k: (v if k == "dicts" else v[mask]) for k, v in cols.items()}
+            valores = np.array(cols["dicts"]["valor"], dtype=object)
+            ips = np.array([ip or None for ip in cols["dicts"]["origen_ip"]], dtype=object)
+            contadores = cols["contador"].astype(object)
+            contadores[cols["contador"] == NULL_CONTADOR] = None
+            fechas = cols["fecha_hora"].astype("datetime64[us]").astype(object)
+            yield from zip(
+                cols["id_evento"].tolist(), cols["id_usuario"].tolist(),
+                tipos[cols["tipo_evento"]].tolist(), detalles[cols["detalle"]].tolist(),
+                origenes[cols["origen"]].tolist(), valores[cols["valor"]].tolist(),
+                contadores.tolist(), ips[cols["origen_ip"]].tolist(), (f.isoformat() for f in fechas),
+            )
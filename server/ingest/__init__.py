@@ -0,0 +1,76 @@
+"""Event ingestion decoupled from persistence.
+
+``INGEST_MODE`` selects how ``POST /api/esp32/data`` stores events:
+
+    sync        INSERT + commit inside the request (201), as before
+    inprocess   queue in memory and answer 202; a worker thread of the same
+                process writes batches (single-process deployments, dev)
+    redis       queue in a Redis list (``INGEST_REDIS_URL``) and answer 202;
+                ``python -m server.ingest.worker`` processes write batches.
+                ``INGEST_REDIS_URL=fake://`` uses the in-memory ``FakeRedis``
+
+Board latency then no longer includes the MySQL commit, and with ``redis``
+persistence scales with the number of worker processes.
+"""
+import atexit
+import threading
+
+from .broker import InProcessBroker, RedisBroker, FakeRedis, QueueFull
+from .records import event_record
+
+MODES = ("sync", "inprocess", "redis")
+
+_fake_redis = None
+
+
+def _redis_client(url):
+    global _fake_redis
+    if url.startswith("fake://"):
+        # one shared instance so every app in the process sees the same queue
+        if _fake_redis is None:
+            _fake_redis = FakeRedis()
+        return _fake_redis
+    try:
+        import redis
+    except Exception:
+        raise RuntimeError("INGEST_MODE=redis necesita el paquete 'redis' (pip install redis)")
+    return redis.Redis.from_url(url)
+
+
+def make_broker(config):
+    mode = config.get("INGEST_MODE", "sync")
+    if mode not in MODES:
+        raise ValueError(f"INGEST_MODE desconocido: {mode}")
+    maxsize = int(config.get("INGEST_QUEUE_MAX", 0) or 0)
+    if mode == "inprocess":
+        return InProcessBroker(maxsize=maxsize)
+    if mode == "redis":
+        return RedisBroker(_redis_client(config.get("INGEST_REDIS_URL", "fake://")), maxsize=maxsize)
+    return None
+
+
+def get_broker(app):
+    """The app's broker, or None in ``sync`` mode."""
+    return app.extensions.get("ingest")
+
+
+def init_app(app):
+    broker = make_broker(app.config)
+    app.extensions["ingest"] = broker
+    if broker is None or app.config.get("INGEST_MODE") != "inprocess" or not app.config.get("INGEST_START_WORKER", True):
+        return
+    # imported here so `python -m server.ingest.worker` doesn't find it preloaded
+    from .worker import Worker
+
+    worker = Worker(app, broker,
+                    batch_size=int(app.config.get("INGEST_BATCH_SIZE", 500)),
+                    max_wait=float(app.config.get("INGEST_MAX_WAIT_SECONDS", 0.5)))
+    app.extensions["ingest_worker"] = worker
+    threading.Thread(target=worker.run, name="ingest-worker", daemon=True).start()
+
+    def at_exit():
+        # whatever is still queued is written before the process ends
+        worker.stop()
+        worker.drain()
+
+    atexit.register(at_exit)
@@ -0,0 +1,170 @@
+"""Queues between ``POST /api/esp32/data`` and the ingest worker.
+
+Every broker takes event records (dicts from :func:`server.ingest.records.event_record`)
+with the same four calls:
+
+    put(record)                      enqueue; raises QueueFull when bounded and full
+    get_batch(max_items, timeout)    up to ``max_items`` records, oldest first;
+                                     waits up to ``timeout`` seconds for the first
+    requeue(records)                 put a batch back at the head (failed write)
+    len(broker)                      records waiting
+
+``InProcessBroker`` is a thread-safe deque for development (the worker runs as
+a thread of the same server process). ``RedisBroker`` speaks the subset of the
+Redis list API used here (``LPUSH``/``RPUSH``/``BRPOP``/``RPOP count``/``LLEN``),
+so the web processes and ``python -m server.ingest.worker`` processes can share
+one queue; ``FakeRedis`` implements that subset in memory for tests and for
+running the Redis code path without a server.
+"""
+import json
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+QUEUE_KEY = "ingest:eventos"
+
+
+class QueueFull(Exception):
+    pass
+
+
+class InProcessBroker:
+    def __init__(self, maxsize=0):
+        self.maxsize = maxsize
+        self._items = deque()
+        self._cond = threading.Condition()
+
+    def put(self, record):
+        with self._cond:
+            if self.maxsize and len(self._items) >= self.maxsize:
+                raise QueueFull()
+            self._items.append(record)
+            self._cond.notify()
+
+    def get_batch(self, max_items, timeout):
+        with self._cond:
+            if not self._items:
+                self._cond.wait(timeout)
+            batch = []
+            while self._items and len(batch) < max_items:
+                batch.append(self._items.popleft())
+            return batch
+
+    def requeue(self, records):
+        with self._cond:
+            self._items.extendleft(reversed(records))
+            self._cond.notify()
+
+    def __len__(self):
+        with self._cond:
+            return len(self._items)
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} no serializable")
+
+
+def encode(record):
+    return json.dumps(record, default=_default, separators=(",", ":"))
+
+
+def decode(raw):
+    record = json.loads(raw)
+    if isinstance(record.get("fecha_hora"), str):
+        record["fecha_hora"] = datetime.fromisoformat(record["fecha_hora"])
+    return record
+
+
+class RedisBroker:
+    """Redis list used as a FIFO: LPUSH on the left, (B)RPOP on the right.
+
+    With ``maxsize``, ``put`` checks ``LLEN`` first and raises ``QueueFull``
+    at the limit; concurrent web processes can overshoot it by at most one
+    record each.
+    """
+
+    def __init__(self, client, key=QUEUE_KEY, maxsize=0):
+        self.client = client
+        self.key = key
+        self.maxsize = maxsize
+
+    def put(self, record):
+        if self.maxsize and int(self.client.llen(self.key)) >= self.maxsize:
+            raise QueueFull()
+        self.client.lpush(self.key, encode(record))
+
+    def get_batch(self, max_items, timeout):
+        first = self.client.brpop(self.key, timeout=timeout)
+        if first is None:
+            return []
+        raw = [first[1]]
+        if max_items > 1:
+            raw.extend(self.client.rpop(self.key, max_items - 1) or [])
+        return [decode(r) for r in raw]
+
+    def requeue(self, records):
+        if records:
+            # the right end is popped first, so the oldest record goes last
+            self.client.rpush(self.key, *[encode(r) for r in reversed(records)])
+
+    def __len__(self):
+        return int(self.client.llen(self.key))
+
+
+class FakeRedis:
+    """In-memory stand-in for the Redis list commands ``RedisBroker`` uses."""
+
+    def __init__(self):
+        self._lists = {}
+        self._cond = threading.Condition()
+
+    def _list(self, key):
+        return self._lists.setdefault(key, deque())
+
+    def lpush(self, key, *values):
+        with self._cond:
+            lst = self._list(key)
+            lst.extendleft(v.encode() if isinstance(v, str) else v for v in values)
+            self._cond.notify_all()
+            return len(lst)
+
+    def rpush(self, key, *values):
+        with self._cond:
+            lst = self._list(key)
+            lst.extend(v.encode() if isinstance(v, str) else v for v in values)
+            self._cond.notify_all()
+            return len(lst)
+
+    def rpop(self, key, count=None):
+        with self._cond:
+            lst = self._list(key)
+            if not lst:
+                return None
+            if count is None:
+                return lst.pop()
+            return [lst.pop() for _ in range(min(count, len(lst)))]
+
+    def brpop(self, keys, timeout=0):
+        keys = [keys] if isinstance(keys, (str, bytes)) else list(keys)
+        deadline = None if not timeout else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                for key in keys:
+                    lst = self._list(key)
+                    if lst:
+                        return (key.encode() if isinstance(key, str) else key, lst.pop())
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+
+    def llen(self, key):
+        with self._cond:
+            return len(self._list(key))
+
+    def delete(self, *keys):
+        with self._cond:
+            return sum(1 for k in keys if self._lists.pop(k, None) is not None)
@@ -0,0 +1,55 @@
+"""Validated ``eventos`` rows built from a board's ``POST /api/esp32/data`` body.
+
+The same record is written directly (``INGEST_MODE=sync``) or queued for the
+worker, so everything that could make the INSERT fail later (unknown enum
+values, a non-numeric user id) is rejected here, while the request can still
+answer 400.
+"""
+from datetime import datetime, timedelta, timezone
+
+from ..models import Evento
+from ..normalize import normalize_event_valor
+from ..state import contador_value
+
+COLOMBIA_TZ = timezone(timedelta(hours=-5))
+
+TIPOS_EVENTO = tuple(Evento.__table__.c.tipo_evento.type.enums)
+DETALLES = tuple(Evento.__table__.c.detalle.type.enums)
+ORIGENES = tuple(Evento.__table__.c.origen.type.enums)
+
+
+def event_record(data, remote_addr=None, now=None):
+    """Column values for one event plus its ``device_id``; ValueError if invalid."""
+    if not isinstance(data, dict):
+        raise ValueError("se esperaba un objeto JSON")
+    try:
+        id_usuario = int(data.get("id_usuario", 1))
+    except (TypeError, ValueError):
+        raise ValueError("id_usuario inválido")
+    tipo_evento = data.get("tipo_evento", "LED_ON")
+    detalle = data.get("detalle", "LED1")
+    origen = data.get("origen", "CIRCUITO")
+    if tipo_evento not in TIPOS_EVENTO:
+        raise ValueError(f"tipo_evento inválido: {tipo_evento}")
+    if detalle not in DETALLES:
+        raise ValueError(f"detalle inválido: {detalle}")
+    if origen not in ORIGENES:
+        raise ValueError(f"origen inválido: {origen}")
+    raw_valor = data.get("valor", "ON")
+    device_id = data.get("device_id")
+    return {
+        "id_usuario": id_usuario,
+        "tipo_evento": tipo_evento,
+        "detalle": detalle,
+        "origen": origen,
+        "valor": normalize_event_valor(raw_valor, detalle),
+        "contador": contador_value(tipo_evento, detalle, raw_valor),
+        "fecha_hora": now or datetime.now(COLOMBIA_TZ),
+        "origen_ip": remote_addr,
+        "device_id": str(device_id) if device_id is not None else None,
+    }
+
+
+def evento_columns(record):
+    """``record`` without the keys that are not ``eventos`` columns."""
+    return {k: v for k, v in record.items() if k != "device_id"}
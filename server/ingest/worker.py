@@ -0,0 +1,184 @@
+"""Drains the ingest queue into ``eventos`` with batched inserts.
+
+Each batch is one multi-row INSERT into ``eventos`` plus one upsert of
+``estados_actuales`` per device holding only the newest value per
+``detalle`` in the batch (the rollup), committed together. The upsert is
+stamped with the event's ``fecha_hora`` and never replaces a newer state, so
+batches committed out of order (several workers, a requeue) are harmless.
+
+  - a database outage (``OperationalError``) puts the batch back at the head
+    of the queue and retries with backoff, so events are not lost while
+    MySQL is down
+  - a batch rejected for another reason is retried one record at a time and
+    only the offending records are dropped (logged with their content)
+
+With ``INGEST_MODE=inprocess`` the server runs one worker thread itself. With
+``INGEST_MODE=redis`` run one or more worker processes next to the web
+server, all draining the same Redis list:
+
+    python -m server.ingest.worker [--processes 4] [--batch 500] [--wait 0.5]
+"""
+import argparse
+import logging
+import multiprocessing
+import signal
+import threading
+import time
+
+from sqlalchemy.exc import OperationalError
+
+from ..extensions import db
+from ..models import Evento
+from ..state import state_updates, upsert_states
+from .records import evento_columns
+
+logger = logging.getLogger(__name__)
+
+MAX_BACKOFF = 30.0
+
+
+def write_batch(records):
+    """Insert ``records`` and roll their state changes up into ``estados_actuales``. Commits."""
+    db.session.execute(db.insert(Evento), [evento_columns(r) for r in records])
+    latest = {}
+    for r in records:
+        per_device = latest.setdefault(r.get("device_id"), {})
+        fecha = r["fecha_hora"]
+        for detalle, valor in state_updates(r["tipo_evento"], r["detalle"], r["valor"]):
+            # a requeued batch can put older events after newer ones
+            if detalle not in per_device or fecha >= per_device[detalle][1]:
+                per_device[detalle] = (valor, fecha)
+    for device_id, states in latest.items():
+        upsert_states(device_id, [(d, v, f) for d, (v, f) in states.items()])
+    db.session.commit()
+
+
+class Worker:
+    def __init__(self, app, broker, batch_size=500, max_wait=0.5):
+        self.app = app
+        self.broker = broker
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.stats = {"batches": 0, "events": 0, "dropped": 0, "requeued": 0}
+        self._stop = threading.Event()
+        self._backoff = 0.0
+
+    def _write_each(self, records):
+        for i, record in enumerate(records):
+            try:
+                write_batch([record])
+                self.stats["events"] += 1
+            except OperationalError:
+                db.session.rollback()
+                self.broker.requeue(records[i:])
+                self.stats["requeued"] += len(records) - i
+                raise
+            except Exception:
+                db.session.rollback()
+                self.stats["dropped"] += 1
+                logger.exception("ingest: evento descartado %r", record)
+
+    def run_once(self):
+        """Write one batch if there is one; returns how many records were taken."""
+        records = self.broker.get_batch(self.batch_size, self.max_wait)
+        if not records:
+            return 0
+        with self.app.app_context():
+            try:
+                try:
+                    write_batch(records)
+                    self.stats["events"] += len(records)
+                except OperationalError:
+                    db.session.rollback()
+                    self.broker.requeue(records)
+                    self.stats["requeued"] += len(records)
+                    raise
+                except Exception:
+                    db.session.rollback()
+                    logger.warning("ingest: lote de %d rechazado; reintentando uno a uno", len(records))
+                    self._write_each(records)
+                self.stats["batches"] += 1
+                self._backoff = 0.0
+            except OperationalError:
+                self._backoff = min(MAX_BACKOFF, self._backoff * 2 or 0.5)
+                logger.exception("ingest: BD no disponible; reintento en %.1f s", self._backoff)
+                self._stop.wait(self._backoff)
+            finally:
+                db.session.remove()
+        return len(records)
+
+    def run(self):
+        while not self._stop.is_set():
+            self.run_once()
+
+    def drain(self, max_failures=3):
+        """Write everything queued right now (shutdown, tests, benchmarks).
+
+        Gives up after ``max_failures`` batches put back by a DB outage.
+        """
+        failures = 0
+        while len(self.broker) and failures < max_failures:
+            requeued = self.stats["requeued"]
+            self.run_once()
+            if self.stats["requeued"] != requeued:
+                failures += 1
+
+    def stop(self):
+        self._stop.set()
+
+
+def _worker_config(base):
+    class WorkerConfig(base):
+        # schedulers belong to the web process
+        PRESENCE_FLUSH_SECONDS = 0
+        RETENTION_INTERVAL_HOURS = 0
+        INGEST_START_WORKER = False
+    return WorkerConfig
+
+
+def run_process(batch_size, max_wait):
+    from ..app import create_app
+    from ..config import Config
+    from . import get_broker
+
+    app = create_app(_worker_config(Config))
+    if app.config.get("INGEST_MODE") != "redis":
+        raise SystemExit("server.ingest.worker necesita INGEST_MODE=redis (la cola inprocess vive en el servidor)")
+    worker = Worker(app, get_broker(app), batch_size=batch_size, max_wait=max_wait)
+    signal.signal(signal.SIGTERM, lambda *a: worker.stop())
+    started = time.monotonic()
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        worker.stop()
+    elapsed = time.monotonic() - started
+    logger.info("ingest worker: %s en %.0f s", worker.stats, elapsed)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--processes", type=int, default=1, help="procesos worker en paralelo")
+    ap.add_argument("--batch", type=int, default=500, help="máximo de eventos por INSERT")
+    ap.add_argument("--wait", type=float, default=0.5, help="segundos de espera por el primer evento de un lote")
+    args = ap.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(processName)s %(levelname)s %(message)s")
+
+    if args.processes <= 1:
+        run_process(args.batch, args.wait)
+        return
+    procs = [multiprocessing.Process(target=run_process, args=(args.batch, args.wait), name=f"ingest-{i}")
+             for i in range(args.processes)]
+    for p in procs:
+        p.start()
+    try:
+        for p in procs:
+            p.join()
+    except KeyboardInterrupt:
+        for p in procs:
+            p.terminate()
+        for p in procs:
+            p.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""Request/DB instrumentation and a Prometheus ``/metrics`` endpoint.
+
+- ``before_request``/``after_request`` time every request and feed a latency
+  histogram per endpoint (``request.endpoint``, e.g. ``events.latest``).
+- SQLAlchemy ``before/after_cursor_execute`` hooks count the queries and the
+  DB time of the current request.
+- Requests slower than ``SLOW_REQUEST_MS`` and queries slower than
+  ``SLOW_QUERY_MS`` are logged; SELECTs without WHERE/LIMIT (whole-table
+  fetches such as ``list_commands`` without ``device_id``) are counted and
+  logged once per endpoint and statement.
+- ``GET /metrics`` returns everything in the Prometheus text format.
+
+The overhead is measured by ``benchmarks/bench_instrumentation.py``;
+``METRICS_ENABLED = False`` turns everything off.
+"""
+import bisect
+import logging
+import re
+import threading
+import time
+
+from flask import Response, current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+_FROM_RE = re.compile(r"\bFROM\b", re.IGNORECASE)
+_BOUNDED_RE = re.compile(r"\b(WHERE|LIMIT)\b", re.IGNORECASE)
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a label tuple."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self._data = {}
+
+    def observe(self, labels, value):
+        entry = self._data.get(labels)
+        if entry is None:
+            entry = self._data[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        entry[0][bisect.bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+        entry[2] += 1
+
+    def items(self):
+        return list(self._data.items())
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.requests = {}
+        self.db_time = {}
+        self.slow_queries = {}
+        self.unbounded = {}
+        self._reported = set()
+        self.started = time.time()
+
+    def _inc(self, counter, key, value=1):
+        counter[key] = counter.get(key, 0) + value
+
+    def record_request(self, endpoint, method, status, seconds, queries, db_seconds):
+        with self._lock:
+            self.latency.observe((endpoint, method), seconds)
+            self.queries.observe((endpoint,), queries)
+            self._inc(self.requests, (endpoint, method, str(status)))
+            self._inc(self.db_time, (endpoint,), db_seconds)
+
+    def record_query(self, endpoint, statement, seconds, slow_ms):
+        report = None
+        with self._lock:
+            if seconds * 1000 >= slow_ms:
+                self._inc(self.slow_queries, (endpoint,))
+                report = "slow"
+            if (statement.lstrip()[:6].upper() == "SELECT" and _FROM_RE.search(statement)
+                    and not _BOUNDED_RE.search(statement)):
+                self._inc(self.unbounded, (endpoint,))
+                key = (endpoint, statement)
+                if key not in self._reported:
+                    self._reported.add(key)
+                    report = report or "unbounded"
+        if report == "slow":
+            logger.warning("slow query (%.0f ms) in %s: %s", seconds * 1000, endpoint, _short(statement))
+        elif report == "unbounded":
+            logger.warning("whole-table SELECT (no WHERE/LIMIT) in %s: %s", endpoint, _short(statement))
+
+    def render(self):
+        """Prometheus text exposition format (0.0.4)."""
+        out = []
+        with self._lock:
+            _histogram(out, "http_request_duration_seconds", "Request latency by endpoint.",
+                       ("endpoint", "method"), self.latency)
+            _histogram(out, "http_request_db_queries", "DB queries per request.", ("endpoint",), self.queries)
+            _counter(out, "http_requests_total", "Requests by endpoint, method and status.",
+                     ("endpoint", "method", "status"), self.requests)
+            _counter(out, "db_time_seconds_total", "Time spent in DB queries by endpoint.", ("endpoint",), self.db_time)
+            _counter(out, "db_slow_queries_total", "Queries slower than SLOW_QUERY_MS.", ("endpoint",), self.slow_queries)
+            _counter(out, "db_unbounded_selects_total", "SELECTs without WHERE or LIMIT.", ("endpoint",), self.unbounded)
+        out.append("# HELP process_start_time_seconds Start time of the process since unix epoch.")
+        out.append("# TYPE process_start_time_seconds gauge")
+        out.append(f"process_start_time_seconds {self.started:.3f}")
+        return "\n".join(out) + "\n"
+
+
+def _short(statement, n=300):
+    s = " ".join(statement.split())
+    return s if len(s) <= n else s[:n] + "..."
+
+
+def _escape(v):
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _fmt(v):
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+def _counter(out, name, doc, names, data):
+    out.append(f"# HELP {name} {doc}")
+    out.append(f"# TYPE {name} counter")
+    for key, value in sorted(data.items()):
+        out.append(f"{name}{_labels(names, key)} {_fmt(value)}")
+
+
+def _histogram(out, name, doc, names, hist):
+    out.append(f"# HELP {name} {doc}")
+    out.append(f"# TYPE {name} histogram")
+    for key, (counts, total, count) in sorted(hist.items()):
+        cumulative = 0
+        for le, c in zip(hist.buckets, counts):
+            cumulative += c
+            out.append(f"{name}_bucket{_labels(names, key, ('le', le))} {cumulative}")
+        out.append(f"{name}_bucket{_labels(names, key, ('le', '+Inf'))} {count}")
+        out.append(f"{name}_sum{_labels(names, key)} {_fmt(total)}")
+        out.append(f"{name}_count{_labels(names, key)} {count}")
+
+
+metrics = Metrics()
+
+
+def _endpoint():
+    return request.endpoint or "unmatched"
+
+
+def _before_request():
+    g._metrics_t0 = time.perf_counter()
+    g._metrics_queries = 0
+    g._metrics_db = 0.0
+
+
+def _after_request(response):
+    t0 = g.pop("_metrics_t0", None)
+    if t0 is None:
+        return response
+    elapsed = time.perf_counter() - t0
+    queries, db_seconds = g.pop("_metrics_queries", 0), g.pop("_metrics_db", 0.0)
+    endpoint = _endpoint()
+    metrics.record_request(endpoint, request.method, response.status_code, elapsed, queries, db_seconds)
+    if elapsed * 1000 >= current_app.config.get("SLOW_REQUEST_MS", 1000):
+        logger.warning(
+            "slow request %s %s (%s): %.0f ms, %d queries, %.0f ms in DB",
+            request.method, request.path, endpoint, elapsed * 1000, queries, db_seconds * 1000,
+        )
+    return response
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("_metrics_t0", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stack = conn.info.get("_metrics_t0")
+    if not stack:
+        return
+    elapsed = time.perf_counter() - stack.pop()
+    # queries outside a request (presence flusher, retention job) are not attributed
+    if not has_request_context() or "_metrics_t0" not in g:
+        return
+    g._metrics_queries += 1
+    g._metrics_db += elapsed
+    metrics.record_query(_endpoint(), statement, elapsed, current_app.config.get("SLOW_QUERY_MS", 200))
+
+
+def metrics_view():
+    return Response(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+def init_app(app):
+    if not app.config.get("METRICS_ENABLED", True):
+        return
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    # listening on the Engine class covers every engine Flask-SQLAlchemy creates
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    app.add_url_rule("/metrics", "metrics", metrics_view, methods=["GET"])
@@ -31,6 +31,10 @@ class Usuario(db.Model):
 
 class Evento(db.Model):
     __tablename__ = "eventos"
+    __table_args__ = (
+        db.Index("idx_fecha_contador", "fecha_hora", "contador"),
+        db.Index("idx_detalle_tipo_fecha", "detalle", "tipo_evento", "fecha_hora"),
+    )
     id_evento = db.Column(db.Integer, primary_key=True)
     id_usuario = db.Column(db.Integer, db.ForeignKey("usuarios.id_usuario"), nullable=False)
     tipo_evento = db.Column(db.Enum("LED_ON", "LED_OFF", "SENSOR_BLOQUEADO", "SENSOR_LIBRE", "RESET_CONTADOR", "CONTADOR_CAMBIO", "LOGIN"), nullable=False)
@@ -38,6 +42,8 @@ class Evento(db.Model):
     # extend origen enum to include WEB (frontend web app)
     origen = db.Column(db.Enum("APP", "WEB", "CIRCUITO"), nullable=False)
     valor = db.Column(db.String(50), nullable=False)
+    # numeric counter reading parsed at ingest (see state.contador_value)
+    contador = db.Column(db.Integer, nullable=True)
     origen_ip = db.Column(db.String(45), nullable=True)
     fecha_hora = db.Column(db.DateTime, default=get_colombia_time)
 
@@ -49,16 +55,26 @@ class Evento(db.Model):
             "detalle": self.detalle,
             "origen": self.origen,
             "valor": self.valor,
+            "contador": self.contador,
             "origen_ip": self.origen_ip,
             "fecha_hora": self.fecha_hora.isoformat() if self.fecha_hora else None
         }
 
 class HistorialExportado(db.Model):
     __tablename__ = "historialexportado"
+    __table_args__ = (
+        db.Index("idx_hist_fecha", "fecha_exportacion", "id_exportacion"),
+        db.Index("idx_hist_formato_fecha", "formato", "fecha_exportacion", "id_exportacion"),
+    )
     id_exportacion = db.Column(db.Integer, primary_key=True)
     id_usuario = db.Column(db.Integer, db.ForeignKey("usuarios.id_usuario"), nullable=False)
     formato = db.Column(db.Enum("CSV", "PDF"), nullable=False)
     fecha_exportacion = db.Column(db.DateTime, default=datetime.utcnow)
+    # file metadata; content lives in export_blobs by sha256 (desktop app export store)
+    filename = db.Column(db.String(255), nullable=True)
+    content_type = db.Column(db.String(100), nullable=True)
+    size_bytes = db.Column(db.BigInteger, nullable=True)
+    sha256 = db.Column(db.String(64), nullable=True, index=True)
 
     def to_dict(self):
         return {
@@ -111,8 +127,10 @@ class Command(db.Model):
 
 class EstadoActual(db.Model):
     __tablename__ = "estados_actuales"
+    # one row per (device_id, detalle); upserted on every ingest (see server/state.py)
+    __table_args__ = (db.UniqueConstraint("device_id", "detalle", name="uq_estado_device_detalle"),)
     id_estado = db.Column(db.Integer, primary_key=True)
-    device_id = db.Column(db.String(100), nullable=True)
+    device_id = db.Column(db.String(100), nullable=False, default="default")
     detalle = db.Column(db.String(50), nullable=False)
     valor = db.Column(db.String(20), nullable=False)
     fecha_actualizacion = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
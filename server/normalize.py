@@ -0,0 +1,101 @@
+"""Normalization of ``eventos.valor``, shared by the desktop app and the server.
+
+Rules (unchanged from the original ``shared._normalize_val``):
+  - ``None`` -> ``""``; bytes are decoded as UTF-8
+  - ints: 1 -> ``ON``, 0 -> ``OFF``, anything else as text
+  - ``contador=N`` is kept as is
+  - 1/true/on/activo/encendido -> ``ON``; 0/false/off/inactivo/apagado -> ``OFF``
+    (case-insensitive, surrounding spaces ignored)
+  - otherwise the first standalone ``1``/``0`` decides ON/OFF
+  - anything else is returned stripped, truncated to 50 characters
+
+It lives in the server package, which is deployed on its own, and has no
+imports beyond the standard library so the desktop app can import it from
+here too (``app.utils.shared``) without pulling in Flask.
+"""
+import re
+
+MAX_LEN = 50
+
+_TOKENS = {
+    "1": "ON", "true": "ON", "on": "ON", "activo": "ON", "encendido": "ON",
+    "0": "OFF", "false": "OFF", "off": "OFF", "inactivo": "OFF", "apagado": "OFF",
+}
+_BIT_RE = re.compile(r"\b(1|0)\b")
+_BIT_VALUE = {"1": "ON", "0": "OFF"}
+
+
+# exact spellings seen on the wire -> result, checked before any string work
+_EXACT = {}
+for _tok, _res in _TOKENS.items():
+    for _variant in (_tok, _tok.upper(), _tok.capitalize()):
+        _EXACT[_variant] = _res
+del _tok, _res, _variant
+
+
+def normalize_valor(valor):
+    """Normalize one ``valor``; always returns a string of at most 50 characters."""
+    if type(valor) is str:
+        hit = _EXACT.get(valor)
+        if hit is not None:
+            return hit
+        s = valor.strip()
+        if s.startswith("contador="):
+            return s[:MAX_LEN]
+    try:
+        if valor is None:
+            return ""
+        if isinstance(valor, (bytes, bytearray)):
+            valor = valor.decode("utf-8", errors="ignore")
+        elif isinstance(valor, int):
+            if valor == 1:
+                return "ON"
+            if valor == 0:
+                return "OFF"
+            return str(valor)[:MAX_LEN]
+        s = str(valor).strip()
+        if not s:
+            return ""
+        low = s.lower()
+        hit = _TOKENS.get(low)
+        if hit is not None:
+            return hit
+        if low.startswith("contador="):
+            return s[:MAX_LEN]
+        m = _BIT_RE.search(s)
+        if m:
+            return _BIT_VALUE[m.group(1)]
+        return s[:MAX_LEN]
+    except Exception:
+        try:
+            return str(valor)[:MAX_LEN]
+        except Exception:
+            return ""
+
+
+def normalize_event_valor(valor, detalle=None):
+    """``normalize_valor`` for an event; counter readings (``detalle`` CONTADOR) keep their number."""
+    if detalle == "CONTADOR" and isinstance(valor, (int, str)) and str(valor).strip().isdigit():
+        return str(valor).strip()[:MAX_LEN]
+    return normalize_valor(valor)
+
+
+def normalize_many(values):
+    """Normalize a sequence of values (backfills, batch ingest); returns a list.
+
+    Event values repeat heavily (ON/OFF, a few counters), so each distinct
+    string is normalized once; other types go through ``normalize_valor``.
+    """
+    memo = {}
+    get = memo.get
+    out = []
+    append = out.append
+    for v in values:
+        if type(v) is str:
+            r = get(v)
+            if r is None:
+                r = memo[v] = normalize_valor(v)
+        else:
+            r = normalize_valor(v)
+        append(r)
+    return out
@@ -0,0 +1,242 @@
+"""Device presence (heartbeats) without a DB write per request.
+
+Requests under ``/api/esp32/*`` that identify their board (``X-Device-Id``
+header or ``device_id``) call :meth:`PresenceTracker.heartbeat`, which only
+updates an in-memory dict. Anonymous requests (a browser or script polling
+``get-data``) are not heartbeats: keying them by address would turn every
+client into a device and merge boards behind one NAT.
+
+A background thread flushes the coalesced ``last_seen`` values to
+``dispositivos`` every ``PRESENCE_FLUSH_SECONDS`` with one bulk UPDATE. Only
+boards that already have a row are tracked; ids that don't are dropped (and
+ignored for a while) unless ``PRESENCE_AUTO_REGISTER`` inserts them.
+``GET /api/devices/presence`` classifies devices as online/stale/offline.
+"""
+import atexit
+import logging
+import re
+import threading
+import time
+
+from flask import request
+from sqlalchemy import bindparam
+from sqlalchemy.exc import OperationalError
+
+from .extensions import db
+from .models import Dispositivo, get_colombia_time
+
+logger = logging.getLogger(__name__)
+
+# fits dispositivos.nombre (String(100)), which auto-registered boards get too
+DEVICE_ID_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._:@-]{0,99}$")
+# how long an id without a dispositivos row is ignored before being looked up again
+REJECT_SECONDS = 300
+MAX_REJECTED = 10000
+
+
+def _now():
+    # dispositivos.last_seen is stored as naive Colombia time (see auth.login)
+    return get_colombia_time().replace(tzinfo=None)
+
+
+def device_id_from_request():
+    """Identify the board sending the current request.
+
+    Reads the ``X-Device-Id`` header / ``device_id`` param or JSON field;
+    ``None`` when the request doesn't say which board it comes from or the id
+    is not a plausible device id (see ``DEVICE_ID_RE``).
+    """
+    dev = request.headers.get("X-Device-Id") or request.args.get("device_id")
+    if not dev and request.is_json:
+        data = request.get_json(silent=True) or {}
+        if isinstance(data, dict):
+            dev = data.get("device_id")
+    if not isinstance(dev, str) or not DEVICE_ID_RE.match(dev):
+        return None
+    return dev
+
+
+class PresenceTracker:
+    def __init__(self, auto_register=False):
+        self.auto_register = auto_register
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._last = {}
+        self._known = set()
+        self._rejected = {}
+        self._thread = None
+        self._stop = threading.Event()
+
+    def heartbeat(self, device_id, ts=None):
+        ts = ts or _now()
+        with self._lock:
+            until = self._rejected.get(device_id)
+            if until is not None:
+                if until > time.monotonic():
+                    return
+                del self._rejected[device_id]
+            self._pending[device_id] = ts
+            self._last[device_id] = ts
+
+    def last_seen(self):
+        with self._lock:
+            return dict(self._last)
+
+    def _reject(self, ids):
+        until = time.monotonic() + REJECT_SECONDS
+        with self._lock:
+            if len(self._rejected) > MAX_REJECTED:
+                self._rejected.clear()
+            for d in ids:
+                self._last.pop(d, None)
+                self._pending.pop(d, None)
+                self._rejected[d] = until
+
+    def _write(self, pending):
+        """One bulk UPDATE (plus INSERT of new boards if auto-registering); commits."""
+        unknown = [d for d in pending if d not in self._known]
+        new = missing = []
+        if unknown:
+            existing = set(db.session.execute(
+                db.select(Dispositivo.device_id).where(Dispositivo.device_id.in_(unknown))
+            ).scalars())
+            missing = [d for d in unknown if d not in existing]
+            if self.auto_register:
+                new = missing
+                if new:
+                    db.session.execute(db.insert(Dispositivo), [
+                        {"device_id": d, "nombre": d, "last_seen": pending[d], "activo": True}
+                        for d in new
+                    ])
+        skip = set(missing)
+        updates = [{"b_device_id": d, "b_last_seen": ts} for d, ts in pending.items() if d not in skip]
+        if updates:
+            stmt = (
+                db.update(Dispositivo)
+                .where(Dispositivo.device_id == bindparam("b_device_id"))
+                .values(last_seen=bindparam("b_last_seen"), activo=True)
+            )
+            db.session.connection().execute(stmt, updates)
+        db.session.commit()
+        self._known.update(d for d in unknown if d not in skip or self.auto_register)
+        if missing and not self.auto_register:
+            logger.info("presence: %d dispositivos sin registrar ignorados", len(missing))
+            self._reject(missing)
+        return len(pending) - (0 if self.auto_register else len(missing))
+
+    def _requeue(self, pending):
+        # keep the heartbeats for the next attempt unless newer ones arrived
+        with self._lock:
+            for d, ts in pending.items():
+                self._pending.setdefault(d, ts)
+
+    def flush(self):
+        """Write pending heartbeats to ``dispositivos``. Needs an app context.
+
+        A DB outage keeps the heartbeats for the next flush; a batch rejected
+        for its data is retried one device at a time and the offending ids are
+        dropped, so one bad row can't block everyone else's ``last_seen``.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        try:
+            return self._write(pending)
+        except OperationalError:
+            db.session.rollback()
+            logger.exception("presence flush error (BD no disponible)")
+            self._requeue(pending)
+            return 0
+        except Exception:
+            db.session.rollback()
+            logger.exception("presence flush error; reintentando dispositivo por dispositivo")
+            return self._write_each(pending)
+        finally:
+            db.session.remove()
+
+    def _write_each(self, pending):
+        written = 0
+        items = list(pending.items())
+        for i, (d, ts) in enumerate(items):
+            try:
+                written += self._write({d: ts})
+            except OperationalError:
+                db.session.rollback()
+                self._requeue(dict(items[i:]))
+                break
+            except Exception:
+                db.session.rollback()
+                logger.warning("presence: heartbeat de %r descartado", d, exc_info=True)
+                self._reject([d])
+        return written
+
+    def start(self, app, interval):
+        if self._thread is not None or interval <= 0:
+            return
+
+        def run():
+            while not self._stop.wait(interval):
+                with app.app_context():
+                    self.flush()
+
+        self._thread = threading.Thread(target=run, name="presence-flush", daemon=True)
+        self._thread.start()
+
+        def at_exit():
+            self._stop.set()
+            with app.app_context():
+                self.flush()
+
+        atexit.register(at_exit)
+
+    def status(self, online_after, offline_after, now=None):
+        """Return every known device with its presence state.
+
+        ``online`` if seen within ``online_after`` seconds, ``offline`` if not
+        seen for more than ``offline_after`` seconds, ``stale`` in between.
+        """
+        now = now or _now()
+        rows = db.session.execute(
+            db.select(Dispositivo.device_id, Dispositivo.nombre, Dispositivo.last_seen, Dispositivo.activo)
+        ).all()
+        mem = self.last_seen()
+        out = []
+        seen = set()
+        for device_id, nombre, last_seen, activo in rows:
+            ts = mem.get(device_id)
+            if last_seen is not None and (ts is None or last_seen > ts):
+                ts = last_seen
+            out.append(_entry(device_id, nombre, ts, activo, now, online_after, offline_after))
+            seen.add(device_id)
+        # heartbeats not flushed yet for boards that are not in the table
+        for device_id, ts in mem.items():
+            if device_id not in seen:
+                out.append(_entry(device_id, None, ts, True, now, online_after, offline_after))
+        return out
+
+
+def _entry(device_id, nombre, ts, activo, now, online_after, offline_after):
+    age = (now - ts).total_seconds() if ts else None
+    if age is None or age > offline_after:
+        estado = "offline"
+    elif age <= online_after:
+        estado = "online"
+    else:
+        estado = "stale"
+    return {
+        "device_id": device_id,
+        "nombre": nombre,
+        "last_seen": ts.isoformat() if ts else None,
+        "segundos_desde": round(age, 1) if age is not None else None,
+        "activo": bool(activo),
+        "estado": estado,
+    }
+
+
+tracker = PresenceTracker()
+
+
+def init_app(app):
+    tracker.auto_register = bool(app.config.get("PRESENCE_AUTO_REGISTER", False))
+    tracker.start(app, float(app.config.get("PRESENCE_FLUSH_SECONDS", 0) or 0))
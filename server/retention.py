@@ -0,0 +1,369 @@
+"""Retention for ``eventos``: monthly partitions, archival and transparent reads.
+
+On MySQL ``eventos`` is RANGE-partitioned by month on ``fecha_hora`` (see
+``docs/migrations/002_eventos_particiones.sql``). The retention job:
+
+  1. makes sure partitions exist for the coming months (splitting ``pmax``),
+  2. archives every closed partition older than ``RETENTION_KEEP_MONTHS`` to
+     ``EVENTS_ARCHIVE_DIR/eventos_YYYYMM.evca`` (columnar, see
+     ``server/event_archive.py``) or ``.csv.gz`` (``EVENTS_ARCHIVE_FORMAT``),
+  3. drops the archived partition (a metadata-only operation).
+
+Queries on recent data only touch live partitions, so their cost doesn't grow
+with the age of the installation. :func:`iter_archived_events` lets the export
+read archived months as if they were still in the table.
+
+Run it with ``flask --app server.app retention run`` or let the background
+scheduler do it every ``RETENTION_INTERVAL_HOURS``.
+"""
+import csv
+import gzip
+import logging
+import os
+import re
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache
+
+import click
+from flask import current_app
+from sqlalchemy import text
+
+from .extensions import db
+from .event_archive import EventArchive, from_us, write_archive as write_columnar
+from .serialization import FIELDS
+from .models import Evento
+
+logger = logging.getLogger(__name__)
+
+EVENT_COLUMNS = FIELDS[Evento]
+_PARTITION_RE = re.compile(r"^p(\d{4})(\d{2})$")
+_ARCHIVE_RE = re.compile(r"^eventos_(\d{4})(\d{2})\.(csv\.gz|evca)$")
+_SUFFIXES = {"csv": "csv.gz", "columnar": "evca"}
+# MySQL named lock: one retention run at a time across every server process
+LOCK_NAME = "eventos_retention"
+
+
+def _add_months(year, month, n):
+    idx = year * 12 + (month - 1) + n
+    return idx // 12, idx % 12 + 1
+
+
+def partition_name(year, month):
+    return f"p{year:04d}{month:02d}"
+
+
+def archive_dir():
+    path = current_app.config.get("EVENTS_ARCHIVE_DIR") or os.path.join(current_app.instance_path, "archive")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _is_mysql():
+    return db.engine.dialect.name == "mysql"
+
+
+def list_partitions():
+    """Return ``[(name, year, month)]`` for the monthly partitions of ``eventos``."""
+    if not _is_mysql():
+        return []
+    rows = db.session.execute(text(
+        "SELECT PARTITION_NAME FROM information_schema.PARTITIONS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'eventos' AND PARTITION_NAME IS NOT NULL "
+        "ORDER BY PARTITION_ORDINAL_POSITION"
+    )).scalars()
+    out = []
+    for name in rows:
+        m = _PARTITION_RE.match(name)
+        if m:
+            out.append((name, int(m.group(1)), int(m.group(2))))
+    return out
+
+
+def ensure_partitions(months_ahead=2, today=None):
+    """Create monthly partitions up to ``months_ahead`` months from now."""
+    if not _is_mysql():
+        return []
+    today = today or datetime.now()
+    existing = {(y, m) for _, y, m in list_partitions()}
+    if not existing:
+        # table not partitioned yet; run the migration first
+        return []
+    last = max(existing)
+    target = _add_months(today.year, today.month, months_ahead)
+    names, parts = [], []
+    y, m = _add_months(*last, 1)
+    while (y, m) <= target:
+        ny, nm = _add_months(y, m, 1)
+        names.append(partition_name(y, m))
+        parts.append(
+            f"PARTITION {names[-1]} VALUES LESS THAN "
+            f"(UNIX_TIMESTAMP('{ny:04d}-{nm:02d}-01 00:00:00'))"
+        )
+        y, m = ny, nm
+    if parts:
+        parts.append("PARTITION pmax VALUES LESS THAN MAXVALUE")
+        db.session.execute(text(f"ALTER TABLE eventos REORGANIZE PARTITION pmax INTO ({', '.join(parts)})"))
+        db.session.commit()
+    return names
+
+
+def _archive_path(year, month):
+    fmt = current_app.config.get("EVENTS_ARCHIVE_FORMAT", "columnar")
+    return os.path.join(archive_dir(), f"eventos_{year:04d}{month:02d}.{_SUFFIXES.get(fmt, 'evca')}")
+
+
+def _write_csv_archive(path, rows):
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    n = 0
+    with gzip.open(tmp, "wt", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(EVENT_COLUMNS)
+        for r in rows:
+            r = list(r)
+            r[-1] = r[-1].isoformat() if r[-1] else ""
+            writer.writerow(r)
+            n += 1
+    os.replace(tmp, path)
+    return n
+
+
+def _partition_exists(name):
+    return any(p == name for p, _, _ in list_partitions())
+
+
+def archive_partition(name, year, month):
+    """Write partition ``name`` to a compressed archive and drop it."""
+    path = _archive_path(year, month)
+    cols = ", ".join(EVENT_COLUMNS)
+    result = db.session.connection().execution_options(stream_results=True, yield_per=5000).execute(
+        text(f"SELECT {cols} FROM eventos PARTITION ({name}) ORDER BY fecha_hora")
+    )
+    if path.endswith(".evca"):
+        n = write_columnar(path, result)
+    else:
+        n = _write_csv_archive(path, result)
+    db.session.commit()
+    try:
+        db.session.execute(text(f"ALTER TABLE eventos DROP PARTITION {name}"))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        # the live partition stays the source of truth; don't leave a duplicate
+        # archive. If the partition is gone the archive is the only copy: keep it
+        if _partition_exists(name):
+            os.remove(path)
+        raise
+    logger.info("retention: archived %s (%d rows) to %s", name, n, path)
+    return path, n
+
+
+@contextmanager
+def _retention_lock():
+    """Yield True if this process got the retention lock (``GET_LOCK``), else False.
+
+    The lock lives on its own connection so session commits don't release it.
+    """
+    with db.engine.connect() as conn:
+        got = conn.execute(text("SELECT GET_LOCK(:name, 0)"), {"name": LOCK_NAME}).scalar()
+        try:
+            yield bool(got)
+        finally:
+            if got:
+                conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": LOCK_NAME})
+
+
+def run_retention(keep_months=None, today=None):
+    """Archive and drop closed partitions older than ``keep_months`` months."""
+    if not _is_mysql():
+        logger.info("retention: only supported on MySQL, skipping")
+        return []
+    with _retention_lock() as locked:
+        if not locked:
+            logger.info("retention: another process is running it, skipping")
+            return []
+        return _run_retention(keep_months, today)
+
+
+def _run_retention(keep_months, today):
+    keep_months = current_app.config.get("RETENTION_KEEP_MONTHS", 12) if keep_months is None else keep_months
+    today = today or datetime.now()
+    ensure_partitions(today=today)
+    cutoff = _add_months(today.year, today.month, -keep_months)
+    done = []
+    for name, y, m in list_partitions():
+        if (y, m) < cutoff:
+            done.append(archive_partition(name, y, m))
+    return done
+
+
+def _parse_dt(value):
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None)
+    try:
+        value = datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+    # fecha_hora is stored as naive local time
+    return value.replace(tzinfo=None)
+
+
+def archived_months():
+    """Return ``[(year, month, path)]`` for the archived months, oldest first."""
+    out = []
+    for fn in os.listdir(archive_dir()):
+        m = _ARCHIVE_RE.match(fn)
+        if m:
+            out.append((int(m.group(1)), int(m.group(2)), os.path.join(archive_dir(), fn)))
+    return sorted(out)
+
+
+@lru_cache(maxsize=256)
+def _bounds(path, mtime_ns, year, month):
+    if path.endswith(".evca"):
+        with EventArchive(path) as arch:
+            if not arch.blocks:
+                return None
+            return (from_us(min(b["ts_min"] for b in arch.blocks)),
+                    from_us(max(b["ts_max"] for b in arch.blocks)))
+    with gzip.open(path, "rt", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        first = next(reader, None)
+    if first is None:
+        return None
+    # rows are written ordered by fecha_hora and a partition ends with its month
+    ny, nm = _add_months(year, month, 1)
+    return _parse_dt(first[header.index("fecha_hora")]), datetime(ny, nm, 1)
+
+
+def archive_bounds(year, month, path):
+    """``(min, max)`` ``fecha_hora`` held by an archive, or None if it is empty.
+
+    Read from the archive rather than its name: the oldest partition also holds
+    everything before its month (see migration 002).
+    """
+    return _bounds(path, os.stat(path).st_mtime_ns, year, month)
+
+
+def _archives_in_range(desde, hasta):
+    for y, m, path in archived_months():
+        bounds = archive_bounds(y, m, path)
+        if bounds is None:
+            continue
+        lo, hi = bounds
+        if desde and hi < desde:
+            continue
+        if hasta and lo > hasta:
+            continue
+        yield path
+
+
+def _iter_csv_archive(path, desde, hasta, **filters):
+    with gzip.open(path, "rt", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None) or []
+        # columns by name: archives written before ``contador`` lack it
+        pos = {k: header.index(k) for k in EVENT_COLUMNS if k in header}
+        order = [pos.get(k) for k in EVENT_COLUMNS]
+        idx = {k: pos[k] for k, v in filters.items() if v}
+        ts_i = pos["fecha_hora"]
+        for r in reader:
+            if any(r[i] != filters[k] for k, i in idx.items()):
+                continue
+            ts = _parse_dt(r[ts_i]) if (desde or hasta) else None
+            if desde and (ts is None or ts < desde):
+                continue
+            if hasta and (ts is None or ts > hasta):
+                continue
+            yield tuple(None if i is None else r[i] for i in order)
+
+
+def iter_archived_events(desde=None, hasta=None, detalle=None):
+    """Yield archived events as tuples (``FIELDS[Evento]`` order), oldest first.
+
+    ``fecha_hora`` is returned as an ISO string, as stored in the archive.
+    Only archives whose events overlap ``[desde, hasta]`` are opened.
+    """
+    desde, hasta = _parse_dt(desde), _parse_dt(hasta)
+    for path in _archives_in_range(desde, hasta):
+        if path.endswith(".evca"):
+            with EventArchive(path) as arch:
+                yield from arch.iter_rows(desde, hasta, detalle)
+        else:
+            yield from _iter_csv_archive(path, desde, hasta, detalle=detalle)
+
+
+def count_archived_events(desde=None, hasta=None, **filters):
+    """Count archived events matching ``filters`` (tipo_evento, detalle, origen).
+
+    Columnar archives answer whole blocks from their index without reading them.
+    """
+    desde, hasta = _parse_dt(desde), _parse_dt(hasta)
+    total = 0
+    for path in _archives_in_range(desde, hasta):
+        if path.endswith(".evca"):
+            with EventArchive(path) as arch:
+                total += arch.count(desde, hasta, **filters)
+        else:
+            total += sum(1 for _ in _iter_csv_archive(path, desde, hasta, **filters))
+    return total
+
+
+def start_scheduler(app):
+    hours = float(app.config.get("RETENTION_INTERVAL_HOURS", 0) or 0)
+    if hours <= 0:
+        return None
+    stop = threading.Event()
+
+    def run():
+        while not stop.wait(hours * 3600):
+            with app.app_context():
+                try:
+                    run_retention()
+                except Exception:
+                    logger.exception("retention job error")
+                finally:
+                    db.session.remove()
+
+    t = threading.Thread(target=run, name="events-retention", daemon=True)
+    t.start()
+    return stop
+
+
+@click.group("retention")
+def retention_cli():
+    """Retención de eventos (particiones mensuales y archivo)."""
+
+
+@retention_cli.command("run")
+@click.option("--keep-months", type=int, default=None, help="Meses a conservar en la tabla")
+def run_command(keep_months):
+    for path, n in run_retention(keep_months):
+        click.echo(f"{path}: {n} eventos archivados")
+
+
+@retention_cli.command("ensure-partitions")
+@click.option("--months-ahead", type=int, default=2)
+def ensure_command(months_ahead):
+    for p in ensure_partitions(months_ahead):
+        click.echo(p)
+
+
+@retention_cli.command("info")
+@click.argument("path")
+def info_command(path):
+    """Resumen de un archivo columnar (.evca)."""
+    with EventArchive(path) as arch:
+        click.echo(f"codec={arch.codec} bloques={len(arch.blocks)} eventos={arch.rows}")
+        for b in arch.blocks:
+            click.echo(f"  {from_us(b['ts_min']).isoformat()} .. {from_us(b['ts_max']).isoformat()}  {b['rows']} filas  {sum(c[1] for c in b['cols'].values())} bytes")
+
+
+def init_app(app):
+    app.cli.add_command(retention_cli)
+    start_scheduler(app)
@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify
 from server.extensions import db
 from server.models import Command, Evento
+from server.serialization import select_columns, fetch_rows, rows_response
+from server.state import record_event_state, contador_value
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
 bp = Blueprint('commands', __name__, url_prefix='/api/commands')
@@ -41,8 +43,10 @@ def create_command():
             tipo_evento = 'RESET_CONTADOR' if 'RESET' in str(accion).upper() else None
 
     origen = data.get('origen', 'APP')
-    ev = Evento(id_usuario=uid_int, tipo_evento=tipo_evento, detalle=detalle, origen=origen, valor=accion, origen_ip=request.remote_addr)
+    ev = Evento(id_usuario=uid_int, tipo_evento=tipo_evento, detalle=detalle, origen=origen, valor=accion,
+                contador=contador_value(tipo_evento, detalle, accion), origen_ip=request.remote_addr)
     db.session.add(ev)
+    record_event_state(tipo_evento, detalle, accion, device_id=device_id)
     db.session.commit()
     return jsonify({"msg":"comando creado", "id_command": cmd.id_command}), 201
 
@@ -51,11 +55,11 @@ def create_command():
 def list_commands():
 
     device_id = request.args.get('device_id')
-    q = Command.query
+    stmt = select_columns(Command)
     if device_id:
-        q = q.filter_by(device_id=device_id)
-    rows = q.order_by(Command.fecha_creacion.desc()).all()
-    return jsonify([r.to_dict() for r in rows]), 200
+        stmt = stmt.where(Command.device_id == device_id)
+    rows = fetch_rows(stmt.order_by(Command.fecha_creacion.desc()))
+    return rows_response(Command, rows)
 
 @bp.route('mark', methods=['POST'])
 @jwt_required()
@@ -0,0 +1,70 @@
+from flask import Blueprint, request, jsonify, current_app, Response
+from server.timeseries import (
+    SERIES, TITLES, RANGES, LRUCache, parse_range, cache_window, load_series, downsample, to_us,
+)
+from server.charts import render_svg
+
+bp = Blueprint('charts', __name__, url_prefix='/charts')
+
+# rendered charts keyed by (series, desde, hasta, points, method, fmt, size)
+_cache = LRUCache(maxsize=256)
+
+MAX_POINTS = 2000
+
+
+@bp.route('', methods=['GET'])
+def list_series():
+    """Series disponibles y rangos predefinidos."""
+    return jsonify({
+        "series": [{"name": k, "title": TITLES[k]} for k in SERIES],
+        "rangos": list(RANGES),
+    }), 200
+
+
+@bp.route('/<name>.<fmt>', methods=['GET'])
+def chart(name, fmt):
+    """
+    Gráfica de una serie calculada desde `eventos`.
+      - /charts/<serie>.svg  imagen SVG
+      - /charts/<serie>.json puntos reducidos {"t": [ms], "y": [...]}
+    Query params: rango (5m, 1h, 24h, 7d, ...) o desde/hasta (ISO),
+    points (por defecto el ancho), method (minmax | lttb), width, height.
+    """
+    if name not in SERIES or fmt not in ('svg', 'json'):
+        return jsonify({"error": "serie o formato no soportado"}), 404
+    try:
+        width = min(max(int(request.args.get('width', 600)), 200), 2000)
+        height = min(max(int(request.args.get('height', 240)), 120), 1200)
+        points = min(max(int(request.args.get('points', width)), 10), MAX_POINTS)
+        method = request.args.get('method', 'minmax')
+        desde, hasta = parse_range(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    desde, hasta, live = cache_window(desde, hasta, points)
+    ttl = current_app.config.get('CHARTS_LIVE_TTL_SECONDS', 15)
+    key = (name, desde, hasta, points, method, fmt, width, height)
+    resp = _cache.get(key)
+    if resp is None:
+        try:
+            t, y = downsample(*load_series(name, desde, hasta), points, method)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if fmt == 'svg':
+            body = render_svg(t, y, TITLES[name], width, height, t0=to_us(desde), t1=to_us(hasta))
+            resp = (body, 'image/svg+xml')
+        else:
+            resp = (current_app.json.dumps({
+                "series": name,
+                "desde": desde.isoformat(),
+                "hasta": hasta.isoformat(),
+                "method": method,
+                "t": (t // 1000).tolist(),
+                "y": y.tolist(),
+            }), 'application/json')
+        _cache.put(key, resp, ttl=ttl if live else None)
+
+    out = Response(resp[0], mimetype=resp[1])
+    out.add_etag()
+    out.headers['Cache-Control'] = f"public, max-age={int(ttl) if live else 3600}"
+    return out.make_conditional(request)
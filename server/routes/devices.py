@@ -0,0 +1,25 @@
+from flask import Blueprint, request, current_app, jsonify
+from server.presence import tracker
+
+bp = Blueprint('devices', __name__, url_prefix='/api/devices')
+
+@bp.route('/presence', methods=['GET'])
+def presence():
+    """
+    Estado de conexión de los dispositivos (online / stale / offline).
+    Query params opcionales (segundos, por defecto los de la configuración):
+      - online_after: visto hace menos de esto -> online
+      - offline_after: sin verse por más de esto -> offline
+    """
+    try:
+        online_after = float(request.args.get('online_after', current_app.config['PRESENCE_ONLINE_SECONDS']))
+        offline_after = float(request.args.get('offline_after', current_app.config['PRESENCE_OFFLINE_SECONDS']))
+    except ValueError:
+        return jsonify({"error": "online_after y offline_after deben ser numéricos"}), 400
+    if offline_after < online_after:
+        offline_after = online_after
+    devices = tracker.status(online_after, offline_after)
+    resumen = {"online": 0, "stale": 0, "offline": 0}
+    for d in devices:
+        resumen[d["estado"]] += 1
+    return jsonify({"devices": devices, "resumen": resumen}), 200
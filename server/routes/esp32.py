@@ -1,32 +1,47 @@
-from flask import Blueprint, request
+from flask import Blueprint, request, current_app
 from ..models import Evento
 from ..extensions import db 
-from datetime import datetime, timezone, timedelta
+from ..serialization import select_columns, fetch_rows, rows_response
+from ..state import record_event_state
+from ..presence import tracker, device_id_from_request
+from ..ingest import get_broker, event_record, QueueFull
+from ..ingest.records import evento_columns
 
 bp = Blueprint("esp32", __name__, url_prefix="/api/esp32")
 
+
+@bp.before_request
+def heartbeat():
+    # only in memory; flushed to dispositivos.last_seen in bulk (server/presence.py)
+    device_id = device_id_from_request()
+    if device_id is not None:
+        tracker.heartbeat(device_id)
+
+
 @bp.route("/data", methods=["POST"])
 def receive_data():
+    """
+    Recibe un evento del ESP32. Con INGEST_MODE=sync se guarda en la petición
+    (201); con inprocess/redis se valida, se encola y responde 202 sin esperar
+    a la BD (lo escribe server.ingest.worker por lotes).
+    """
     data = request.get_json() or {}
+    try:
+        record = event_record(data, request.remote_addr)
+    except ValueError as e:
+        return {"error": str(e)}, 400
 
-    id_usuario = data.get("id_usuario", 1) 
-    tipo_evento = data.get("tipo_evento", "LED_ON")
-    detalle = data.get("detalle", "LED1")
-    origen = data.get("origen", "CIRCUITO")
-    valor = data.get("valor", "ON")
-
-    colombia_tz = timezone(timedelta(hours=-5))
+    broker = get_broker(current_app)
+    if broker is not None:
+        try:
+            broker.put(record)
+        except QueueFull:
+            return {"error": "Cola de ingesta llena, reintenta más tarde"}, 503
+        return {"msg": "Evento encolado"}, 202
 
-    evento = Evento(
-        id_usuario=id_usuario,
-        tipo_evento=tipo_evento,
-        detalle=detalle,
-        origen=origen,
-        valor=valor,
-        fecha_hora=datetime.now(colombia_tz),
-        origen_ip=request.remote_addr
-    )
-    db.session.add(evento)
+    db.session.add(Evento(**evento_columns(record)))
+    record_event_state(record["tipo_evento"], record["detalle"], record["valor"],
+                       device_id=record["device_id"], fecha_hora=record["fecha_hora"])
     db.session.commit()
 
     return {"msg": "Evento guardado correctamente"}, 201
@@ -41,10 +56,10 @@ def get_data():
       - since: fecha ISO para filtrar desde esa fecha
     """
     # Devuelve solo los últimos 5 registros ordenados por fecha (más recientes primero)
-    events = (
-        Evento.query.order_by(Evento.fecha_hora.desc()).limit(5).all()
+    events = fetch_rows(
+        select_columns(Evento).order_by(Evento.fecha_hora.desc()).limit(5)
     )
-    return {"events": [e.to_dict() for e in events]}, 200
+    return rows_response(Evento, events, key="events")
 
 
 @bp.route("/last-event", methods=["GET"])
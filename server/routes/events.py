@@ -1,6 +1,9 @@
 from flask import Blueprint, request, jsonify
 from server.extensions import db
 from server.models import Evento, Usuario
+from server.serialization import select_columns, fetch_rows, rows_response
+from server.state import record_event_state, contador_value
+from server.normalize import normalize_event_valor
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
 bp = Blueprint('events', __name__, url_prefix='/events')
@@ -22,8 +25,12 @@ def create_event():
     if not all([tipo_evento, detalle, valor]):
         return jsonify({"error":"tipo_evento, detalle y valor son requeridos"}), 400
     ip = request.remote_addr
-    ev = Evento(id_usuario=id_usuario, tipo_evento=tipo_evento, detalle=detalle, origen=origen, valor=str(valor), origen_ip=ip)
+    contador = contador_value(tipo_evento, detalle, valor)
+    valor = normalize_event_valor(valor, detalle)
+    ev = Evento(id_usuario=id_usuario, tipo_evento=tipo_evento, detalle=detalle, origen=origen, valor=valor,
+                contador=contador, origen_ip=ip)
     db.session.add(ev)
+    record_event_state(tipo_evento, detalle, valor, device_id=data.get('device_id'))
     db.session.commit()
     return jsonify({"msg":"evento creado","id_evento": ev.id_evento}), 201
 
@@ -31,8 +38,8 @@ def create_event():
 def latest():
     detalle = request.args.get('detalle')
     limit = int(request.args.get('limit', 5))
-    q = Evento.query
+    stmt = select_columns(Evento)
     if detalle:
-        q = q.filter_by(detalle=detalle)
-    rows = q.order_by(Evento.fecha_hora.desc()).limit(limit).all()
-    return jsonify([r.to_dict() for r in rows]), 200
+        stmt = stmt.where(Evento.detalle == detalle)
+    rows = fetch_rows(stmt.order_by(Evento.fecha_hora.desc()).limit(limit))
+    return rows_response(Evento, rows)
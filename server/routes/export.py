@@ -2,7 +2,9 @@ from flask import Blueprint, request, send_file, jsonify
 from server.extensions import db
 from server.models import Evento, HistorialExportado
 from flask_jwt_extended import jwt_required, get_jwt_identity
-import csv, io, datetime
+import csv, io, datetime, itertools
+from server.serialization import FIELDS, select_columns, fetch_rows
+from server.retention import iter_archived_events, count_archived_events
 
 bp = Blueprint('export', __name__, url_prefix='/export')
 
@@ -15,21 +17,25 @@ def export_csv():
     hasta = request.args.get('to')
     detalle = request.args.get('detalle')
 
-    q = Evento.query
+    stmt = select_columns(Evento)
     if detalle:
-        q = q.filter_by(detalle=detalle)
+        stmt = stmt.where(Evento.detalle == detalle)
     if desde:
-        q = q.filter(Evento.fecha_hora >= desde)
+        stmt = stmt.where(Evento.fecha_hora >= desde)
     if hasta:
-        q = q.filter(Evento.fecha_hora <= hasta)
-    rows = q.order_by(Evento.fecha_hora.asc()).all()
+        stmt = stmt.where(Evento.fecha_hora <= hasta)
 
     if formato == 'CSV':
+        # months already moved out of the table by the retention job are read from the archive
+        archived = iter_archived_events(desde, hasta, detalle)
+        live = (
+            r[:-1] + (r[-1].isoformat() if r[-1] else '',)
+            for r in fetch_rows(stmt.order_by(Evento.fecha_hora.asc()))
+        )
         si = io.StringIO()
         writer = csv.writer(si)
-        writer.writerow(['id_evento','id_usuario','tipo_evento','detalle','origen','valor','origen_ip','fecha_hora'])
-        for r in rows:
-            writer.writerow([r.id_evento, r.id_usuario, r.tipo_evento, r.detalle, r.origen, r.valor, r.origen_ip, r.fecha_hora.isoformat() if r.fecha_hora else ''])
+        writer.writerow(FIELDS[Evento])
+        writer.writerows(itertools.chain(archived, live))
         si.seek(0)
         
         reg = HistorialExportado(id_usuario=user, formato='CSV')
@@ -44,3 +50,19 @@ def export_csv():
         return jsonify({"ok": True, "message": "Exportación registrada como PDF"}), 200
     else:
         return jsonify({"error":"Formato no soportado"}), 400
+
+
+@bp.route('/archive/count', methods=['GET'])
+@jwt_required()
+def archive_count():
+    """
+    Cuenta eventos archivados (meses ya retirados de la tabla) sin cargarlos.
+    Query params opcionales: from, to, detalle, tipo_evento, origen
+    """
+    total = count_archived_events(
+        request.args.get('from'), request.args.get('to'),
+        detalle=request.args.get('detalle'),
+        tipo_evento=request.args.get('tipo_evento'),
+        origen=request.args.get('origen'),
+    )
+    return jsonify({"total": total}), 200
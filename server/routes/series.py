@@ -0,0 +1,52 @@
+from flask import Blueprint, request, jsonify, current_app
+from server.timeseries import SERIES, LRUCache, parse_range, cache_window, series_buckets, bucket_edges
+
+bp = Blueprint('series', __name__, url_prefix='/api/series')
+
+# per-series results keyed by (series, desde, hasta, buckets)
+_cache = LRUCache(maxsize=512)
+
+MAX_BUCKETS = 1000
+
+
+@bp.route('', methods=['GET'])
+def get_series():
+    """
+    Series agregadas en un número fijo de intervalos, para cualquier rango.
+    Query params:
+      - series: lista separada por comas (contador, sensor, led1..led4, leds); por defecto todas
+      - rango (5m, 1h, 24h, 7d, 30d, ...) o desde/hasta (ISO)
+      - buckets: número de intervalos (por defecto 60)
+    `sensor`, `ledN` y `leds` devuelven la media ponderada por tiempo de cada
+    intervalo (fracción bloqueado/encendido); `contador` el máximo y el último valor.
+    """
+    names = [n for n in request.args.get('series', ','.join(SERIES)).split(',') if n]
+    unknown = [n for n in names if n not in SERIES]
+    if unknown:
+        return jsonify({"error": f"series desconocidas: {', '.join(unknown)}"}), 400
+    try:
+        buckets = min(max(int(request.args.get('buckets', 60)), 1), MAX_BUCKETS)
+        desde, hasta = parse_range(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    desde, hasta, live = cache_window(desde, hasta, buckets)
+    ttl = current_app.config.get('SERIES_LIVE_TTL_SECONDS', 5) if live else None
+    out = {}
+    for name in names:
+        key = (name, desde, hasta, buckets)
+        data = _cache.get(key)
+        if data is None:
+            data = series_buckets(name, desde, hasta, buckets)
+            _cache.put(key, data, ttl=ttl)
+        out[name] = data
+
+    edges = bucket_edges(desde, hasta, buckets)
+    return jsonify({
+        "desde": desde.isoformat(),
+        "hasta": hasta.isoformat(),
+        "buckets": buckets,
+        "step_ms": int(edges[1] - edges[0]) // 1000,
+        "t": (edges[:-1] // 1000).tolist(),
+        "series": out,
+    }), 200
@@ -0,0 +1,23 @@
+from flask import Blueprint, request
+from server.models import EstadoActual
+from server.serialization import select_columns, fetch_rows, rows_response
+
+bp = Blueprint('state', __name__, url_prefix='/api/state')
+
+@bp.route('', methods=['GET'])
+def get_state():
+    """
+    Devuelve el estado actual (LEDs, sensor, contador) desde `estados_actuales`.
+    Query params opcionales:
+      - device_id: limita a un dispositivo (por defecto todos)
+    Responde con ETag; si el cliente envía If-None-Match y nada cambió, devuelve 304.
+    """
+    device_id = request.args.get('device_id')
+    stmt = select_columns(EstadoActual)
+    if device_id:
+        stmt = stmt.where(EstadoActual.device_id == device_id)
+    rows = fetch_rows(stmt.order_by(EstadoActual.device_id, EstadoActual.detalle))
+    resp = rows_response(EstadoActual, rows)
+    resp.add_etag()
+    resp.headers['Cache-Control'] = 'no-cache'
+    return resp.make_conditional(request)
@@ -0,0 +1,103 @@
+"""Fast serialization for list endpoints.
+
+Instead of loading ORM objects and calling ``to_dict()`` on each one, list
+endpoints select only the columns they return (plain tuples) and encode them
+in a single pass. When ``orjson`` is installed it is used as the encoder (it
+serializes datetimes natively, so no per-row ``isoformat()`` is needed);
+otherwise we fall back to the stdlib ``json`` module.
+
+Two output shapes are supported:
+  - ``records`` (default): list of objects, same keys as ``Model.to_dict()``
+  - ``columnar``: ``{"columns": [...], "rows": [[...], ...]}``, which avoids
+    repeating the keys on every row (selected with ``?format=columnar``)
+"""
+import json
+from datetime import date, datetime
+
+from flask import Response, request
+
+from .extensions import db
+from .models import Evento, Command, Dispositivo, EstadoActual, HistorialExportado
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except Exception:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+# Columns returned for each model, in the same order/keys as ``to_dict()``
+FIELDS = {
+    Evento: ("id_evento", "id_usuario", "tipo_evento", "detalle", "origen", "valor", "contador", "origen_ip", "fecha_hora"),
+    Command: ("id_command", "id_usuario", "device_id", "tipo", "detalle", "accion", "enviada", "fecha_creacion"),
+    Dispositivo: ("id_dispositivo", "device_id", "nombre", "last_seen", "activo"),
+    EstadoActual: ("id_estado", "device_id", "detalle", "valor", "fecha_actualizacion"),
+    HistorialExportado: ("id_exportacion", "id_usuario", "formato", "fecha_exportacion"),
+}
+
+FORMATS = ("records", "columnar")
+
+
+def select_columns(model):
+    """Return a ``select()`` of only the serialized columns of ``model``.
+
+    Callers add filters/order/limit as with any SQLAlchemy statement and pass
+    the result to :func:`fetch_rows`.
+    """
+    return db.select(*[getattr(model, f) for f in FIELDS[model]])
+
+
+def fetch_rows(stmt):
+    """Execute ``stmt`` and return the rows as plain tuples."""
+    return [tuple(r) for r in db.session.execute(stmt)]
+
+
+def _datetime_indexes(model):
+    cols = model.__table__.columns
+    return [i for i, f in enumerate(FIELDS[model]) if isinstance(cols[f].type, db.DateTime)]
+
+
+def _iso_rows(model, rows):
+    # stdlib json can't encode datetimes; convert only the datetime columns
+    idx = _datetime_indexes(model)
+    if not idx:
+        return rows
+    out = []
+    for r in rows:
+        r = list(r)
+        for i in idx:
+            v = r[i]
+            if isinstance(v, (datetime, date)):
+                r[i] = v.isoformat()
+        out.append(r)
+    return out
+
+
+def encode_rows(model, rows, fmt="records", key=None):
+    """Encode ``rows`` (tuples in ``FIELDS[model]`` order) to JSON bytes.
+
+    If ``key`` is given the payload is wrapped as ``{key: payload}``.
+    """
+    fields = FIELDS[model]
+    if not ORJSON_AVAILABLE:
+        rows = _iso_rows(model, rows)
+    if fmt == "columnar":
+        payload = {"columns": list(fields), "rows": rows}
+    else:
+        payload = [dict(zip(fields, r)) for r in rows]
+    if key is not None:
+        payload = {key: payload}
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def requested_format(default="records"):
+    fmt = (request.args.get("format") or default).lower()
+    return fmt if fmt in FORMATS else default
+
+
+def rows_response(model, rows, key=None, status=200):
+    """Build a JSON ``Response`` for ``rows`` honouring ``?format=``."""
+    body = encode_rows(model, rows, fmt=requested_format(), key=key)
+    return Response(body, status=status, mimetype="application/json")
@@ -0,0 +1,148 @@
+"""Current device state (``estados_actuales``) maintained at ingest time.
+
+Every route that stores an ``Evento`` calls :func:`record_event_state` before
+committing, so ``estados_actuales`` always holds one row per
+``(device_id, detalle)`` with the latest value. Clients read that handful of
+rows from ``GET /api/state`` instead of scanning recent ``eventos``.
+"""
+from datetime import datetime, timezone
+
+from sqlalchemy import or_
+
+from .extensions import db
+from .models import EstadoActual
+
+# device_id used when the board/client doesn't send one
+DEFAULT_DEVICE_ID = "default"
+
+LED_DETALLES = ("LED1", "LED2", "LED3", "LED4")
+_ON_VALUES = ("ON", "1", "TRUE")
+
+
+def _parse_contador(valor):
+    s = str(valor or "").strip().lower()
+    if s.startswith("contador="):
+        s = s[len("contador="):]
+    try:
+        return int(s)
+    except ValueError:
+        return None
+
+
+def contador_value(tipo_evento, detalle, valor):
+    """Numeric counter reading carried by an event (``eventos.contador``), or ``None``."""
+    tipo = str(tipo_evento or "").upper()
+    if detalle == "CONTADOR":
+        if tipo == "RESET_CONTADOR":
+            return 0
+        if tipo == "CONTADOR_CAMBIO":
+            return _parse_contador(valor)
+        return None
+    # the desktop app stores 'contador=N' on sensor activations
+    if str(valor or "").strip().lower().startswith("contador="):
+        return _parse_contador(valor)
+    return None
+
+
+def state_updates(tipo_evento, detalle, valor):
+    """Return the ``(detalle, valor)`` state rows implied by an event."""
+    tipo = str(tipo_evento or "").upper()
+    val = str(valor if valor is not None else "").strip().upper()
+    updates = []
+    if detalle in LED_DETALLES:
+        if tipo in ("LED_ON", "LED_OFF"):
+            updates.append((detalle, "ON" if tipo == "LED_ON" else "OFF"))
+        else:
+            updates.append((detalle, "ON" if val in _ON_VALUES else "OFF"))
+    elif detalle == "SENSOR_IR":
+        if tipo in ("SENSOR_BLOQUEADO", "SENSOR_LIBRE"):
+            updates.append(("SENSOR_IR", "ON" if tipo == "SENSOR_BLOQUEADO" else "OFF"))
+        count = contador_value(tipo, detalle, valor)
+        if count is not None:
+            updates.append(("CONTADOR", str(count)))
+    elif detalle == "CONTADOR":
+        count = contador_value(tipo, detalle, valor)
+        if count is not None:
+            updates.append(("CONTADOR", str(count)))
+    return updates
+
+
+def on_off_expr(detalle, tipo_evento, valor):
+    """SQL counterpart of :func:`state_updates` for LED and SENSOR_IR events.
+
+    1 (on / blocked), 0 (off / free), or NULL for a ``SENSOR_IR`` row that
+    doesn't change the sensor state (e.g. a bare counter reading).
+    """
+    sensor = db.case((tipo_evento == "SENSOR_BLOQUEADO", 1), (tipo_evento == "SENSOR_LIBRE", 0))
+    return db.case(
+        (detalle == "SENSOR_IR", sensor),
+        (tipo_evento == "LED_ON", 1),
+        (tipo_evento == "LED_OFF", 0),
+        (db.func.upper(db.func.trim(valor)).in_(_ON_VALUES), 1),
+        else_=0,
+    )
+
+
+def _utc(value):
+    # fecha_actualizacion is naive UTC; event times carry the Colombia offset
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def upsert_states(device_id, updates, now=None):
+    """Insert or update ``estados_actuales`` rows in the current session.
+
+    ``updates`` are ``(detalle, valor)`` pairs stamped with ``now`` (the event
+    time; default: current time) or ``(detalle, valor, fecha)`` triples. An
+    existing row is only overwritten by a value at least as recent, so events
+    committed out of order (queued ingest, several workers) can't move the
+    state back. Uses a native upsert on MySQL/SQLite and a select-then-update
+    fallback on other backends. The caller is responsible for committing.
+    """
+    if not updates:
+        return
+    device_id = device_id or DEFAULT_DEVICE_ID
+    now = _utc(now or datetime.utcnow())
+    rows = [
+        {"device_id": device_id, "detalle": u[0], "valor": str(u[1])[:20],
+         "fecha_actualizacion": _utc(u[2]) if len(u) > 2 else now}
+        for u in updates
+    ]
+    current = EstadoActual.__table__.c
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(EstadoActual)
+        newer = or_(current.fecha_actualizacion.is_(None),
+                    stmt.inserted.fecha_actualizacion >= current.fecha_actualizacion)
+        # MySQL applies the assignments in order: valor is decided before
+        # fecha_actualizacion changes
+        stmt = stmt.on_duplicate_key_update([
+            ("valor", db.func.if_(newer, stmt.inserted.valor, current.valor)),
+            ("fecha_actualizacion", db.func.if_(newer, stmt.inserted.fecha_actualizacion, current.fecha_actualizacion)),
+        ])
+        db.session.execute(stmt, rows)
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(EstadoActual)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["device_id", "detalle"],
+            set_={"valor": stmt.excluded.valor, "fecha_actualizacion": stmt.excluded.fecha_actualizacion},
+            where=or_(current.fecha_actualizacion.is_(None),
+                      stmt.excluded.fecha_actualizacion >= current.fecha_actualizacion),
+        )
+        db.session.execute(stmt, rows)
+    else:
+        for row in rows:
+            st = EstadoActual.query.filter_by(device_id=device_id, detalle=row["detalle"]).first()
+            if st is None:
+                db.session.add(EstadoActual(**row))
+            elif st.fecha_actualizacion is None or row["fecha_actualizacion"] >= st.fecha_actualizacion:
+                st.valor = row["valor"]
+                st.fecha_actualizacion = row["fecha_actualizacion"]
+
+
+def record_event_state(tipo_evento, detalle, valor, device_id=None, fecha_hora=None):
+    """Update the current state for the event about to be committed."""
+    upsert_states(device_id, state_updates(tipo_evento, detalle, valor), now=fecha_hora)
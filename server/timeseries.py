@@ -0,0 +1,350 @@
+"""Time series derived from ``eventos``: downsampling (``/charts``) and buckets (``/api/series``).
+
+Each series maps events to numbers with :func:`server.state.on_off_expr`
+(the SQL form of the rules that maintain ``estados_actuales``), so a chart
+always agrees with ``GET /api/state``:
+
+    contador      counter value (numeric ``eventos.contador`` column)
+    sensor        SENSOR_IR blocked (1) / free (0)
+    led1..led4    LED on (1) / off (0)
+    leds          number of LEDs on (0..4)
+
+Timestamps are microseconds since epoch in naive Colombia time, the same
+convention as ``eventos.fecha_hora``. Series are step functions: the value
+in effect at ``desde`` is carried in as the first point, and the last value
+is held until ``hasta`` or the current time, whichever comes first; a range
+reaching into the future has no data there.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from .event_archive import to_us
+from .extensions import db
+from .models import Evento, get_colombia_time
+from .state import LED_DETALLES, on_off_expr
+
+# series -> (state keys it reads, eventos.detalle values that produce them)
+# (contador is read from the numeric eventos.contador column instead)
+SERIES = {
+    "contador": (("CONTADOR",), ("CONTADOR", "SENSOR_IR")),
+    "sensor": (("SENSOR_IR",), ("SENSOR_IR",)),
+    "led1": (("LED1",), ("LED1",)),
+    "led2": (("LED2",), ("LED2",)),
+    "led3": (("LED3",), ("LED3",)),
+    "led4": (("LED4",), ("LED4",)),
+    "leds": (LED_DETALLES, LED_DETALLES),
+}
+
+TITLES = {
+    "contador": "Contador",
+    "sensor": "Sensor IR (bloqueado)",
+    "led1": "LED 1", "led2": "LED 2", "led3": "LED 3", "led4": "LED 4",
+    "leds": "LEDs encendidos",
+}
+
+RANGES = {
+    "5m": timedelta(minutes=5), "1h": timedelta(hours=1), "24h": timedelta(hours=24),
+    "7d": timedelta(days=7), "30d": timedelta(days=30), "90d": timedelta(days=90),
+    "180d": timedelta(days=180), "365d": timedelta(days=365),
+}
+
+
+def now():
+    # eventos.fecha_hora is stored as naive Colombia time
+    return get_colombia_time().replace(tzinfo=None)
+
+
+def parse_range(args, default="24h"):
+    """``(desde, hasta)`` from ``desde``/``hasta`` (ISO) or ``rango`` (e.g. ``24h``)."""
+    desde, hasta = args.get("desde"), args.get("hasta")
+    hasta = datetime.fromisoformat(hasta).replace(tzinfo=None) if hasta else now()
+    if desde:
+        desde = datetime.fromisoformat(desde).replace(tzinfo=None)
+    else:
+        rango = args.get("rango", default)
+        if rango not in RANGES:
+            raise ValueError(f"rango debe ser uno de {', '.join(RANGES)}")
+        desde = hasta - RANGES[rango]
+    if desde >= hasta:
+        raise ValueError("desde debe ser anterior a hasta")
+    return desde, hasta
+
+
+def _on_off():
+    return on_off_expr(Evento.detalle, Evento.tipo_evento, Evento.valor)
+
+
+def _initial_state(keys, desde):
+    """Value of each key in effect at ``desde`` (0 if it never changed before).
+
+    One grouped query: the latest event of each ``(detalle, tipo_evento)``
+    before ``desde`` (the ``idx_detalle_tipo_fecha`` index), joined back for
+    its value.
+    """
+    value = _on_off()
+    latest = (
+        db.select(Evento.detalle, Evento.tipo_evento, db.func.max(Evento.fecha_hora).label("fecha_hora"))
+        .where(Evento.detalle.in_(keys), Evento.fecha_hora < desde)
+        .group_by(Evento.detalle, Evento.tipo_evento)
+        .subquery()
+    )
+    rows = db.session.execute(
+        db.select(Evento.detalle, value)
+        .join(latest, db.and_(
+            Evento.detalle == latest.c.detalle,
+            Evento.tipo_evento == latest.c.tipo_evento,
+            Evento.fecha_hora == latest.c.fecha_hora,
+        ))
+        .where(value.isnot(None))
+        .order_by(Evento.fecha_hora, Evento.id_evento)
+    ).all()
+    state = dict.fromkeys(keys, 0.0)
+    for detalle, v in rows:
+        state[detalle] = float(v)
+    return state
+
+
+_EPOCH = datetime(1970, 1, 1)
+_US = timedelta(microseconds=1)
+
+
+def _to_us_array(fechas):
+    # several times faster than np.array(fechas, dtype="datetime64[us]") on datetime objects
+    return np.fromiter(((f - _EPOCH) // _US for f in fechas), dtype=np.int64, count=len(fechas))
+
+
+def _end_us(desde, hasta, last_us):
+    # hold the last value up to now, never into the future
+    end = to_us(max(desde, min(hasta, now())))
+    return max(end, last_us)
+
+
+def _load_contador(desde, hasta):
+    # eventos.contador is filled at ingest: read it straight from the (fecha_hora, contador) index
+    c, f = Evento.contador, Evento.fecha_hora
+    start = db.session.execute(
+        db.select(c).where(c.isnot(None), f < desde).order_by(f.desc()).limit(1)
+    ).scalar()
+    rows = db.session.execute(
+        db.select(f, c).where(c.isnot(None), f >= desde, f <= hasta).order_by(f)
+    ).all()
+    t = np.empty(len(rows) + 2, dtype=np.int64)
+    y = np.empty(len(rows) + 2, dtype=np.float64)
+    t[0], y[0] = to_us(desde), float(start or 0)
+    if rows:
+        fechas, valores = zip(*rows)
+        t[1:-1] = _to_us_array(fechas)
+        y[1:-1] = valores
+    t[-1], y[-1] = _end_us(desde, hasta, t[-2]), y[-2]
+    return t, y
+
+
+def load_series(name, desde, hasta):
+    """Return ``(t, y)`` arrays (int64 µs, float64) for ``name`` in ``[desde, hasta]``.
+
+    The last point is at ``min(hasta, now())``.
+    """
+    if name == "contador":
+        return _load_contador(desde, hasta)
+    keys, detalles = SERIES[name]
+    state = _initial_state(keys, desde)
+    value = _on_off()
+    # which key each row sets, as its position in keys (0 for single-key series)
+    key = db.case({k: i for i, k in enumerate(keys)}, value=Evento.detalle) if len(keys) > 1 else db.literal(0)
+    # Core execution: no ORM row processing for what can be 10^5+ rows
+    rows = db.session.connection().execute(
+        db.select(Evento.fecha_hora, key, value)
+        .where(Evento.detalle.in_(detalles), Evento.fecha_hora >= desde, Evento.fecha_hora <= hasta,
+               value.isnot(None))
+        .order_by(Evento.fecha_hora)
+    ).all()
+    n = len(rows)
+    t = np.empty(n + 2, dtype=np.int64)
+    y = np.empty(n + 2, dtype=np.float64)
+    t[0], y[0] = to_us(desde), sum(state.values())
+    if rows:
+        fechas, which, values = zip(*rows)
+        t[1:-1] = _to_us_array(fechas)
+        which = np.array(which, dtype=np.int64)
+        values = np.array(values, dtype=np.float64)
+        # per key, carry its last value forward (or the value at desde) and add up the keys
+        y[1:-1] = 0.0
+        positions = np.arange(n)
+        for i, k in enumerate(keys):
+            last = np.maximum.accumulate(np.where(which == i, positions, -1))
+            y[1:-1] += np.where(last >= 0, values[last], state[k])
+    t[-1], y[-1] = _end_us(desde, hasta, t[-2]), y[-2]
+    return t, y
+
+
+def lttb(t, y, n):
+    """Largest-Triangle-Three-Buckets: keep ``n`` visually significant points."""
+    size = len(t)
+    if n >= size or n < 3:
+        return t, y
+    x = t.astype(np.float64)
+    edges = np.linspace(1, size - 1, n - 1).astype(np.int64)
+    out = np.empty(n, dtype=np.int64)
+    out[0], out[-1] = 0, size - 1
+    a = 0
+    for i in range(n - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # average of the next bucket (the last point for the final bucket)
+        nlo, nhi = hi, edges[i + 2] if i + 2 < n - 1 else size
+        avg_x, avg_y = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        area = np.abs(
+            (x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a])
+        )
+        a = lo + int(area.argmax())
+        out[i + 1] = a
+    return t[out], y[out]
+
+
+def minmax(t, y, n, t0=None, t1=None):
+    """Keep the first, min, max and last point of ``n // 4`` equal time buckets.
+
+    Never drops a spike or a short state change, which suits step series.
+    """
+    if len(t) <= n:
+        return t, y
+    t0 = t[0] if t0 is None else t0
+    t1 = t[-1] if t1 is None else t1
+    buckets = max(n // 4, 1)
+    b = np.minimum((t - t0) * buckets // max(t1 - t0, 1), buckets - 1)
+    # within each bucket, sorted by value: first = min, last = max
+    order = np.lexsort((y, b))
+    bs = b[order]
+    starts = np.flatnonzero(np.r_[True, bs[1:] != bs[:-1]])
+    ends = np.r_[starts[1:], len(bs)] - 1
+    first = np.flatnonzero(np.r_[True, b[1:] != b[:-1]])
+    last = np.r_[first[1:], len(b)] - 1
+    keep = np.unique(np.concatenate([order[starts], order[ends], first, last]))
+    return t[keep], y[keep]
+
+
+def bucket_edges(desde, hasta, n):
+    """``n + 1`` equally spaced bucket edges (µs) covering ``[desde, hasta]``."""
+    return np.linspace(to_us(desde), to_us(hasta), n + 1).astype(np.int64)
+
+
+def _value_at(t, y, x):
+    # step function: value of the last point at or before each x
+    return y[np.maximum(np.searchsorted(t, x, side="right") - 1, 0)]
+
+
+def bucket_mean(t, y, edges):
+    """Time-weighted mean of a step series in each bucket.
+
+    For 0/1 series this is the fraction of the bucket spent "on" (e.g. the
+    sensor blocked ratio); for ``leds`` the average number of LEDs on. Only
+    the part of a bucket up to the series' last point (now, for a live range)
+    is averaged; buckets entirely after it are NaN.
+    """
+    widths = np.diff(t).astype(np.float64)
+    cum = np.concatenate([[0.0], np.cumsum(y[:-1] * widths)])
+    edges = np.minimum(edges, t[-1])
+    idx = np.maximum(np.searchsorted(t, edges, side="right") - 1, 0)
+    area = cum[idx] + y[idx] * (edges - t[idx])
+    elapsed = np.diff(edges)
+    out = np.diff(area) / np.maximum(elapsed, 1)
+    out[elapsed <= 0] = np.nan
+    return out
+
+
+def bucket_max(t, y, edges):
+    """Largest value reached in each bucket (including the value carried in).
+
+    Buckets starting after the series' last point are NaN.
+    """
+    out = _value_at(t, y, edges[:-1]).copy()
+    b = np.searchsorted(edges, t, side="right") - 1
+    inside = (b >= 0) & (b < len(out))
+    np.maximum.at(out, b[inside], y[inside])
+    out[edges[:-1] > t[-1]] = np.nan
+    return out
+
+
+def _json_list(a, decimals=None):
+    # NaN (no data yet) -> null
+    if decimals is not None:
+        a = np.round(a, decimals)
+    return [None if v != v else v for v in a.tolist()]
+
+
+# how /api/series reduces each series to buckets
+AGGREGATES = {"contador": "max"}
+
+
+def series_buckets(name, desde, hasta, n):
+    """Reduce ``name`` over ``[desde, hasta]`` to ``n`` buckets (constant size)."""
+    t, y = load_series(name, desde, hasta)
+    edges = bucket_edges(desde, hasta, n)
+    agg = AGGREGATES.get(name, "mean")
+    if agg == "max":
+        ultimo = _value_at(t, y, edges[1:])
+        ultimo[edges[:-1] > t[-1]] = np.nan
+        return {"agg": agg, "y": _json_list(bucket_max(t, y, edges)), "ultimo": _json_list(ultimo)}
+    return {"agg": agg, "y": _json_list(bucket_mean(t, y, edges), 4)}
+
+
+DOWNSAMPLERS = {"lttb": lttb, "minmax": minmax}
+
+
+def downsample(t, y, points, method="lttb"):
+    if method not in DOWNSAMPLERS:
+        raise ValueError(f"method debe ser uno de {', '.join(DOWNSAMPLERS)}")
+    return DOWNSAMPLERS[method](t, y, points)
+
+
+class LRUCache:
+    """Small thread-safe LRU with an optional per-entry TTL (seconds)."""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or (item[1] is not None and item[1] < time.monotonic()):
+                self._data.pop(key, None)
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key, value, ttl=None):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl if ttl else None)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+def cache_window(desde, hasta, points, live_now=None):
+    """Snap a range to its resolution so repeated "last N" requests share a key.
+
+    Returns ``(desde, hasta, live)``; ``live`` ranges end at "now" and may
+    still change, so they are cached with a short TTL.
+    """
+    step = max((hasta - desde) / max(points, 1), timedelta(seconds=1))
+    step_us = int(step.total_seconds() * 1000000)
+    live_now = live_now or now()
+    live = hasta >= live_now - step
+    if live:
+        end = -(-to_us(hasta) // step_us) * step_us
+        span = to_us(hasta) - to_us(desde)
+        hasta = datetime(1970, 1, 1) + timedelta(microseconds=end)
+        desde = hasta - timedelta(microseconds=span)
+    return desde, hasta, live
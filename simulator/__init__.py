@@ -0,0 +1,11 @@
+"""Simulated ESP32 boards for load-testing the server without hardware.
+
+    python -m simulator --url http://127.0.0.1:5000 --boards 20 --duration 30
+
+``benchmarks/bench_fleet.py`` runs the same fleet against an in-process
+``server.create_app()``.
+"""
+from .fleet import Board, Fleet, RouteStats
+from .http import AsyncHttpClient
+
+__all__ = ["Board", "Fleet", "RouteStats", "AsyncHttpClient"]
@@ -0,0 +1,50 @@
+"""Run a simulated ESP32 fleet against a running server and print a JSON report.
+
+    python -m simulator --url http://127.0.0.1:5000 --boards 20 --duration 30 [--token JWT]
+"""
+import argparse
+import asyncio
+import json
+
+from .fleet import Fleet
+
+
+def add_fleet_args(ap):
+    ap.add_argument("--boards", type=int, default=10)
+    ap.add_argument("--duration", type=float, default=30.0)
+    ap.add_argument("--sensor-rate", type=float, default=1.0, help="sensor edges per second per board")
+    ap.add_argument("--button-rate", type=float, default=0.1, help="button presses per second per board")
+    ap.add_argument("--poll-interval", type=float, default=1.0, help="seconds between last-event polls")
+    ap.add_argument("--get-data-interval", type=float, default=5.0, help="seconds between get-data calls (0 = off)")
+    ap.add_argument("--command-interval", type=float, default=2.0, help="seconds between web commands")
+    ap.add_argument("--connections", type=int, default=64)
+    ap.add_argument("--seed", type=int, default=1)
+
+
+def fleet_from_args(args, base_url, token=None):
+    return Fleet(
+        base_url,
+        boards=args.boards,
+        sensor_rate=args.sensor_rate,
+        button_rate=args.button_rate,
+        poll_interval=args.poll_interval,
+        get_data_interval=args.get_data_interval,
+        command_interval=args.command_interval,
+        token=token,
+        max_connections=args.connections,
+        seed=args.seed,
+    )
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--url", default="http://127.0.0.1:5000")
+    ap.add_argument("--token", help="JWT (from /auth/login) to send web commands and measure their latency")
+    add_fleet_args(ap)
+    args = ap.parse_args()
+    report = asyncio.run(fleet_from_args(args, args.url, args.token).run(args.duration))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
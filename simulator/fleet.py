@@ -0,0 +1,224 @@
+"""Simulated ESP32 boards speaking the firmware HTTP contract.
+
+Each ``Board`` does what ``docs/codigo_esp32.ino`` does, on its own schedule:
+  - sensor edges (Poisson, ``sensor_rate`` per second): ``POST /api/esp32/data``
+    with ``SENSOR_BLOQUEADO``/``contador=N`` and, after ``hold`` seconds,
+    ``SENSOR_LIBRE``
+  - button presses (``button_rate`` per second): ``LED_ON``/``LED_OFF`` for LED1-3
+  - ``GET /api/esp32/last-event`` every ``poll_interval`` seconds, noting each
+    new ``id_evento`` (commands from the web)
+  - ``GET /api/esp32/get-data`` every ``get_data_interval`` seconds (0 disables)
+
+``Fleet`` runs N boards on one event loop with one shared
+``AsyncHttpClient`` and, with a JWT, issues web commands (``POST /events``
+with ``origen=WEB``) to measure command latency: time from the web request
+being sent to each board seeing the event in ``last-event``.
+"""
+import asyncio
+import random
+import time
+
+from .http import AsyncHttpClient
+
+DATA = "/api/esp32/data"
+LAST_EVENT = "/api/esp32/last-event"
+GET_DATA = "/api/esp32/get-data"
+COMMANDS = "/events"
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))]
+
+
+def summarize(values):
+    data = sorted(values)
+    if not data:
+        return {"n": 0}
+    return {
+        "n": len(data),
+        "mean_ms": round(sum(data) / len(data) * 1000, 2),
+        "p50_ms": round(percentile(data, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(data, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(data, 0.99) * 1000, 2),
+        "max_ms": round(data[-1] * 1000, 2),
+    }
+
+
+class RouteStats:
+    """Response times and status codes per route."""
+
+    def __init__(self):
+        self.latencies = {}
+        self.statuses = {}
+        self.errors = {}
+
+    def record(self, route, seconds, status):
+        self.latencies.setdefault(route, []).append(seconds)
+        key = (route, status)
+        self.statuses[key] = self.statuses.get(key, 0) + 1
+
+    def error(self, route, exc):
+        name = f"{route} {type(exc).__name__}"
+        self.errors[name] = self.errors.get(name, 0) + 1
+
+    def ok(self, route):
+        return sum(n for (r, status), n in self.statuses.items() if r == route and 200 <= status < 300)
+
+    def report(self):
+        out = {}
+        for route, values in sorted(self.latencies.items()):
+            out[route] = summarize(values)
+            out[route]["status"] = {str(s): n for (r, s), n in sorted(self.statuses.items()) if r == route}
+        return out
+
+
+class Board:
+    def __init__(self, fleet, device_id, seed=None):
+        self.fleet = fleet
+        self.device_id = device_id
+        self.rnd = random.Random(seed)
+        self.counter = 0
+        self.leds = [False, False, False]
+        self.last_event_id = None
+        self.seen = {}
+
+    async def _call(self, route, method, path, body=None):
+        t0 = time.perf_counter()
+        try:
+            status, data = await self.fleet.client.request(
+                method, path, json_body=body, headers={"X-Device-Id": self.device_id}
+            )
+        except Exception as e:
+            self.fleet.stats.error(route, e)
+            return None
+        self.fleet.stats.record(route, time.perf_counter() - t0, status)
+        return data
+
+    async def send_event(self, tipo_evento, detalle, valor):
+        return await self._call("POST data", "POST", DATA, {
+            "id_usuario": 1,
+            "tipo_evento": tipo_evento,
+            "detalle": detalle,
+            "origen": "CIRCUITO",
+            "valor": valor,
+            "device_id": self.device_id,
+        })
+
+    async def sensor_loop(self, rate, hold):
+        while rate > 0:
+            await asyncio.sleep(self.rnd.expovariate(rate))
+            self.counter += 1
+            await self.send_event("SENSOR_BLOQUEADO", "SENSOR_IR", f"contador={self.counter}")
+            await asyncio.sleep(hold)
+            await self.send_event("SENSOR_LIBRE", "SENSOR_IR", "0")
+
+    async def button_loop(self, rate):
+        while rate > 0:
+            await asyncio.sleep(self.rnd.expovariate(rate))
+            i = self.rnd.randrange(3)
+            self.leds[i] = not self.leds[i]
+            on = self.leds[i]
+            await self.send_event("LED_ON" if on else "LED_OFF", f"LED{i + 1}", "ON" if on else "OFF")
+
+    async def poll_loop(self, interval):
+        await asyncio.sleep(self.rnd.uniform(0, interval))
+        while interval > 0:
+            data = await self._call("GET last-event", "GET", LAST_EVENT)
+            ev = (data or {}).get("event")
+            if ev and ev.get("id_evento") != self.last_event_id:
+                self.last_event_id = ev.get("id_evento")
+                self.seen[self.last_event_id] = time.perf_counter()
+            await asyncio.sleep(interval)
+
+    async def get_data_loop(self, interval):
+        await asyncio.sleep(self.rnd.uniform(0, interval or 1))
+        while interval > 0:
+            await self._call("GET get-data", "GET", GET_DATA)
+            await asyncio.sleep(interval)
+
+
+class Fleet:
+    def __init__(self, base_url, boards=10, sensor_rate=1.0, hold=0.2, button_rate=0.1,
+                 poll_interval=1.0, get_data_interval=5.0, command_interval=2.0, token=None,
+                 max_connections=64, seed=1, client=None):
+        self.base_url = base_url
+        self.n_boards = boards
+        self.sensor_rate = sensor_rate
+        self.hold = hold
+        self.button_rate = button_rate
+        self.poll_interval = poll_interval
+        self.get_data_interval = get_data_interval
+        self.command_interval = command_interval
+        self.token = token
+        self.max_connections = max_connections
+        self.seed = seed
+        self.client = client
+        self.stats = RouteStats()
+        # id_evento -> time the web request was sent
+        self.issued = {}
+        self.boards = []
+
+    async def command_loop(self):
+        headers = {"Authorization": f"Bearer {self.token}"}
+        rnd = random.Random(self.seed)
+        while self.token and self.command_interval > 0:
+            await asyncio.sleep(self.command_interval)
+            on = rnd.random() < 0.5
+            body = {"tipo_evento": "LED_ON" if on else "LED_OFF", "detalle": f"LED{rnd.randint(1, 3)}",
+                    "origen": "WEB", "valor": "ON" if on else "OFF"}
+            t0 = time.perf_counter()
+            try:
+                status, data = await self.client.request("POST", COMMANDS, json_body=body, headers=headers)
+            except Exception as e:
+                self.stats.error("POST events", e)
+                continue
+            self.stats.record("POST events", time.perf_counter() - t0, status)
+            if status == 201 and data:
+                self.issued[data["id_evento"]] = t0
+
+    async def run(self, duration):
+        own_client = self.client is None
+        if own_client:
+            self.client = AsyncHttpClient(self.base_url, max_connections=self.max_connections)
+        self.boards = [Board(self, f"sim-{i:03d}", seed=self.seed * 1000 + i) for i in range(self.n_boards)]
+        tasks = []
+        for b in self.boards:
+            tasks += [
+                asyncio.create_task(b.sensor_loop(self.sensor_rate, self.hold)),
+                asyncio.create_task(b.button_loop(self.button_rate)),
+                asyncio.create_task(b.poll_loop(self.poll_interval)),
+                asyncio.create_task(b.get_data_loop(self.get_data_interval)),
+            ]
+        tasks.append(asyncio.create_task(self.command_loop()))
+        t0 = time.perf_counter()
+        try:
+            await asyncio.sleep(duration)
+        finally:
+            for t in tasks:
+                t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            elapsed = time.perf_counter() - t0
+            if own_client:
+                await self.client.aclose()
+        return self.report(elapsed)
+
+    def report(self, elapsed):
+        ingested = self.stats.ok("POST data")
+        latency = [t - self.issued[i] for b in self.boards for i, t in b.seen.items() if i in self.issued]
+        return {
+            "boards": self.n_boards,
+            "seconds": round(elapsed, 2),
+            "backend": self.client.backend if self.client else None,
+            "ingest": {"events": ingested, "per_s": round(ingested / elapsed, 1) if elapsed else 0.0},
+            "commands": {
+                "issued": len(self.issued),
+                # a board only sees the latest web event, so fast commands can be skipped
+                "deliveries": len(latency),
+                "expected": len(self.issued) * self.n_boards,
+                "latency": summarize(latency),
+            },
+            "routes": self.stats.report(),
+            "errors": dict(self.stats.errors),
+        }
@@ -0,0 +1,92 @@
+"""One HTTP client shared by every simulated board.
+
+Uses ``httpx.AsyncClient`` when httpx is installed; otherwise falls back to
+``http.client`` connections (one keep-alive connection per worker thread)
+driven from asyncio through a thread pool, so the simulator has no hard
+dependencies beyond the standard library.
+"""
+import asyncio
+import http.client
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+try:
+    import httpx
+except Exception:
+    httpx = None
+
+
+class AsyncHttpClient:
+    def __init__(self, base_url, max_connections=64, timeout=10.0, use_httpx=True):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self._httpx = None
+        self._pool = None
+        if use_httpx and httpx is not None:
+            self._httpx = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=timeout,
+                limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            )
+        else:
+            parts = urlsplit(self.base_url)
+            self._host = parts.hostname
+            self._port = parts.port or (443 if parts.scheme == "https" else 80)
+            self._https = parts.scheme == "https"
+            self._prefix = parts.path
+            self._local = threading.local()
+            self._pool = ThreadPoolExecutor(max_workers=max_connections, thread_name_prefix="sim-http")
+
+    @property
+    def backend(self):
+        return "httpx" if self._httpx is not None else "http.client"
+
+    async def request(self, method, path, json_body=None, headers=None):
+        """Return ``(status, parsed JSON body or None)``."""
+        if self._httpx is not None:
+            resp = await self._httpx.request(method, path, json=json_body, headers=headers)
+            try:
+                return resp.status_code, resp.json()
+            except ValueError:
+                return resp.status_code, None
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, self._blocking_request, method, path, json_body, headers)
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            cls = http.client.HTTPSConnection if self._https else http.client.HTTPConnection
+            conn = self._local.conn = cls(self._host, self._port, timeout=self.timeout)
+        return conn
+
+    def _blocking_request(self, method, path, json_body, headers):
+        hdrs = dict(headers or {})
+        body = None
+        if json_body is not None:
+            body = json.dumps(json_body).encode("utf-8")
+            hdrs["Content-Type"] = "application/json"
+        for attempt in (0, 1):
+            conn = self._connection()
+            try:
+                conn.request(method, self._prefix + path, body=body, headers=hdrs)
+                resp = conn.getresponse()
+                data = resp.read()
+                break
+            except (http.client.HTTPException, ConnectionError):
+                # stale keep-alive connection: reconnect once
+                conn.close()
+                self._local.conn = None
+                if attempt:
+                    raise
+        try:
+            return resp.status, json.loads(data) if data else None
+        except ValueError:
+            return resp.status, None
+
+    async def aclose(self):
+        if self._httpx is not None:
+            await self._httpx.aclose()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
@@ -0,0 +1,53 @@
+import pytest
+
+from app.serial.capture import MAGIC, CaptureWriter, read_capture
+
+
+def _lines(path):
+    return [(session[0], line) for session, _, line in read_capture(path)]
+
+
+def _write_session(path, lines):
+    with CaptureWriter(path) as w:
+        for i, line in enumerate(lines):
+            w.write(line, t=w._last + 0.001 * (i + 1))
+
+
+@pytest.mark.parametrize("cut", range(1, 12))
+def test_reopen_after_crash_drops_partial_record(tmp_path, cut):
+    path = tmp_path / "cap.bin"
+    _write_session(path, ["SENSOR:1", "ACK:LED1:ON#7"])
+    size = path.stat().st_size
+    with open(path, "r+b") as f:
+        f.truncate(size - cut)  # crash in the middle of the last record
+
+    _write_session(path, ["BTN:RESET", "SENSOR:0"])
+
+    assert _lines(path) == [(0, "SENSOR:1"), (1, "BTN:RESET"), (1, "SENSOR:0")]
+
+
+def test_reopen_after_crash_in_header(tmp_path):
+    path = tmp_path / "cap.bin"
+    path.write_bytes(MAGIC[:3])
+
+    _write_session(path, ["SENSOR:1"])
+
+    assert path.read_bytes().startswith(MAGIC)
+    assert _lines(path) == [(0, "SENSOR:1")]
+
+
+def test_reopen_complete_file_keeps_everything(tmp_path):
+    path = tmp_path / "cap.bin"
+    _write_session(path, ["a", "b"])
+    _write_session(path, ["c"])
+
+    assert _lines(path) == [(0, "a"), (0, "b"), (1, "c")]
+
+
+def test_refuses_to_append_to_other_files(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_bytes(b"not a capture file")
+
+    with pytest.raises(ValueError):
+        CaptureWriter(path)
+    assert path.read_bytes() == b"not a capture file"
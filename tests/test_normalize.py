@@ -0,0 +1,102 @@
+import random
+import re
+
+import pytest
+
+from server.normalize import normalize_many, normalize_valor
+
+CASES = 20000
+SEED = 1
+
+
+def reference(valor, tipo_evento=None, detalle=None, origen=None):
+    # verbatim copy of app/utils/shared._normalize_val before the normalize module
+    try:
+        if valor is None:
+            return ""
+        if isinstance(valor, (bytes, bytearray)):
+            try:
+                valor = valor.decode('utf-8', errors='ignore')
+            except Exception:
+                valor = str(valor)
+        if isinstance(valor, (int,)):
+            if valor == 1:
+                return "ON"
+            if valor == 0:
+                return "OFF"
+            return str(valor)[:50]
+        s = str(valor).strip()
+        if not s:
+            return ""
+        if s.lower().startswith('contador='):
+            return s[:50]
+        low = s.lower()
+        if low in ('1', 'true', 'on', 'activo', 'encendido'):
+            return 'ON'
+        if low in ('0', 'false', 'off', 'inactivo', 'apagado'):
+            return 'OFF'
+        m = re.search(r'\b(1|0)\b', s)
+        if m:
+            return 'ON' if m.group(1) == '1' else 'OFF'
+        return s[:50]
+    except Exception:
+        try:
+            return str(valor)[:50]
+        except Exception:
+            return ''
+
+
+TOKENS = ["1", "0", "true", "false", "on", "off", "activo", "inactivo", "encendido", "apagado",
+          "ON", "Off", "TRUE", "Encendido", "contador=", "CONTADOR=", "LED1", "LED 1", "x1", "1x",
+          "1.0", "0,5", "-1", "10", "01", "é", "İ", "٠", "１", "_1", "a-0", " ", "\t", " "]
+
+
+class _BadStr:
+    def __str__(self):
+        raise ValueError("no str")
+
+
+def _random_value(rnd):
+    kind = rnd.random()
+    if kind < 0.55:
+        parts = [rnd.choice(TOKENS) for _ in range(rnd.randint(1, 3))]
+        s = rnd.choice(["", " ", "  "]).join(parts)
+        if rnd.random() < 0.3:
+            s = rnd.choice([" ", "\n", "\t", ""]) + s + rnd.choice([" ", "\r\n", ""])
+        if rnd.random() < 0.1:
+            s = s * rnd.randint(10, 30)
+        return s
+    if kind < 0.65:
+        return f"contador={rnd.randint(-5, 10 ** rnd.randint(1, 60))}"
+    if kind < 0.75:
+        return rnd.choice([0, 1, 2, -1, True, False, 10 ** 60, 0.0, 1.0, 1.5, float("nan")])
+    if kind < 0.85:
+        b = rnd.choice(TOKENS).encode("utf-8") + bytes(rnd.randint(0, 255) for _ in range(rnd.randint(0, 4)))
+        return bytearray(b) if rnd.random() < 0.5 else b
+    if kind < 0.95:
+        return "".join(chr(rnd.randint(0, 0x2FFF)) for _ in range(rnd.randint(0, 80)))
+    return rnd.choice([None, "", [1], {"a": 0}, _BadStr(), ("1",)])
+
+
+def _values(cases=CASES, seed=SEED):
+    rnd = random.Random(seed)
+    return [_random_value(rnd) for _ in range(cases)]
+
+
+def test_normalize_valor_matches_reference():
+    for v in _values():
+        assert normalize_valor(v) == reference(v), v
+
+
+def test_normalize_many_matches_reference():
+    values = _values()
+    for v, got in zip(values, normalize_many(values)):
+        assert got == reference(v), v
+
+
+@pytest.mark.parametrize("valor, expected", [
+    (None, ""), (1, "ON"), (0, "OFF"), (True, "ON"), (b"encendido", "ON"),
+    ("  apagado ", "OFF"), ("LED 1", "ON"), ("contador=7", "contador=7"), ("x" * 60, "x" * 50),
+])
+def test_normalize_valor_known_values(valor, expected):
+    assert normalize_valor(valor) == expected
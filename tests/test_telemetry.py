@@ -0,0 +1,31 @@
+from app.utils.telemetry import RateWindow
+
+
+def test_rate_right_after_start_uses_elapsed_time():
+    rate = RateWindow(seconds=10, started=100.0)
+    for i in range(20):
+        rate.mark(100.0 + i * 0.1)
+    # 20 lines in the first 2 s: 10/s, not 2/s over the full 10 s window
+    assert rate.stats(now=102.0)["per_s"] == 10.0
+
+
+def test_rate_after_window_fills():
+    rate = RateWindow(seconds=10, started=0.0)
+    for i in range(300):
+        rate.mark(i * 0.1)
+    stats = rate.stats(now=30.0)
+    assert stats["per_s"] == 10.0
+    assert stats["total"] == 300
+
+
+def test_rate_when_deque_is_full():
+    rate = RateWindow(seconds=10, maxlen=50, started=0.0)
+    for i in range(100):
+        rate.mark(5.0 + i * 0.01)
+    # only the last 50 stamps (from 5.5 s) are kept
+    assert rate.stats(now=6.0)["per_s"] == 100.0
+
+
+def test_rate_before_any_time_elapsed():
+    rate = RateWindow(seconds=10, started=1.0)
+    assert rate.stats(now=1.0)["per_s"] == 0.0
@@ -1,5 +1,5 @@
 import React, { useEffect, useState } from 'react'
-import { readState, writeState, createCommand, resetCounter, syncFromServer } from '../services/device'
+import { readState, writeState, createCommand, resetCounter, syncFromServer, DEVICE_ID } from '../services/device'
 import { useNavigate } from 'react-router-dom'
 
 export default function Control(){
@@ -12,7 +12,7 @@ export default function Control(){
     let mounted = true
     async function tick(){
       // sync desde servidor (si hay cambios en hardware, actualiza localStorage)
-      try{ await syncFromServer() }catch(e){}
+      try{ await syncFromServer(DEVICE_ID) }catch(e){}
       if(mounted) setState(readState())
     }
     tick()
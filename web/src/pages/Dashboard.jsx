@@ -5,16 +5,21 @@ import api from "../services/api";
 
 Chart.register(...registerables);
 
-// Función para convertir UTC a hora local de Colombia
-function toColombiaTime(utcDate) {
-  const date = new Date(utcDate);
-  // Colombia está en UTC-5
-  date.setHours(date.getHours() - 5);
-  return date;
+// /api/series devuelve los intervalos en hora local de Colombia (sin zona);
+// se formatean con los getters UTC para no volver a desplazarlos.
+function bucketLabel(ms, stepMs) {
+  const d = new Date(ms);
+  const hhmm = d.toISOString().slice(11, 16);
+  if (stepMs < 86400000) return hhmm;
+  return `${d.getUTCDate()}/${d.getUTCMonth() + 1}`;
 }
 
+const SERIES_RANGE = "24h";
+const SERIES_BUCKETS = 48;
+
 export default function Dashboard() {
   const [events, setEvents] = useState([]);
+  const [series, setSeries] = useState(null);
   const [windowWidth, setWindowWidth] = useState(window.innerWidth);
 
   useEffect(() => {
@@ -24,6 +29,13 @@ export default function Dashboard() {
     return () => clearInterval(id);
   }, []);
 
+  useEffect(() => {
+    // aggregated history: constant-size payload whatever the range
+    fetchSeries();
+    const id = setInterval(() => fetchSeries(), 5000);
+    return () => clearInterval(id);
+  }, []);
+
   useEffect(() => {
     function handleResize() {
       setWindowWidth(window.innerWidth);
@@ -48,6 +60,17 @@ export default function Dashboard() {
     }
   }
 
+  async function fetchSeries() {
+    try {
+      const res = await api.get("/api/series", {
+        params: { series: "leds,contador", rango: SERIES_RANGE, buckets: SERIES_BUCKETS },
+      });
+      setSeries(res.data);
+    } catch (e) {
+      setSeries(null);
+    }
+  }
+
   // derive indicators from events
   const lastByDetalle = {};
   events.forEach((ev) => {
@@ -70,10 +93,9 @@ export default function Dashboard() {
       String(sensorEv.valor).toLowerCase() === "true"
     : false;
 
-  // compute cumulative obstacle count and track counter evolution
+  // compute cumulative obstacle count
   let obstacleCount = 0;
   const historyPoints = []; // [{ts, obstacleCount}]
-  const counterPoints = []; // [{ts, value}]
   const eventOrigins = { APP: 0, WEB: 0, CIRCUITO: 0 };
 
   events.forEach((ev) => {
@@ -93,11 +115,6 @@ export default function Dashboard() {
       obstacleCount = 0;
     }
     historyPoints.push({ ts: ev.fecha_hora, obstacleCount });
-
-    // Track counter evolution
-    if (ev.tipo_evento === "CONTADOR_CAMBIO") {
-      counterPoints.push({ ts: ev.fecha_hora, value: parseInt(ev.valor) || 0 });
-    }
   });
 
   // Indicadores: tarjeta con contador total de eventos registrados
@@ -112,43 +129,19 @@ export default function Dashboard() {
     ? historyPoints
     : [{ ts: new Date().toISOString(), obstacleCount: 0 }];
 
-  // Construir historial del estado de los LEDs a lo largo del tiempo.
-  // Mantener un objeto con el estado actual de cada LED y registrar
-  // en cada evento cuántos LEDs están encendidos (0..4). Así la
-  // barra sube cuando se enciende alguno.
-  const ledHistoryPoints = [];
-  const ledState = { LED1: false, LED2: false, LED3: false, LED4: false };
-  events.forEach((ev) => {
-    const det = ev.detalle || "";
-    // detectar eventos que afectan LEDs por tipo o por detalle
-    const isLedDetalle = /^LED[1-4]$/.test(String(det));
-    const tipo = String(ev.tipo_evento || "");
-
-    if (isLedDetalle) {
-      // ej. detalle: "LED1" y valor: "ON"/"OFF"
-      const on = String(ev.valor || "").toUpperCase() === "ON" || tipo === "LED_ON";
-      ledState[det] = on;
-    } else if (tipo === "LED_ON" || tipo === "LED_OFF") {
-      // si no hay detalle, intentar deducir a partir de "detalle" si existe
-      // cuando no se conoce qué LED, simplemente no cambiamos estados individuales
-      // (pero podrían venir eventos generales que indiquen un encendido global)
-    }
-
-    const countOn = Object.values(ledState).filter(Boolean).length;
-    ledHistoryPoints.push({ ts: ev.fecha_hora, count: countOn });
-  });
-
-  // Etiquetas con solo la fecha (hora local Colombia) — quitar la hora
-  const ledLabels = ledHistoryPoints.map((p) =>
-    toColombiaTime(p.ts).toLocaleDateString("es-CO")
-  );
+  // Historial de LEDs y del contador desde /api/series (agregado en el servidor)
+  const seriesLabels = series
+    ? series.t.map((ms) => bucketLabel(ms, series.step_ms))
+    : [];
+  const ledsSeries = series ? series.series.leds.y : [];
+  const counterSeries = series ? series.series.contador.y : [];
 
   const ledBarData = {
-    labels: ledLabels,
+    labels: seriesLabels,
     datasets: [
       {
-        label: "LEDs encendidos",
-        data: ledHistoryPoints.map((p) => p.count),
+        label: "LEDs encendidos (promedio)",
+        data: ledsSeries,
         backgroundColor: "#f97316",
       },
     ],
@@ -183,14 +176,11 @@ export default function Dashboard() {
 
   // Nueva gráfica de línea para evolución del contador
   const counterData = {
-    // Mostrar sólo la fecha (sin la hora) en las etiquetas del eje X
-    labels: counterPoints.map((p) =>
-      toColombiaTime(p.ts).toLocaleDateString("es-CO")
-    ),
+    labels: seriesLabels,
     datasets: [
       {
         label: "Valor del Contador",
-        data: counterPoints.map((p) => p.value),
+        data: counterSeries,
         borderColor: "#8b5cf6",
         tension: 0.3,
       },
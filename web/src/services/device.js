@@ -3,6 +3,10 @@ import api from './api'
 // keep previous local simulation as fallback
 const KEY = 'device_state_v1'
 
+// placa que refleja la vista de control; 'default' es el device_id que usa el servidor
+// cuando la placa no envía uno (ver server/state.py)
+export const DEVICE_ID = import.meta.env.VITE_DEVICE_ID || 'default'
+
 function defaultState(){
   return {
     // ahora soportamos 4 leds (LED1..LED4). LED4 está conectado al sensor y es solo indicador
@@ -63,34 +67,24 @@ export function toggleLed(index){
   return updated
 }
 
-// sincroniza el estado desde los eventos del servidor (útil para reflejar cambios originados en el CIRCUITO)
-export async function syncFromServer(){
+// sincroniza el estado desde el servidor (útil para reflejar cambios originados en el CIRCUITO)
+// lee las pocas filas de /api/state (estado actual materializado) en lugar de escanear eventos;
+// el navegador reenvía el ETag y el servidor responde 304 si nada cambió.
+// siempre pide una sola placa: sin device_id /api/state devuelve las filas de todas
+// y se mezclarían en un único estado local
+export async function syncFromServer(device_id = DEVICE_ID){
   try{
-    const res = await api.get('/events', { params: { limit: 200 } })
+    const res = await api.get('/api/state', { params: { device_id: device_id || DEVICE_ID } })
     if(!Array.isArray(res.data)) return readState()
-    const events = res.data.slice().sort((a,b)=> new Date(a.fecha_hora) - new Date(b.fecha_hora))
-
-    const lastByDetalle = {}
-    events.forEach(ev=>{ lastByDetalle[ev.detalle] = ev })
-
-    const leds = [0,1,2,3].map(i=>{
-      const ev = lastByDetalle[`LED${i+1}`]
-      if(!ev) return false
-      return ev.tipo_evento === 'LED_ON' || String(ev.valor).toUpperCase() === 'ON' || String(ev.valor).toLowerCase() === 'true'
-    })
-
-    const sensorEv = lastByDetalle['SENSOR_IR']
-    const sensorOn = sensorEv ? (sensorEv.tipo_evento === 'SENSOR_BLOQUEADO' || String(sensorEv.valor).toLowerCase() === 'true') : false
-
-    // compute obstacleCount using CONTADOR_CAMBIO events if present
-    let obstacleCount = readState().obstacleCount || 0
-    events.forEach(ev=>{
-      if(ev.tipo_evento === 'CONTADOR_CAMBIO' && ev.detalle === 'CONTADOR'){
-        obstacleCount = parseInt(ev.valor) || obstacleCount
-      }else if(ev.tipo_evento === 'RESET_CONTADOR'){
-        obstacleCount = 0
-      }
-    })
+
+    const byDetalle = {}
+    res.data.forEach(st=>{ byDetalle[st.detalle] = String(st.valor).toUpperCase() })
+
+    const leds = [0,1,2,3].map(i=> byDetalle[`LED${i+1}`] === 'ON')
+    const sensorOn = byDetalle['SENSOR_IR'] === 'ON'
+    const obstacleCount = byDetalle['CONTADOR'] !== undefined
+      ? (parseInt(byDetalle['CONTADOR']) || 0)
+      : (readState().obstacleCount || 0)
 
     const updated = writeState({ leds, sensor: sensorOn, obstacleCount })
     return updated